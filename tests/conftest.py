@@ -0,0 +1,29 @@
+import os
+import cv2
+import pytest
+from transaction_extractor.parsers import rules
+from transaction_extractor.extractors import itau, ItauExtractor
+from .helpers import draw_page
+
+# Folder of the package, whose data files the code reads relative to the working directory
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'transaction_extractor')
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    Run every test from an empty folder linking the package, so the data/
+    folders the code writes to (rule cache, journals, templates) are temporary.
+    """
+    os.symlink(PACKAGE_DIR, tmp_path / 'transaction_extractor')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rules, '_stores', {})
+    return tmp_path
+
+@pytest.fixture
+def itau_pdf(workdir, monkeypatch):
+    """An Itaú statement whose single page is drawn instead of rasterized (there is no PDF renderer here)."""
+    # pdf2image renders Itaú pages in grayscale
+    page = cv2.cvtColor(draw_page([2, 3, 4, 5, 6], header=[1], boxed=True), cv2.COLOR_BGR2GRAY)
+    monkeypatch.setattr(itau, 'pdfinfo_from_path', lambda path: {'Pages': 1})
+    monkeypatch.setattr(ItauExtractor, 'rasterize', lambda self, path, pages: iter([(1, page)] if pages else []))
+    return str(workdir / 'itau.pdf')
@@ -0,0 +1,134 @@
+import cv2
+import numpy as np
+from transaction_extractor.extractors.backends import OCRBackend, DATA_KEYS
+
+# Text lines of a synthetic Itaú statement, drawn by itau_pdf (see conftest.py)
+ITAU_TEXTS = [
+    'DATA LANCAMENTO VALOR',
+    '01/03/2024 SALDO INICIAL 1000,00',
+    '05/03/2024 REMUNERACAO/SALARIO 5000,00',
+    '10/03/2024 PIX TRANSF FELIPE -150,00',
+    '15/03/2024 MOBILEPAG TIT BANCO -3850,00',
+    '31/03/2024 SALDO FINAL 2000,00',
+]
+
+# Side of the square markers that stand for text on synthetic pages
+MARKER = 9
+
+def draw_page(rows: list, header: list = (), width: int = 900, row_height: int = 44,
+              top: int = 60, bottom: int = 60, ruled: bool = True, boxed: bool = False) -> np.ndarray:
+    """
+    Draw a synthetic statement page (BGR) for the MarkerOCR engine.
+
+    `header` holds the codes of the text lines above the table and `rows`
+    the codes of the lines of each table row (an int or a list of ints for
+    rows spanning several lines). A line with code n is drawn as n square
+    markers; rows are separated by horizontal ruling lines when `ruled`,
+    closed into a box by vertical lines at both ends when `boxed`.
+    """
+    rows = [row if isinstance(row, (list, tuple)) else [row] for row in rows]
+    line_height = 22
+    height = top + len(header) * line_height + sum(max(row_height, len(row) * line_height + 14) for row in rows) + bottom
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    def draw_line(code, y):
+        for i in range(code):
+            x = 60 + i * (MARKER + 8)
+            page[y:y+MARKER, x:x+MARKER] = 0
+
+    y = top
+    for code in header:
+        draw_line(code, y + 6)
+        y += line_height
+    table_top = y
+
+    for row in rows:
+        if ruled:
+            page[y:y+2, 20:width-20] = 0
+        height = max(row_height, len(row) * line_height + 14)
+        line_top = y + (height - len(row) * line_height) // 2 + 6
+        for i, code in enumerate(row):
+            draw_line(code, line_top + i * line_height)
+        y += height
+
+    if ruled and rows:
+        page[y:y+2, 20:width-20] = 0
+        if boxed:
+            page[table_top:y+2, 20:22] = 0
+            page[table_top:y+2, width-22:width-20] = 0
+    return page
+
+class MarkerOCR(OCRBackend):
+    """
+    OCR engine for synthetic pages drawn with draw_page.
+
+    Each text line is read as texts[n - 1], n being the number of square
+    markers on it; lines separated by a horizontal ruling line form separate
+    paragraphs, which like Tesseract are separated by a blank line.
+    """
+
+    name = 'markers'
+
+    def __init__(self, texts: list):
+        self.texts = texts
+        self.calls = 0
+
+    def lines(self, image: np.ndarray) -> list:
+        """Return the (paragraph, code, (left, top, right, bottom)) of each text line, top to bottom."""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        ink = (gray < 128).astype(np.uint8)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink)
+        markers = []
+        for x, y, w, h, area in stats[1:count]:
+            if 6 <= w <= 30 and 6 <= h <= 30 and abs(w - h) <= 3 and area >= 0.8 * w * h:
+                markers.append((x, y, w, h))
+
+        # Group markers into lines by their vertical center
+        groups = []
+        for x, y, w, h in sorted(markers, key=lambda m: m[1] + m[3] / 2):
+            center = y + h / 2
+            if groups and abs(center - groups[-1]['center']) < h / 2:
+                groups[-1]['boxes'].append((x, y, w, h))
+            else:
+                groups.append({'center': center, 'boxes': [(x, y, w, h)]})
+
+        rulings = np.flatnonzero(ink.mean(axis=1) >= 0.5)
+        lines = []
+        paragraph = 1
+        for i, group in enumerate(groups):
+            if i and ((rulings > groups[i - 1]['center']) & (rulings < group['center'])).any():
+                paragraph += 1
+            boxes = group['boxes']
+            left = min(x for x, _, _, _ in boxes)
+            top = min(y for _, y, _, _ in boxes)
+            right = max(x + w for x, _, w, _ in boxes)
+            bottom = max(y + h for _, y, _, h in boxes)
+            lines.append((paragraph, len(boxes), (int(left), int(top), int(right), int(bottom))))
+        return lines
+
+    def text(self, code: int) -> str:
+        return self.texts[code - 1] if code <= len(self.texts) else ''
+
+    def image_to_string(self, image: np.ndarray, config: str, timeout: int = 0) -> str:
+        self.calls += 1
+        text = ''
+        previous = None
+        for paragraph, code, _ in self.lines(image):
+            if previous is not None:
+                text += '\n\n' if paragraph != previous else '\n'
+            text += self.text(code)
+            previous = paragraph
+        return text + '\n' if text else ''
+
+    def image_to_data(self, image: np.ndarray, config: str, timeout: int = 0) -> dict:
+        self.calls += 1
+        data = {key: [] for key in DATA_KEYS}
+        for line, (paragraph, code, (left, top, right, bottom)) in enumerate(self.lines(image), start=1):
+            words = self.text(code).split()
+            step = max(1, (right - left) // max(1, len(words)))
+            for i, word in enumerate(words):
+                values = (5, 1, 1, paragraph, line, i + 1, left + i * step, top, step, bottom - top, 95, word)
+                for key, value in zip(DATA_KEYS, values):
+                    data[key].append(value)
+        return data
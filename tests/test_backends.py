@@ -0,0 +1,96 @@
+import json
+import pickle
+import numpy as np
+import pytest
+from transaction_extractor.extractors.backends import (
+    ReplayBackend, TesseractBackend, parse_config, get_backend, DATA_KEYS
+)
+from .helpers import draw_page, MarkerOCR
+
+TEXTS = ['04/05/2024 Hotel 450.00', '05/05/2024 Meals/Drinks 35.50']
+
+def test_recorded_output_is_replayed(workdir):
+    path = str(workdir / 'ocr.jsonl')
+    page = draw_page([1, 2])
+    engine = MarkerOCR(TEXTS)
+
+    recorder = ReplayBackend(path, record=engine)
+    text = recorder.image_to_string(page, '--psm 6')
+    data = recorder.image_to_data(page, '--psm 6')
+    assert recorder.image_to_string(page, '--psm 6') == text
+    assert (engine.calls, recorder.misses, recorder.hits) == (2, 2, 1)
+
+    replay = ReplayBackend(path)
+    replay.check()
+    assert replay.image_to_string(page, '--psm 6') == text
+    assert replay.image_to_data(page, '--psm 6') == data
+    assert (replay.hits, replay.misses) == (2, 0)
+
+def test_missing_calls(workdir):
+    path = str(workdir / 'ocr.jsonl')
+    page = draw_page([1])
+    ReplayBackend(path, record=MarkerOCR(TEXTS)).image_to_string(page, '--psm 6')
+
+    # A different config or image is another call
+    with pytest.raises(KeyError):
+        ReplayBackend(path).image_to_string(page, '--psm 4')
+    with pytest.raises(KeyError):
+        ReplayBackend(path).image_to_string(draw_page([2]), '--psm 6')
+
+    lenient = ReplayBackend(path, strict=False)
+    assert lenient.image_to_string(page, '--psm 4') == ''
+    assert lenient.image_to_data(page, '--psm 4') == {key: [] for key in DATA_KEYS}
+    assert lenient.misses == 2
+
+    with pytest.raises(FileNotFoundError):
+        ReplayBackend(str(workdir / 'missing.jsonl')).check()
+
+def test_torn_line_is_skipped(workdir):
+    path = str(workdir / 'ocr.jsonl')
+    page = draw_page([1])
+    ReplayBackend(path, record=MarkerOCR(TEXTS)).image_to_string(page, '')
+    with open(path, 'a') as f:
+        f.write('{"key": "abc", "out')
+
+    replay = ReplayBackend(path)
+    assert replay.image_to_string(page, '') == TEXTS[0] + '\n'
+    assert len(replay.outputs) == 1
+
+def test_recorded_outputs_are_not_pickled(workdir):
+    path = str(workdir / 'ocr.jsonl')
+    page = draw_page([1])
+    recorder = ReplayBackend(path, record=MarkerOCR(TEXTS))
+    recorder.image_to_string(page, '')
+
+    copy = pickle.loads(pickle.dumps(recorder))
+    assert copy._outputs is None
+    assert copy.image_to_string(page, '') == TEXTS[0] + '\n'
+    assert copy.hits == 1
+    with open(path) as f:
+        assert len([json.loads(line) for line in f]) == 1
+
+def test_key_depends_on_pixels_not_memory_layout():
+    page = draw_page([1])
+    assert ReplayBackend.key('image_to_string', page, '') == ReplayBackend.key('image_to_string', np.asfortranarray(page), '')
+    assert ReplayBackend.key('image_to_string', page, '') != ReplayBackend.key('image_to_data', page, '')
+
+def test_get_backend(workdir):
+    path = str(workdir / 'ocr.jsonl')
+    assert isinstance(get_backend('tesseract'), TesseractBackend)
+
+    recorder = get_backend('tesseract', record=path)
+    assert isinstance(recorder, ReplayBackend) and isinstance(recorder.record, TesseractBackend)
+
+    replay = get_backend('tesseract', replay=path)
+    assert isinstance(replay, ReplayBackend) and replay.record is None
+
+    with pytest.raises(ValueError):
+        get_backend('easyocr')
+
+def test_parse_config():
+    options = parse_config("--oem 1 --psm 6 -l por --dpi 300 -c tessedit_char_whitelist=0123456789,")
+    assert options == {
+        'oem': 1, 'psm': 6, 'lang': 'por', 'dpi': 300,
+        'variables': {'tessedit_char_whitelist': '0123456789,'},
+    }
+    assert parse_config('')['psm'] == 3
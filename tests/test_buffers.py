@@ -0,0 +1,123 @@
+import os
+import multiprocessing
+import cv2
+import numpy as np
+import pytest
+from transaction_extractor.extractors import ItauExtractor
+from transaction_extractor.extractors.buffers import PageBufferPool, RegionHandle, resolve
+from transaction_extractor.extractors.chrome_river import ChromeRiverExtractor
+from transaction_extractor.extractors.scheduler import ResourceScheduler
+from .helpers import MarkerOCR, draw_page
+
+def region_sum(region):
+    return int(resolve(region).astype(np.int64).sum()), resolve(region).shape
+
+def page(shape, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=shape, dtype=np.uint8)
+
+def test_region_handles_resolve_to_the_page(workdir):
+    with PageBufferPool(str(workdir)) as pool:
+        image = page((120, 80, 3))
+        handle, view = pool.allocate(image.shape)
+        view[:] = image
+
+        region = RegionHandle(handle, (10, 20, 30, 40))
+        assert np.array_equal(resolve(region), image[20:60, 10:40])
+
+        # Plain arrays are passed through
+        assert resolve(image) is image
+
+def test_released_buffers_are_reused(workdir):
+    with PageBufferPool(str(workdir)) as pool:
+        small, _ = pool.allocate((100, 100, 3))
+        large, _ = pool.allocate((200, 100, 3))
+        pool.release(small)
+        pool.release(large)
+        pool.release(large)
+        assert len(pool.free) == 2
+
+        # The smallest buffer that fits is taken
+        reused, view = pool.allocate((50, 100, 3))
+        assert reused.path == small.path
+        assert view.shape == (50, 100, 3)
+
+        # Nothing free is large enough
+        bigger, _ = pool.allocate((300, 100, 3))
+        assert bigger.path not in (small.path, large.path)
+        assert pool.count == 3
+
+        directory = pool.directory
+    assert not os.path.exists(directory)
+
+def test_workers_read_regions_from_the_shared_buffer(workdir):
+    with PageBufferPool(str(workdir)) as pool:
+        image = page((300, 200, 3), seed=1)
+        handle, view = pool.allocate(image.shape)
+        view[:] = image
+        boxes = [(0, 0, 200, 100), (50, 100, 100, 150), (10, 250, 20, 50)]
+
+        with multiprocessing.get_context('spawn').Pool(2) as workers:
+            results = workers.map(region_sum, [RegionHandle(handle, box) for box in boxes])
+
+        for (x, y, w, h), (total, shape) in zip(boxes, results):
+            region = image[y:y+h, x:x+w]
+            assert shape == region.shape
+            assert total == int(region.astype(np.int64).sum())
+
+def test_extractor_shares_pages_only_with_worker_processes():
+    image = page((100, 100, 3))
+    boxes = [(0, 0, 50, 50)]
+
+    inline = ChromeRiverExtractor(scheduler=ResourceScheduler(workers=1), backend=MarkerOCR([]))
+    handle, shared = inline.share_page(image)
+    assert handle is None
+    regions = inline.page_regions(shared, handle, boxes)
+    assert isinstance(regions[0], np.ndarray)
+
+    extractor = ChromeRiverExtractor(scheduler=ResourceScheduler(max_threads=2, workers=2), backend=MarkerOCR([]))
+    try:
+        handle, shared = extractor.share_page(image)
+        regions = extractor.page_regions(shared, handle, boxes)
+        assert isinstance(regions[0], RegionHandle)
+        assert np.array_equal(resolve(regions[0]), image[:50, :50])
+
+        extractor.release_pages([handle])
+        assert extractor.buffers.free == [handle.path]
+    finally:
+        extractor.close()
+    assert extractor.buffers is None
+    assert not os.path.exists(handle.path)
+
+def failing_ocr(regions, labels):
+    raise RuntimeError("OCR failed")
+
+def test_buffers_are_released_when_ocr_fails(workdir, itau_pdf, monkeypatch):
+    image_path = str(workdir / 'statement.png')
+    cv2.imwrite(image_path, draw_page([2, 3], header=[1], boxed=True))
+
+    for extractor, extract, path in [
+        (ChromeRiverExtractor, 'extract_text_from_image', image_path),
+        (ItauExtractor, 'extract_text_from_pdf', itau_pdf),
+    ]:
+        extractor = extractor(scheduler=ResourceScheduler(max_threads=2, workers=2), backend=MarkerOCR([]))
+        monkeypatch.setattr(extractor, 'extract_regions', failing_ocr)
+        try:
+            with pytest.raises(RuntimeError):
+                getattr(extractor, extract)(path)
+            assert extractor.buffers.count == 1
+            assert len(extractor.buffers.free) == 1
+        finally:
+            extractor.close()
+
+def test_itau_pages_are_shared_single_channel(itau_pdf, monkeypatch):
+    extractor = ItauExtractor(scheduler=ResourceScheduler(max_threads=2, workers=2), backend=MarkerOCR([]))
+    shapes = []
+    page_regions = extractor.page_regions
+    monkeypatch.setattr(extractor, 'page_regions', lambda image, handle, boxes: shapes.append(image.shape) or page_regions(image, handle, boxes))
+    monkeypatch.setattr(extractor, 'extract_regions', lambda regions, labels: [])
+    try:
+        extractor.extract_text_from_pdf(itau_pdf)
+        assert len(shapes) == 1 and len(shapes[0]) == 2
+        assert len(extractor.buffers.free) == 1
+    finally:
+        extractor.close()
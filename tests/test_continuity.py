@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+from transaction_extractor.continuity import BalanceContinuityValidator
+
+def statement(opening_date, closing_date, opening, transactions, account='itau', closing=None):
+    """Rows of a statement with transactions dated between its balance rows."""
+    rows = [(opening_date, 'SALDO INICIAL', opening)]
+    for i, (date, amount) in enumerate(transactions):
+        rows.append((date, f'PIX TRANSF {i}', amount))
+    if closing is not False:
+        total = opening + sum(amount for _, amount in transactions)
+        rows.append((closing_date, 'SALDO FINAL', total if closing is None else closing))
+    return pd.DataFrame([
+        {'account': account, 'date': pd.Timestamp(date), 'description': description, 'amount': amount}
+        for date, description, amount in rows
+    ])
+
+def history(*statements):
+    return pd.concat(statements, ignore_index=True)
+
+def issues(df, **kwargs):
+    return BalanceContinuityValidator(**kwargs).validate(df)['issue'].tolist()
+
+def test_consecutive_months_are_continuous():
+    df = history(
+        statement('2024-01-01', '2024-01-31', 100.0, [('2024-01-10', 50.0), ('2024-01-20', -30.0)]),
+        statement('2024-02-01', '2024-02-29', 120.0, [('2024-02-03', 10.0)]),
+        statement('2024-03-01', '2024-03-31', 130.0, [('2024-03-15', -5.0)]),
+    )
+    assert issues(df) == []
+
+def test_last_transaction_before_month_end_is_not_a_gap():
+    # The closing balance is dated at the end of the month, after the last transaction
+    df = history(
+        statement('2024-01-01', '2024-01-31', 100.0, [('2024-01-03', 50.0), ('2024-01-12', -30.0)]),
+        statement('2024-02-01', '2024-02-29', 120.0, [('2024-02-20', 10.0)]),
+    )
+    assert issues(df, max_gap_days=1) == []
+
+def test_balance_rows_dated_with_transactions_need_month_periods():
+    df = history(
+        statement('2024-01-03', '2024-01-12', 100.0, [('2024-01-03', 50.0), ('2024-01-12', -30.0)]),
+        statement('2024-02-05', '2024-02-20', 120.0, [('2024-02-05', 10.0), ('2024-02-20', 5.0)]),
+        statement('2024-04-02', '2024-04-09', 135.0, [('2024-04-02', 1.0), ('2024-04-09', -1.0)]),
+    )
+    assert issues(df) == ['missing_period', 'missing_period']
+
+    # A month without statement is still reported
+    report = BalanceContinuityValidator(period='month').validate(df)
+    assert report['issue'].tolist() == ['missing_period']
+    assert report['start'].iloc[0] == pd.Timestamp('2024-04-01')
+    assert report['previous_end'].iloc[0] == pd.Timestamp('2024-02-29')
+
+def test_late_transaction_does_not_extend_the_period():
+    # A transaction posted after the closing balance date is not an overlap with the next statement
+    df = history(
+        statement('2024-01-01', '2024-01-31', 100.0, [('2024-01-10', 50.0), ('2024-02-02', -30.0)]),
+        statement('2024-02-01', '2024-02-29', 120.0, [('2024-02-03', 10.0)]),
+    )
+    assert issues(df) == []
+
+def test_balance_and_period_issues():
+    df = history(
+        statement('2024-01-01', '2024-01-31', 100.0, [('2024-01-10', 50.0)]),
+        statement('2024-01-01', '2024-01-31', 100.0, [('2024-01-10', 50.0)]),
+        statement('2024-02-01', '2024-02-29', 140.0, [('2024-02-10', 10.0)], closing=999.0),
+        statement('2024-02-15', '2024-03-31', 999.0, [('2024-03-10', 1.0)], closing=False),
+        statement('2024-01-01', '2024-01-31', 0.0, [('2024-01-10', 1.0)], account='other'),
+    )
+    report = BalanceContinuityValidator().validate(df)
+    assert list(zip(report['account'], report['issue'])) == [
+        ('itau', 'duplicate'),
+        ('itau', 'total_mismatch'),
+        ('itau', 'balance_gap'),
+        ('itau', 'missing_closing'),
+        ('itau', 'overlap'),
+    ]
+    gap = report[report['issue'] == 'balance_gap'].iloc[0]
+    assert (gap['expected'], gap['found']) == (150.0, 140.0)
+
+def test_unknown_period():
+    with pytest.raises(ValueError):
+        BalanceContinuityValidator(period='week')
@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import pytest
+from transaction_extractor.detection import LayoutDetector, DETECTION_DPI, TABLE_DPI
+from .helpers import draw_page, MarkerOCR
+
+@pytest.fixture
+def detector():
+    return LayoutDetector(backend=MarkerOCR(['CHROME RIVER EXPENSE REPORT', '04/05/2024 Hotel 450.00', 'TotalPayMeAmount 450.00']))
+
+@pytest.mark.parametrize('header, bank', [
+    ('date,category,title,amount', 'nubank'),
+    ('date,title,amount', 'nubank'),
+    ('Data,Valor,Identificador,Descrição', 'nubank'),
+    ('Data Lançamento;Histórico;Descrição;Valor;Saldo', 'inter'),
+    ('Date,Description,Category,Cost,Currency,Ana,Bruno', 'splitwise'),
+])
+def test_csv_exports_detected_by_columns(workdir, detector, header, bank):
+    path = workdir / 'export.csv'
+    path.write_text(f'{header}\n2024-01-05,x,y,1.00\n', encoding='utf-8')
+    detection = detector.detect(str(path))
+    assert detection.bank == bank
+    assert detection.confidence >= 0.5
+
+def test_unknown_csv_is_not_detected(workdir, detector):
+    path = workdir / 'export.csv'
+    path.write_text('when,what,how much\n2024-01-05,x,1.00\n')
+    assert detector.detect(str(path)).bank is None
+
+def test_screenshot_detected_from_text_and_tables(workdir, detector):
+    path = workdir / 'report.png'
+    cv2.imwrite(str(path), draw_page([2, 3], header=[1]))
+    detection = detector.detect(str(path))
+    assert detection.bank == 'chrome_river'
+    assert detection.scores['chrome_river'] > 0
+
+def test_short_rulings_found_at_low_resolution():
+    # A small ruled box of about 10pt, as rendered at the detection DPI
+    page = np.full((200, 300), 255, dtype=np.uint8)
+    cv2.rectangle(page, (100, 80), (130, 110), 0, 1)
+    scale = DETECTION_DPI / TABLE_DPI
+    assert LayoutDetector.count_tables(page, scale) == 1
+    assert LayoutDetector.count_tables(page) == 0
+
+def test_only_ruled_pages_have_tables():
+    for ruled, found in ((True, True), (False, False)):
+        page = cv2.cvtColor(draw_page([1, 2, 3], ruled=ruled), cv2.COLOR_BGR2GRAY)
+        assert (LayoutDetector.count_tables(page) > 0) == found
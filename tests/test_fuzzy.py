@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from transaction_extractor.parsers import TrigramIndex, ItauParser
+from transaction_extractor.parsers.fuzzy import normalize
+
+def test_normalize():
+    assert normalize('Pão de Açúcar 123 - SP') == 'PAO DE ACUCAR SP'
+
+def test_best_match_and_votes():
+    index = TrigramIndex()
+    index.add('UBER *TRIP 1234', 'Transporte', 'Uber')
+    index.add('UBER TRIP', 'Transporte', 'Uber')
+    index.add('UBER TRIP', 'Lazer', None)
+    index.add('PADARIA REAL', 'Alimentação', 'Padaria')
+    assert len(index) == 2
+
+    match = index.best_match('UBER* TRIP SAO PAULO')
+    assert (match['match'], match['category'], match['subcategory']) == ('UBER TRIP', 'Transporte', 'Uber')
+    assert index.best_match('FARMACIA POPULAR') is None
+
+def test_history_rows_without_category_are_skipped():
+    history = pd.DataFrame({
+        'description': ['MERCADO BOM PRECO', 'MERCADO BOM PRECO', np.nan, 'POSTO SHELL'],
+        'category': [np.nan, 'Alimentação', 'Transporte', 'Não Identificado'],
+        'subcategory': [np.nan, 'Mercado', np.nan, np.nan],
+    })
+    index = TrigramIndex.from_history([history])
+    assert len(index) == 1
+
+    match = index.best_match('MERCADO BOM PRECO LTDA')
+    assert match['category'] == 'Alimentação'
+    assert index.best_match('POSTO SHELL') is None
+
+def test_parser_fuzzy_fallback():
+    parser = ItauParser()
+    index = TrigramIndex()
+    index.add('PADARIA REAL', 'Alimentação', 'Padaria')
+    parser.use_fuzzy_index(index)
+
+    # Rules win over the fuzzy index
+    assert parser._classify_transaction('REMUNERACAO/SALARIO', 5000) == ('Receitas', 'Salário')
+    assert parser._classify_transaction('PADARIA REAL LTDA', -10) == ('Alimentação', 'Padaria')
+    assert parser._classify_transaction('XYZ', -10) == ('Não Identificado', None)
+    assert list(parser.fuzzy_report()['match']) == ['PADARIA REAL']
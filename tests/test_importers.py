@@ -0,0 +1,121 @@
+import pytest
+from datetime import date
+from transaction_extractor.importers import CSVImporter, OFXImporter, SplitwiseImporter
+from transaction_extractor.parsers import NubankParser, SplitwiseParser
+
+SPLITWISE_CSV = """Date,Description,Category,Cost,Currency,Ana,Bruno,Carla
+2024-03-01,Mercado,Groceries,90.00,BRL,60.00,-30.00,-30.00
+2024-03-02,Jantar,Dining out,100.00,BRL,-70.00,85.00,-15.00
+2024-03-03,Cinema,Entertainment,40.00,BRL,0.00,20.00,-20.00
+2024-03-04,Acerto,Payment,30.00,BRL,-30.00,30.00,0.00
+
+2024-03-31,Total balance, , ,BRL,-40.00,105.00,-65.00
+"""
+
+@pytest.fixture
+def splitwise_csv(workdir):
+    path = workdir / 'group.csv'
+    path.write_text(SPLITWISE_CSV, encoding='utf-8')
+    return str(path)
+
+def records(importer, path):
+    return [(record['date'], record['description'], round(record['amount'], 2)) for record in importer.iter_records(path)]
+
+def test_splitwise_csv_user_share(splitwise_csv):
+    # Ana paid the groceries (owing 30) and owes 70 of the dinner Bruno paid
+    assert records(SplitwiseImporter(user_name='Ana'), splitwise_csv) == [
+        (date(2024, 3, 1), 'Mercado', -30.0),
+        (date(2024, 3, 2), 'Jantar', -70.0),
+    ]
+    # Bruno paid the dinner unevenly split, owing 15 of it
+    assert records(SplitwiseImporter(user_name='Bruno'), splitwise_csv) == [
+        (date(2024, 3, 1), 'Mercado', -30.0),
+        (date(2024, 3, 2), 'Jantar', -15.0),
+        (date(2024, 3, 3), 'Cinema', -20.0),
+    ]
+
+def test_splitwise_csv_full_cost_without_user(splitwise_csv, monkeypatch):
+    monkeypatch.delenv('SPLITWISE_USER_NAME', raising=False)
+    amounts = [record['amount'] for record in SplitwiseImporter().iter_records(splitwise_csv)]
+    assert amounts == [-90.0, -100.0, -40.0]
+
+def test_splitwise_csv_unknown_user(splitwise_csv):
+    with pytest.raises(ValueError):
+        list(SplitwiseImporter(user_name='Daniel').iter_records(splitwise_csv))
+
+def test_splitwise_json_owed_share(workdir):
+    path = workdir / 'expenses.json'
+    path.write_text("""{"expenses": [
+        {"date": "2024-03-01T12:00:00Z", "description": "Mercado", "cost": "90.0",
+         "users": [{"user_id": 1, "owed_share": "30.0"}, {"user_id": 2, "owed_share": "60.0"}]},
+        {"date": "2024-03-02T12:00:00Z", "description": "Removido", "cost": "10.0", "deleted_at": "2024-03-03",
+         "users": [{"user_id": 1, "owed_share": "10.0"}]},
+        {"date": "2024-03-04T12:00:00Z", "description": "Acerto", "cost": "30.0", "payment": true,
+         "users": [{"user_id": 1, "owed_share": "30.0"}]},
+        {"date": "2024-03-05T12:00:00Z", "description": "Taxi", "cost": "20.0",
+         "users": [{"user_id": 2, "owed_share": "20.0"}]}
+    ]}""", encoding='utf-8')
+    assert records(SplitwiseImporter(user_id='1'), str(path)) == [(date(2024, 3, 1), 'Mercado', -30.0)]
+
+def test_splitwise_csv_paid_for_others_and_sole_participant(workdir, caplog):
+    path = workdir / 'group.csv'
+    path.write_text("""Date,Description,Category,Cost,Currency,Ana,Bruno
+2024-03-01,Gift for Bob,General,50.00,BRL,50.00,-50.00
+2024-03-02,Haircut,General,40.00,BRL,0.00,0.00
+2024-03-03,Mercado,Groceries,30.00,BRL,-15.00,15.00
+""", encoding='utf-8')
+
+    # Ana paid the gift entirely for Bruno, so she owes nothing of it
+    assert records(SplitwiseImporter(user_name='Ana'), str(path)) == [(date(2024, 3, 3), 'Mercado', -15.0)]
+    assert records(SplitwiseImporter(user_name='Bruno'), str(path)) == [
+        (date(2024, 3, 1), 'Gift for Bob', -50.0),
+        (date(2024, 3, 3), 'Mercado', -15.0),
+    ]
+    # The only participant of an expense has no balance, and the export does not name them
+    assert 'Haircut' in caplog.text
+
+def test_splitwise_json_paid_for_others_and_sole_participant(workdir):
+    path = workdir / 'expenses.json'
+    path.write_text("""[
+        {"date": "2024-03-01T12:00:00Z", "description": "Gift for Bob", "cost": "50.0",
+         "users": [{"user_id": 1, "paid_share": "50.0", "owed_share": "0.0"},
+                   {"user_id": 2, "paid_share": "0.0", "owed_share": "50.0"}]},
+        {"date": "2024-03-02T12:00:00Z", "description": "Haircut", "cost": "40.0",
+         "users": [{"user_id": 1, "paid_share": "40.0", "owed_share": "40.0"}]}
+    ]""", encoding='utf-8')
+    assert records(SplitwiseImporter(user_id='1'), str(path)) == [(date(2024, 3, 2), 'Haircut', -40.0)]
+    assert records(SplitwiseImporter(user_id='2'), str(path)) == [(date(2024, 3, 1), 'Gift for Bob', -50.0)]
+
+def test_splitwise_parser_imports_share(splitwise_csv, monkeypatch):
+    monkeypatch.setenv('SPLITWISE_USER_NAME', 'Bruno')
+    df = SplitwiseParser().import_file(splitwise_csv)
+    assert list(df['amount']) == [-30.0, -15.0, -20.0]
+    assert list(df['bank']) == ['Splitwise'] * 3
+
+def test_csv_layout_detection(workdir):
+    path = workdir / 'nubank.csv'
+    path.write_text("date,category,title,amount\n2024-01-05,restaurante,Padaria,12.50\n2024-01-06,,Pagamento recebido,-100\n")
+    df = NubankParser().import_file(str(path))
+    # Credit card purchases are positive in the export
+    assert list(df['amount']) == [-12.5, 100.0]
+    assert list(df['description']) == ['Padaria', 'Pagamento recebido']
+
+def test_csv_without_known_layout(workdir):
+    path = workdir / 'other.csv'
+    path.write_text("a,b,c\n1,2,3\n")
+    with pytest.raises(ValueError):
+        list(CSVImporter(layouts=[{'date': 'Data', 'date_format': '%d/%m/%Y', 'description': ['Descrição'], 'amount': 'Valor'}])
+             .iter_records(str(path)))
+
+def test_ofx_import(workdir):
+    path = workdir / 'statement.ofx'
+    path.write_text("""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240105000000[-3:BRT]<TRNAMT>-12.50<MEMO>Padaria</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240106<TRNAMT>100.00<MEMO>Pix recebido</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+""")
+    assert records(OFXImporter(), str(path)) == [
+        (date(2024, 1, 5), 'Padaria', -12.5),
+        (date(2024, 1, 6), 'Pix recebido', 100.0),
+    ]
@@ -0,0 +1,78 @@
+import os
+import cv2
+import json
+import pytest
+from transaction_extractor.journal import RunJournal
+from transaction_extractor.extractors import ChromeRiverExtractor
+from .helpers import draw_page, MarkerOCR
+
+TEXTS = ['04/05/2024 Hotel 450.00', '05/05/2024 Meals/Drinks 35.50', '06/05/2024 Meals/Drinks 12.00', 'TotalPayMeAmount 497.50']
+
+@pytest.fixture
+def statement(workdir):
+    path = str(workdir / 'report.png')
+    cv2.imwrite(path, draw_page([1, 2, 3, 4]))
+    return path
+
+def test_torn_last_line_is_dropped(workdir, statement):
+    path = str(workdir / 'journal.jsonl')
+    journal = RunJournal(path)
+    checkpoint = journal.for_file(statement)
+    checkpoint.record_region('row 1', 'a\n')
+    checkpoint.record_page(1, ['row 1', 'row 2'])
+    journal.close()
+    with open(path, 'a') as f:
+        f.write('{"type": "region", "fi')
+
+    journal = RunJournal(path, resume=True)
+    checkpoint = journal.for_file(statement)
+    assert checkpoint.get_region('row 1') == 'a\n'
+    # A page is only done when all of its regions are
+    assert checkpoint.page_labels(1) is None
+    checkpoint.record_region('row 2', 'b\n')
+    assert checkpoint.page_labels(1) == ['row 1', 'row 2']
+    journal.close()
+
+    with open(path) as f:
+        assert [json.loads(line)['type'] for line in f] == ['region', 'page', 'region']
+
+def test_journal_is_reset_without_resume(workdir, statement):
+    path = str(workdir / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_file(statement, 'text')
+    journal.close()
+
+    assert RunJournal(path, resume=True).get_file(statement) == 'text'
+    assert RunJournal(path).get_file(statement) is None
+
+def test_changed_file_is_processed_again(workdir, statement):
+    journal = RunJournal(str(workdir / 'journal.jsonl'))
+    journal.record_file(statement, 'text')
+    os.utime(statement, ns=(0, 0))
+    assert journal.get_file(statement) is None
+
+def test_resume_only_ocrs_missing_regions(workdir, statement):
+    path = str(workdir / 'journal.jsonl')
+    engine = MarkerOCR(TEXTS)
+    journal = RunJournal(path)
+    expected = ChromeRiverExtractor(backend=engine, journal=journal, row_bands=True).extract_text(statement)
+    journal.close()
+    assert engine.calls == 4
+
+    # Keep the first two rows, as if the run had been interrupted while writing the third
+    with open(path) as f:
+        lines = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:10])
+
+    engine = MarkerOCR(TEXTS)
+    journal = RunJournal(path, resume=True)
+    extractor = ChromeRiverExtractor(backend=engine, journal=journal, row_bands=True)
+    assert extractor.extract_text(statement) == expected
+    assert engine.calls == 2
+
+    # A finished file is not extracted again
+    assert extractor.extract_text(statement) == expected
+    assert engine.calls == 2
+    journal.close()
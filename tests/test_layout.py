@@ -0,0 +1,40 @@
+import numpy as np
+from transaction_extractor.extractors.layout import find_row_bands, find_ruling_lines, count_text_lines
+from .helpers import draw_page, MarkerOCR
+
+def band_codes(page, bands):
+    """Codes of the text lines inside each band."""
+    engine = MarkerOCR([])
+    return [[code for _, code, _ in engine.lines(page[y:y+h, x:x+w])] for x, y, w, h in bands]
+
+def whole(page):
+    return (0, 0, page.shape[1], page.shape[0])
+
+def test_rows_between_rulings():
+    page = draw_page([1, [2, 3], 4])
+    assert band_codes(page, find_row_bands(page, whole(page))) == [[1], [2, 3], [4]]
+
+def test_header_above_the_first_ruling_is_skipped():
+    page = draw_page([2, 3, 4], header=[1])
+    bands = find_row_bands(page, whole(page), header_rows=1)
+    assert band_codes(page, bands) == [[2], [3], [4]]
+
+def test_header_in_the_first_ruled_row_is_skipped():
+    page = draw_page([1, 2, 3])
+    bands = find_row_bands(page, whole(page), find_ruling_lines(page, inverted=True), header_rows=1)
+    assert band_codes(page, bands) == [[2], [3]]
+
+def test_empty_rows_do_not_count_as_header():
+    page = draw_page([1, 2, 3])
+    # Blank out the first row, leaving its rulings
+    page[62:104, 40:400] = 255
+    assert band_codes(page, find_row_bands(page, whole(page), header_rows=1)) == [[3]]
+
+def test_unruled_table_is_split_by_text_lines():
+    page = draw_page([1, 2, 3], ruled=False)
+    assert band_codes(page, find_row_bands(page, whole(page), header_rows=1)) == [[2], [3]]
+
+def test_count_text_lines():
+    page = draw_page([[1, 2]], ruled=False)
+    assert count_text_lines(page) == 2
+    assert count_text_lines(np.full((20, 20), 255, np.uint8)) == 0
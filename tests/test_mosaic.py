@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+from transaction_extractor.extractors import ChromeRiverExtractor
+from transaction_extractor.extractors.mosaic import pack, split_text, GUTTER
+from transaction_extractor.extractors.layout import crop
+from transaction_extractor.extractors.backends import DATA_KEYS
+from .helpers import draw_page, MarkerOCR
+
+TEXTS = ['04/05/2024 Hotel 450.00', '05/05/2024 Meals/Drinks 35.50', '06/05/2024 Meals/Drinks 12.00', 'TotalPayMeAmount 497.50']
+
+def word(text, top, height=10, block=1, par=1, line=1):
+    return dict(zip(DATA_KEYS, (5, 1, block, par, line, 1, 0, top, 10, height, 95, text)))
+
+def words_to_data(words):
+    return {key: [w[key] for w in words] for key in DATA_KEYS}
+
+def test_pack_places_regions_with_gutters():
+    images = [np.zeros((30, 50), np.uint8), np.zeros((20, 80), np.uint8), np.zeros((40, 10), np.uint8)]
+    (mosaic, placements), = pack(images)
+    assert mosaic.shape == (30 + 20 + 40 + 4 * GUTTER, 80 + 2 * GUTTER)
+    assert placements == [(0, GUTTER, 30), (1, 2 * GUTTER + 30, 20), (2, 3 * GUTTER + 50, 40)]
+    for index, top, height in placements:
+        h, w = images[index].shape
+        assert (mosaic[top:top+h, GUTTER:GUTTER+w] == 0).all()
+    assert (mosaic[:GUTTER] == 255).all()
+
+def test_pack_splits_tall_mosaics():
+    images = [np.zeros((100, 10), np.uint8) for _ in range(5)]
+    mosaics = pack(images, gutter=10, max_height=250)
+    assert [[index for index, _, _ in placements] for _, placements in mosaics] == [[0, 1], [2, 3], [4]]
+    assert all(mosaic.shape[0] <= 250 for mosaic, _ in mosaics)
+
+def test_split_text_assigns_words_to_regions():
+    placements = [(0, 40, 30), (1, 110, 30)]
+    data = words_to_data([
+        word('a', 45, line=1), word('b', 55, line=1), word('c', 115, line=2),
+        word('d', 125, par=2, line=3), word(' ', 50, line=1),
+        # Center in the gutter, closer to the second region
+        word('e', 95, line=4, par=3),
+    ])
+    assert split_text(data, placements) == {0: 'a b\n', 1: 'c\n\nd\n\ne\n'}
+    assert split_text(words_to_data([]), placements) == {0: '', 1: ''}
+
+def test_mosaic_matches_single_region_ocr():
+    page = draw_page([1, 2, 3, 4])
+    texts = {}
+    for mosaic_size in (0, 4):
+        extractor = ChromeRiverExtractor(backend=MarkerOCR(TEXTS), row_bands=True, mosaic_size=mosaic_size)
+        regions = [crop(page, box) for box in extractor.locate_regions(page)]
+        assert len(regions) == 4
+        if mosaic_size:
+            texts[mosaic_size] = extractor.ocr_mosaic(regions)
+        else:
+            texts[mosaic_size] = [extractor.ocr_region(region) for region in regions]
+        texts[mosaic_size, 'calls'] = extractor.ocr_calls
+
+    assert texts[4] == texts[0] == [text + '\n' for text in TEXTS]
+    assert texts[0, 'calls'] == 4
+    assert texts[4, 'calls'] == 1
+
+def test_mosaic_extraction_matches_region_extraction(workdir):
+    path = str(workdir / 'report.png')
+    cv2.imwrite(path, draw_page([1, 2, 3, 4]))
+
+    single = ChromeRiverExtractor(backend=MarkerOCR(TEXTS), row_bands=True)
+    batched = ChromeRiverExtractor(backend=MarkerOCR(TEXTS), row_bands=True, mosaic_size=3)
+    assert batched.extract_text(path) == single.extract_text(path)
+    assert (single.backend.calls, batched.backend.calls) == (4, 2)
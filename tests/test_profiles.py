@@ -0,0 +1,99 @@
+import time
+import pytest
+from transaction_extractor.extractors import ItauExtractor, ChromeRiverExtractor
+from transaction_extractor.extractors.backends import ReplayBackend, parse_config
+from transaction_extractor.extractors.profiles import OCRProfile, get_profile
+from transaction_extractor.parsers.itau import ItauParser
+from transaction_extractor.tuning import ProfileTuner, field_accuracy
+import pandas as pd
+from .helpers import MarkerOCR, ITAU_TEXTS
+
+@pytest.fixture
+def backend(workdir):
+    recording = workdir / 'ocr.jsonl'
+    recording.touch()
+    return ReplayBackend(str(recording))
+
+def test_dpi_only_passed_for_rasterized_pages():
+    profile = OCRProfile(dpi=300)
+    assert '--dpi' not in profile.to_config()
+    assert '--dpi 300' in profile.to_config(rasterized=True)
+
+def test_extractor_configs(backend):
+    itau = ItauExtractor(backend=backend)
+    assert itau.ocr_config(None) == '--oem 3 --psm 6 -l eng+por --dpi 300'
+
+    # Screenshots keep the fixed resolution hint they always had
+    chrome_river = ChromeRiverExtractor(backend=backend)
+    config = chrome_river.ocr_config(None)
+    assert '--dpi' not in config
+    assert '-c user_defined_dpi=300' in config
+
+def test_profile_replace_validates_fields():
+    profile = get_profile('itau')
+    assert profile.replace(psm=4).psm == 4
+    with pytest.raises(ValueError):
+        profile.replace(unknown=1)
+
+def test_tuner_searches_dpi_only_for_pdf_input():
+    tuner = ProfileTuner('chrome_river')
+    assert {profile.dpi for profile in tuner.candidates(pdf_input=False)} == {tuner.base_profile.dpi}
+    assert {profile.dpi for profile in tuner.candidates(pdf_input=True)} == {200, 250, 300}
+
+def test_tuner_candidates_cheapest_first():
+    candidates = ProfileTuner('itau').candidates()
+    keys = [(profile.dpi, len(profile.preprocessing)) for profile in candidates]
+    assert keys == sorted(keys)
+    assert len({repr(profile.to_dict()) for profile in candidates}) == len(candidates)
+
+def test_field_accuracy_ignores_row_order():
+    expected = pd.DataFrame({
+        'year': [2024, 2024], 'month': [1, 1], 'day': [2, 3],
+        'description': ['PIX', 'TED'], 'amount': [-10.0, 20.0],
+    })
+    assert field_accuracy(expected, expected.iloc[::-1]) == 1.0
+    assert field_accuracy(expected, expected.iloc[:1]) == 0.5
+    assert field_accuracy(expected, pd.DataFrame()) == 0.0
+
+class PSMOCR(MarkerOCR):
+    """Marker engine whose output and speed depend on the page segmentation mode."""
+
+    # psm -> (seconds per call, whether the text is read)
+    BEHAVIOUR = {4: (0.0, False), 6: (0.3, True), 11: (0.0, True), 3: (0.3, True)}
+
+    def image_to_string(self, image, config, timeout=0):
+        delay, readable = self.BEHAVIOUR[parse_config(config)['psm']]
+        time.sleep(delay)
+        text = super().image_to_string(image, config, timeout)
+        # Unreadable text has no transaction line, which the Itaú parser fails on with a KeyError
+        return text if readable else 'DATA LANCAMENTO VALOR\n'
+
+def test_tuner_picks_the_fastest_profile_meeting_the_target(itau_pdf):
+    engine = PSMOCR(ITAU_TEXTS)
+    base = get_profile('itau')
+    tuner = ProfileTuner('itau', target_accuracy=0.9, backend=engine, search_space={
+        'psm': [4, 6, 11, 3],
+        'dpi': [base.dpi],
+        'languages': [base.languages],
+        'preprocessing': [base.preprocessing],
+        'rows': [base.rows],
+    })
+    expected = ItauParser().parse('\n'.join(ITAU_TEXTS))
+    best, results = tuner.tune([(itau_pdf, expected)])
+
+    assert best.psm == 11
+    assert list(results['config'].str.extract(r'--psm (\d+)')[0].astype(int)) == [4, 6, 11, 3]
+    accuracy = dict(zip([4, 6, 11, 3], results['accuracy']))
+    # A candidate whose text breaks the parser scores 0 instead of stopping the search
+    assert accuracy[4] == 0.0
+    assert accuracy[6] == accuracy[11] == 1.0
+    # The last candidate is slower than the best one found, so it is cut off
+    assert pd.isna(accuracy[3])
+
+def test_failed_parse_scores_zero(itau_pdf):
+    engine = PSMOCR(ITAU_TEXTS)
+    tuner = ProfileTuner('itau', backend=engine)
+    expected = ItauParser().parse('\n'.join(ITAU_TEXTS))
+    accuracy, latency = tuner.evaluate(get_profile('itau').replace(psm=4), [(itau_pdf, expected)])
+    assert accuracy == 0.0
+    assert tuner.evaluate(get_profile('itau').replace(psm=11), [(itau_pdf, expected)])[0] == 1.0
@@ -0,0 +1,52 @@
+import cv2
+import pandas as pd
+import pytest
+from transaction_extractor.extractors import ChromeRiverExtractor, ItauExtractor
+from transaction_extractor.extractors.backends import ReplayBackend
+from transaction_extractor.parsers.chrome_river import ChromeRiverParser
+from transaction_extractor.parsers.itau import ItauParser
+from .helpers import draw_page, MarkerOCR, ITAU_TEXTS
+
+CHROME_RIVER_TEXTS = [
+    '04/05/2024 Hotel',
+    'Marriott 450.00',
+    '05/05/2024 Meals/Drinks 35.50',
+    '06/05/2024 Meals/Drinks 12.00',
+    'TotalPayMeAmount 497.50',
+]
+
+@pytest.fixture
+def chrome_river_png(workdir):
+    path = str(workdir / 'report.png')
+    cv2.imwrite(path, draw_page([[1, 2], 3, 4, 5], boxed=True))
+    return path
+
+def replay_parse(workdir, extractor_class, parser_class, path, texts, row_bands):
+    """Record the OCR of a statement, then parse it from a strict replay of the recording."""
+    recording = str(workdir / f'{extractor_class.bank}-{row_bands}.jsonl')
+    extractor_class(backend=ReplayBackend(recording, record=MarkerOCR(texts)), row_bands=row_bands).extract_text(path)
+
+    backend = ReplayBackend(recording)
+    text = extractor_class(backend=backend, row_bands=row_bands).extract_text(path)
+    assert backend.misses == 0
+    return text, parser_class().parse(text)
+
+@pytest.mark.parametrize('extractor_class, parser_class, statement, texts, count', [
+    (ItauExtractor, ItauParser, 'itau_pdf', ITAU_TEXTS, 5),
+    (ChromeRiverExtractor, ChromeRiverParser, 'chrome_river_png', CHROME_RIVER_TEXTS, 3),
+])
+def test_rows_parse_like_whole_tables(workdir, request, extractor_class, parser_class, statement, texts, count):
+    path = request.getfixturevalue(statement)
+    table_text, table = replay_parse(workdir, extractor_class, parser_class, path, texts, row_bands=False)
+    rows_text, rows = replay_parse(workdir, extractor_class, parser_class, path, texts, row_bands=True)
+
+    # The same transactions come out of a single OCR call and of one call per row
+    assert table_text != rows_text
+    assert len(table) == count
+    pd.testing.assert_frame_equal(rows, table)
+
+def test_itau_header_row_is_skipped(workdir, itau_pdf):
+    text, df = replay_parse(workdir, ItauExtractor, ItauParser, itau_pdf, ITAU_TEXTS, row_bands=True)
+    assert 'DATA LANCAMENTO' not in text
+    assert text.splitlines()[0] == ITAU_TEXTS[1]
+    assert 'Aluguel/IPTU' in df.to_string()
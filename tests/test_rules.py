@@ -0,0 +1,136 @@
+import os
+import yaml
+import pytest
+from transaction_extractor.parsers.rules import RuleStore, RuleSet, compile_rules, get_rule_store
+from transaction_extractor.parsers.chrome_river import ChromeRiverParser
+from transaction_extractor.parsers.itau import ItauParser
+
+RULES = """
+version: 1
+banks:
+  itau:
+    rules:
+      PIX TRANSF: [Transferência entre Contas, '']
+      PIX TRANSF FELIPE: [Cuidados Pessoais, Academia]
+      SALARIO: [Receitas, Salário]
+    conditional:
+      - description: MOBILEPAG TIT BANCO
+        amount_range: [3800, 3900]
+        category: Despesas Essenciais
+        subcategory: Aluguel/IPTU
+      - description: MOBILEPAG TIT BANCO
+        amount_range: [780, 800]
+        category: Despesas Essenciais
+        subcategory: Condomínio
+"""
+
+def write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    # Make every write visible to the change check, however fast the test runs
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+@pytest.fixture
+def rules_path(workdir):
+    path = str(workdir / 'rules.yaml')
+    write(path, RULES)
+    return path
+
+def test_first_rule_in_order_wins():
+    rules = RuleSet(compile_rules(RULES.encode('utf-8')))
+    # Both patterns match; the first one in the file wins even though the other is longer
+    assert rules.classify('itau', 'PIX TRANSF FELIPE', -150.0) == ('Transferência entre Contas', '')
+    # A later rule matching earlier in the description does not win over an earlier rule
+    assert rules.classify('itau', 'SALARIO VIA PIX TRANSF', 10.0) == ('Transferência entre Contas', '')
+    assert rules.classify('itau', 'REMUNERACAO/SALARIO', 5000.0) == ('Receitas', 'Salário')
+    assert rules.classify('itau', 'TED', 1.0) is None
+    assert rules.classify('nubank', 'PIX TRANSF', 1.0) is None
+
+def test_overlapping_patterns_are_all_considered():
+    rules = RuleSet(compile_rules(b"""
+version: 1
+banks:
+  itau:
+    rules:
+      BC: [B, '']
+      AB: [A, '']
+"""))
+    # AB starts first, but BC comes first in the rules
+    assert rules.classify('itau', 'ABC', 1.0) == ('B', '')
+
+def test_conditional_rules_check_the_amount():
+    rules = RuleSet(compile_rules(RULES.encode('utf-8')))
+    assert rules.classify('itau', 'MOBILEPAG TIT BANCO 123', -3850.0) == ('Despesas Essenciais', 'Aluguel/IPTU')
+    assert rules.classify('itau', 'MOBILEPAG TIT BANCO 123', -790.0) == ('Despesas Essenciais', 'Condomínio')
+    assert rules.classify('itau', 'MOBILEPAG TIT BANCO 123', -10.0) is None
+    # The amount is not looked at when no conditional rule matches the description
+    assert rules.classify('itau', 'SALARIO', '5000.00') == ('Receitas', 'Salário')
+    assert rules.conditional_rules('itau')[1] == {
+        'description': 'MOBILEPAG TIT BANCO', 'amount_range': (780.0, 800.0),
+        'category': 'Despesas Essenciais', 'subcategory': 'Condomínio',
+    }
+    assert rules.classification_rules('itau')['SALARIO'] == ['Receitas', 'Salário']
+
+def test_chrome_river_amounts_are_strings():
+    # ChromeRiverParser classifies with the amount as read from the report
+    parser = ChromeRiverParser()
+    assert parser._classify_transaction('Hotel Marriott', '450.00') == ('Viagens', 'BCG')
+    assert parser._classify_transaction('Taxi', '12.00') == ('Não Identificado', None)
+
+def test_artifact_is_cached_and_mapped(workdir, rules_path):
+    store = RuleStore(rules_path, cache_dir=str(workdir / 'cache'))
+    ruleset = store.current()
+    assert os.listdir(workdir / 'cache') == [f'{ruleset.source_hash}.rules']
+    assert ruleset.table.base is not None
+
+    # Another process (here, another store) maps the cached artifact
+    other = RuleStore(rules_path, cache_dir=str(workdir / 'cache')).current()
+    assert other.source_hash == ruleset.source_hash
+    assert other.classify('itau', 'SALARIO', 1.0) == ('Receitas', 'Salário')
+
+def test_changes_are_reloaded(workdir, rules_path):
+    store = RuleStore(rules_path, cache_dir=str(workdir / 'cache'), check_interval=0)
+    parser = ItauParser(rules=store)
+    assert parser._classify_transaction('SALARIO', 1.0) == ('Receitas', 'Salário')
+
+    write(rules_path, RULES.replace('[Receitas, Salário]', '[Receitas, Bônus]'))
+    assert parser._classify_transaction('SALARIO', 1.0) == ('Receitas', 'Bônus')
+    assert not store.reload()
+
+@pytest.mark.parametrize('broken', [
+    'version: 1\nbanks: [itau\n',
+    'version: 2\n',
+    'version: 1\nbanks:\n  itau:\n    rules:\n      SALARIO: Receitas\n',
+    'version: 1\nbanks:\n  - itau\n',
+])
+def test_invalid_file_keeps_the_previous_rules(workdir, rules_path, broken):
+    store = RuleStore(rules_path, cache_dir=str(workdir / 'cache'), check_interval=0)
+    ruleset = store.current()
+
+    write(rules_path, broken)
+    assert not store.reload()
+    assert store.current() is ruleset
+
+    # Fixing the file is picked up again
+    write(rules_path, RULES.replace('SALARIO', 'SALARY'))
+    assert store.reload()
+    assert store.current().classify('itau', 'SALARY', 1.0) == ('Receitas', 'Salário')
+
+def test_missing_file_keeps_the_previous_rules(workdir, rules_path):
+    store = RuleStore(rules_path, cache_dir=str(workdir / 'cache'), check_interval=0)
+    ruleset = store.current()
+    os.remove(rules_path)
+    assert not store.reload()
+    assert store.current() is ruleset
+
+    # Without rules loaded yet the error is raised
+    with pytest.raises(FileNotFoundError):
+        RuleStore(rules_path, cache_dir=str(workdir / 'cache')).current()
+    write(rules_path, 'version: 1\nbanks: [itau\n')
+    with pytest.raises(yaml.YAMLError):
+        RuleStore(rules_path, cache_dir=str(workdir / 'cache')).current()
+
+def test_stores_are_shared_per_file(rules_path):
+    assert get_rule_store(rules_path) is get_rule_store(rules_path)
+    assert get_rule_store() is not get_rule_store(rules_path)
@@ -0,0 +1,61 @@
+import os
+from transaction_extractor.extractors.scheduler import ResourceScheduler
+
+def thread_limit(value):
+    return value, os.environ.get('OMP_THREAD_LIMIT')
+
+def flaky(path):
+    # Fails on the first call only, tracked through a file so it works across processes
+    if not os.path.exists(path):
+        open(path, 'w').close()
+        raise RuntimeError('first attempt')
+    return 'ok'
+
+def crash(value):
+    if value == 'crash':
+        os._exit(1)
+    return value
+
+def allocate(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+def test_inline_thread_limit_is_restored(monkeypatch):
+    monkeypatch.setenv('OMP_THREAD_LIMIT', '7')
+    scheduler = ResourceScheduler(max_threads=4, workers=1)
+    assert scheduler.run(thread_limit, [('a', (1,))]) == [(1, '4')]
+    assert os.environ['OMP_THREAD_LIMIT'] == '7'
+
+    monkeypatch.delenv('OMP_THREAD_LIMIT')
+    scheduler.run(thread_limit, [('a', (1,))])
+    assert 'OMP_THREAD_LIMIT' not in os.environ
+
+def test_retries_and_failures(workdir):
+    scheduler = ResourceScheduler(workers=1, retries=1)
+    completed = []
+    results = scheduler.run(flaky, [('job', (str(workdir / 'flag'),))], lambda key, result: completed.append(key))
+    assert results == ['ok']
+    assert completed == ['job']
+
+    scheduler = ResourceScheduler(workers=1, retries=0)
+    assert scheduler.run(flaky, [('job', (str(workdir / 'other'),))]) == [None]
+    assert scheduler.failures[0]['job'] == 'job'
+
+def test_worker_processes_split_threads():
+    scheduler = ResourceScheduler(max_threads=4, workers=2)
+    assert scheduler.uses_processes
+    results = scheduler.run(thread_limit, [(i, (i,)) for i in range(4)])
+    assert results == [(i, '2') for i in range(4)]
+
+def test_crashed_worker_only_skips_its_job():
+    scheduler = ResourceScheduler(max_threads=2, workers=2, retries=0)
+    results = scheduler.run(crash, [('a', ('a',)), ('crash', ('crash',)), ('b', ('b',))])
+    assert results == ['a', None, 'b']
+    assert [failure['job'] for failure in scheduler.failures] == ['crash']
+
+def test_memory_limit_is_counted_over_the_worker_startup_size():
+    # 128 MB is far below what a worker maps when it starts, yet small jobs still fit
+    scheduler = ResourceScheduler(max_threads=2, workers=1, memory_limit_mb=128, retries=0)
+    assert scheduler.uses_processes
+    results = scheduler.run(allocate, [('small', (64,)), ('large', (512,))])
+    assert results == [64 * 1024 * 1024, None]
+    assert [failure['job'] for failure in scheduler.failures] == ['large']
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import subprocess
+import multiprocessing
+import cv2
+import pandas as pd
+from transaction_extractor import shards
+from transaction_extractor.extractors import ChromeRiverExtractor
+from transaction_extractor.extractors.backends import ReplayBackend
+from transaction_extractor.shards import ShardManifest, read_token
+from .helpers import draw_page, MarkerOCR
+
+def race_take_over(directory, lock_path, seconds):
+    """
+    Move the lock away and back like a worker that found a dead worker's
+    lock stale and then sees it was replaced by a live one.
+    """
+    manifest = ShardManifest(directory, stale_after=0)
+
+    def stale_then_real(path, real=read_token):
+        if path == lock_path:
+            return 'dead-worker/0'
+        # Hold the lock away for a while so the heartbeat hits the gap
+        time.sleep(0.05)
+        return real(path)
+
+    shards.read_token = stale_then_real
+    takeovers = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        takeovers += manifest._take_over(lock_path)
+    return takeovers
+
+def statements(directory, count):
+    files = []
+    for i in range(count):
+        path = os.path.join(directory, f'statement-{i}.png')
+        open(path, 'wb').close()
+        files.append(path)
+    return files
+
+def test_heartbeat_survives_a_concurrent_take_over_check(workdir):
+    directory = str(workdir / 'run')
+    ShardManifest.create(directory, statements(str(workdir), 1), shard_size=1)
+    manifest = ShardManifest(directory, stale_after=4)
+    lease = manifest.claim('holder')
+    assert lease is not None
+
+    with multiprocessing.get_context('spawn').Pool(2) as pool:
+        takeovers = pool.starmap(race_take_over, [(directory, lease.lock_path, 3.5)] * 2)
+
+    # Nobody took the lock over and the heartbeat is still refreshing it
+    assert takeovers == [0, 0]
+    assert not lease.lost
+    assert lease._heartbeat.is_alive()
+    assert read_token(lease.lock_path) == lease.token
+    os.utime(lease.lock_path, (0, 0))
+    time.sleep(1.5)
+    assert time.time() - os.stat(lease.lock_path).st_mtime < 2
+
+    lease.complete([])
+    assert not os.path.exists(lease.lock_path)
+    assert manifest.status()['done'] == ['shard-0000']
+
+def test_heartbeat_stops_when_the_lock_belongs_to_another_worker(workdir):
+    directory = str(workdir / 'run')
+    ShardManifest.create(directory, statements(str(workdir), 1), shard_size=1)
+    lease = ShardManifest(directory, stale_after=4).claim('slow')
+
+    # A worker for which the lock looks stale takes the shard over
+    other = ShardManifest(directory, stale_after=0).claim('other')
+    assert other.id == lease.id
+    time.sleep(1.5)
+    assert lease.lost
+    assert not lease._heartbeat.is_alive()
+
+    # Releasing the lost lease leaves the new owner's lock alone
+    lease.release()
+    assert read_token(other.lock_path) == other.token
+    other.release()
+
+def test_claimed_shards_are_not_claimed_again(workdir):
+    directory = str(workdir / 'run')
+    ShardManifest.create(directory, statements(str(workdir), 3), shard_size=1)
+    manifest = ShardManifest(directory)
+
+    leases = [manifest.claim(f'worker-{i}') for i in range(3)]
+    assert sorted(lease.id for lease in leases) == ['shard-0000', 'shard-0001', 'shard-0002']
+    assert manifest.claim('late') is None
+
+    leases[0].complete([])
+    leases[1].release()
+    again = manifest.claim('late')
+    assert again.id == 'shard-0001'
+    for lease in (leases[2], again):
+        lease.release()
+    assert manifest.status() == {'done': ['shard-0000'], 'locked': [], 'pending': ['shard-0001', 'shard-0002']}
+
+def test_lock_without_token_is_taken_over_once_stale(workdir):
+    directory = str(workdir / 'run')
+    ShardManifest.create(directory, statements(str(workdir), 1), shard_size=1)
+    manifest = ShardManifest(directory, stale_after=60)
+
+    # A worker died between creating its lock and writing its token
+    lock_path = manifest.lock_path('shard-0000')
+    os.makedirs(os.path.dirname(lock_path))
+    open(lock_path, 'w').close()
+    assert manifest.claim('other') is None
+
+    os.utime(lock_path, (0, 0))
+    lease = manifest.claim('other')
+    assert lease.id == 'shard-0000'
+    assert read_token(lock_path) == lease.token
+    lease.release()
+
+def test_lost_lease_does_not_mark_the_shard_done(workdir):
+    directory = str(workdir / 'run')
+    ShardManifest.create(directory, statements(str(workdir), 1), shard_size=1)
+    lease = ShardManifest(directory, stale_after=60).claim('slow')
+    other = ShardManifest(directory, stale_after=0).claim('other')
+
+    assert not lease.held()
+    assert not lease.complete([])
+    assert not os.path.exists(lease.manifest.done_path(lease.id))
+    assert read_token(other.lock_path) == other.token
+
+    assert other.complete([])
+    assert lease.manifest.is_done(lease.id)
+
+TEXTS = [
+    '04/05/2024 Hotel 450.00', '05/05/2024 Meals/Drinks 35.50', '06/05/2024 Meals/Drinks 12.00',
+    'TotalPayMeAmount 497.50', 'TotalPayMeAmount 485.50', 'TotalPayMeAmount 450.00', 'TotalPayMeAmount 47.50',
+]
+
+def run_workers(workdir, name, files, recording, count=2):
+    """Plan a sharded run, process it with `count` worker processes and merge it."""
+    directory = str(workdir / name)
+    ShardManifest.create(directory, files, shard_size=1, bank='chrome_river')
+    command = [sys.executable, '-m', 'transaction_extractor', '--shards', directory,
+               '--replay-ocr', recording, '--no-templates']
+    workers = [subprocess.Popen(command, cwd=str(workdir), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+               for _ in range(count)]
+    logs = [worker.communicate(timeout=300)[1].decode() for worker in workers]
+    assert all(worker.returncode == 0 for worker in workers), logs
+
+    output = str(workdir / f'{name}-merged')
+    subprocess.run([sys.executable, '-m', 'transaction_extractor.shards', 'merge', '-d', directory, '-o', output],
+                   cwd=str(workdir), check=True, capture_output=True)
+    return directory, logs, pd.read_excel(os.path.join(output, 'chrome_river_transactions.xlsx'))
+
+def test_workers_split_shards_and_merge_deterministically(workdir):
+    files = []
+    for i, rows in enumerate([[1, 2, 3, 4], [1, 2, 5], [1, 6], [2, 3, 7]]):
+        path = str(workdir / f'report-{i}.png')
+        cv2.imwrite(path, draw_page(rows))
+        files.append(path)
+
+    # Record the OCR of every report once; the workers only replay it
+    recording = str(workdir / 'ocr.jsonl')
+    extractor = ChromeRiverExtractor(backend=ReplayBackend(recording, record=MarkerOCR(TEXTS)))
+    for path in files:
+        extractor.extract_text(path)
+
+    directory, logs, merged = run_workers(workdir, 'run', files, recording)
+    manifest = ShardManifest(directory)
+    assert manifest.status()['done'] == [shard['id'] for shard in manifest.shards]
+    assert manifest.failed_files() == []
+    assert not os.listdir(os.path.join(directory, 'locks'))
+    # Every shard was claimed by exactly one worker
+    claims = [line for log in logs for line in log.splitlines() if ' claimed shard-' in line]
+    assert sorted(line.split(' claimed ')[1].split()[0] for line in claims) == [shard['id'] for shard in manifest.shards]
+
+    assert len(merged) == 3 + 2 + 1 + 2
+    assert merged['amount'].sum() == 497.5 + 485.5 + 450.0 + 47.5
+
+    # The merged output only depends on the manifest, not on which worker ran which shard
+    _, _, again = run_workers(workdir, 'again', files, recording, count=1)
+    pd.testing.assert_frame_equal(merged, again)
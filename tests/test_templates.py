@@ -0,0 +1,102 @@
+import os
+import json
+import numpy as np
+from multiprocessing import Pool
+from transaction_extractor.extractors.layout import find_ruling_lines, find_table_boxes
+from transaction_extractor.extractors import templates
+from transaction_extractor.extractors.templates import TemplateCache, line_profiles
+from .helpers import draw_page
+
+def ruled_tables(image):
+    """Boxes of the tables drawn with dark ruling lines."""
+    return find_table_boxes(image, lines=find_ruling_lines(image, inverted=True))
+
+def statement(rows: int) -> np.ndarray:
+    # Same page size for every statement, with the table growing downwards
+    page = np.full((1400, 900, 3), 255, dtype=np.uint8)
+    table = draw_page([1 + i % 4 for i in range(rows)], header=[5], boxed=True)
+    page[:table.shape[0]] = table[:1400]
+    return page
+
+def test_matching_page_reuses_boxes(workdir):
+    cache = TemplateCache('itau', str(workdir / 'templates'))
+    page = statement(12)
+    boxes = cache.locate(page, ruled_tables)
+    assert cache.misses == 1 and len(cache.templates) == 1
+
+    calls = []
+    assert TemplateCache('itau', str(workdir / 'templates')).locate(page, lambda image: calls.append(image)) == boxes
+    assert not calls
+
+def test_longer_table_is_detected_again(workdir):
+    cache = TemplateCache('itau', str(workdir / 'templates'), threshold=0.5)
+    short = cache.locate(statement(12), ruled_tables)
+
+    # The profiles match, but the table continues below the stored box
+    page = statement(16)
+    assert cache._best(line_profiles(page)) is not None
+    boxes = cache.locate(page, ruled_tables)
+    assert cache.hits == 0 and cache.misses == 2
+    assert boxes[0][3] > short[0][3]
+    assert len(cache.templates) == 2
+
+    # The longer layout is reused for the next long statement
+    cache.locate(statement(16), ruled_tables)
+    assert cache.hits == 1
+
+def learn(args):
+    directory, rows = args
+    cache = TemplateCache('itau', directory)
+    page = statement(rows)
+    cache.learn(page, ruled_tables(page))
+    return cache.templates[-1]['version']
+
+def test_concurrent_learning_keeps_every_layout(workdir):
+    directory = str(workdir / 'templates')
+    with Pool(4) as pool:
+        versions = pool.map(learn, [(directory, rows) for rows in (8, 10, 12, 14, 16, 18)])
+
+    assert sorted(versions) == [1, 2, 3, 4, 5, 6]
+    files = sorted(os.listdir(os.path.join(directory, 'itau')))
+    assert files == [f'v{version}.json' for version in sorted(versions, key=str)]
+    assert len(TemplateCache('itau', directory).templates) == 6
+
+def test_unreadable_and_old_templates_are_ignored(workdir):
+    directory = workdir / 'templates' / 'itau'
+    directory.mkdir(parents=True)
+    (directory / 'v1.json').write_text('{"format": 1}')
+    (directory / 'v2.json').write_text('{"format": 2, "tab')
+    cache = TemplateCache('itau', str(workdir / 'templates'))
+    assert cache.templates == []
+
+    page = statement(10)
+    cache.learn(page, ruled_tables(page))
+    assert cache.templates[-1]['version'] == 3
+    with open(directory / 'v3.json') as f:
+        assert json.load(f)['version'] == 3
+
+def test_least_recently_used_layout_is_replaced(workdir, monkeypatch):
+    monkeypatch.setattr(templates, 'MAX_TEMPLATES', 2)
+    directory = workdir / 'templates' / 'itau'
+    cache = TemplateCache('itau', str(workdir / 'templates'))
+    pages = {rows: statement(rows) for rows in (8, 18, 28)}
+    for rows in (8, 18):
+        cache.learn(pages[rows], ruled_tables(pages[rows]))
+    for version in (1, 2):
+        os.utime(directory / f'v{version}.json', (1000 * version, 1000 * version))
+
+    # Reusing the older layout makes the other one the least recently used
+    cache = TemplateCache('itau', str(workdir / 'templates'))
+    assert cache.match(pages[8]) is not None
+    cache.learn(pages[28], ruled_tables(pages[28]))
+
+    assert sorted(os.listdir(directory)) == ['v1.json', 'v3.json']
+    assert [template['version'] for template in cache.templates] == [1, 3]
+    assert [template['version'] for template in TemplateCache('itau', str(workdir / 'templates')).templates] == [1, 3]
+
+def test_learning_stores_no_column_boxes(workdir):
+    cache = TemplateCache('itau', str(workdir / 'templates'))
+    page = statement(10)
+    cache.learn(page, ruled_tables(page))
+    with open(workdir / 'templates' / 'itau' / 'v1.json') as f:
+        assert set(json.load(f)) == {'format', 'bank', 'version', 'page_size', 'tables', 'edges', 'rows', 'columns'}
@@ -1,76 +1,310 @@
+import os
 import logging
 import argparse
-from .extractors import (
-    ItauExtractor,
-    ChromeRiverExtractor
-)
-from .parsers import (
-    ItauParser,
-    ChromeRiverParser
+import pandas as pd
+from .registry import (
+    BANKS,
+    get_extractor_class,
+    get_parser_class
 )
+from .parsers import TrigramIndex
+from .parsers.rules import get_rule_store
+from .extractors.scheduler import ResourceScheduler
+from .extractors.templates import TemplateCache
+from .extractors.backends import OCRBackend, BACKENDS, get_backend
+from .journal import RunJournal
+from .detection import LayoutDetector
+from .shards import ShardManifest, write_excel, STALE_AFTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def detect_banks(files: list, min_confidence: float, backend: OCRBackend = None) -> dict:
+    """Group files by their detected bank, leaving out files that could not be identified."""
+    detector = LayoutDetector(backend=backend)
+    groups = {}
+    for file_path in files:
+        try:
+            detection = detector.detect(file_path)
+        except Exception as e:
+            logger.error(f"Could not detect the bank of {file_path}: {str(e)}")
+            continue
+
+        if detection.bank is None or detection.confidence < min_confidence:
+            logger.error(f"Could not detect the bank of {file_path} "
+                         f"(best guess: {detection.bank}, confidence {detection.confidence}). Use -b to set it.")
+            continue
+
+        logger.info(f"Detected {detection.bank} for {file_path} (confidence {detection.confidence})")
+        groups.setdefault(detection.bank, []).append(file_path)
+
+    return groups
+
+def build_parser(bank: str, args):
+    """Initialize the parser of a bank, with the fuzzy matching index if a history is given."""
+    parser = get_parser_class(bank)(rules=get_rule_store(args.rules))
+
+    # Build the fuzzy matching index from the classification history
+    if args.history:
+        history = [pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path) for path in args.history]
+        index = TrigramIndex.from_history(history)
+        index.add_rules(parser.classification_rules)
+        parser.use_fuzzy_index(index, args.fuzzy_threshold)
+        logger.info(f"Fuzzy index built with {len(index)} distinct descriptions")
+
+    return parser
+
+def process_files(bank: str, files: list, parser, scheduler: ResourceScheduler, journal: RunJournal,
+                  templates_dir: str = None, mosaic_size: int = 0, backend: OCRBackend = None,
+                  row_bands: bool = None) -> tuple:
+    """
+    Extract and parse the files of a bank.
+
+    Returns the DataFrames of the files processed and the list of files that failed.
+    """
+    extractor = None
+    frames = []
+    failed = []
+    for file_path in files:
+        try:
+            # Structured exports are imported directly, anything else goes through OCR
+            if parser.supports_file(file_path):
+                frames.append(parser.import_file(file_path))
+            else:
+                if extractor is None:
+                    templates = TemplateCache(bank, templates_dir) if templates_dir else None
+                    extractor = get_extractor_class(bank)(
+                        scheduler=scheduler,
+                        journal=journal,
+                        templates=templates,
+                        mosaic_size=mosaic_size,
+                        backend=backend,
+                        row_bands=row_bands
+                    )
+                text = extractor.extract_text(file_path)
+                frames.append(parser.parse(text))
+        except Exception as e:
+            logger.error(f"Error processing file {file_path}: {str(e)}")
+            failed.append(file_path)
+
+    if extractor is not None:
+        extractor.close()
+
+    return frames, failed
+
+def save_transactions(df: pd.DataFrame, parser, output_path: str):
+    """Save the transactions and the fuzzy matches to review."""
+    print("\nExtracted Transactions:")
+    print(df)
+
+    # Save to Excel
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    df.to_excel(output_path, index=False)
+    print(f"\nTransactions saved to {output_path}")
+
+    # Report fuzzy classifications for review
+    report = parser.fuzzy_report()
+    if not report.empty:
+        print("\nTransactions classified by fuzzy matching:")
+        print(report)
+
+        report_path = f"{os.path.splitext(output_path)[0]}_fuzzy_matches.xlsx"
+        report.to_excel(report_path, index=False)
+        print(f"\nFuzzy matches saved to {report_path} for review")
+
+def process_groups(groups: dict, args, scheduler: ResourceScheduler, journal: RunJournal, save,
+                   backend: OCRBackend = None) -> list:
+    """
+    Process files grouped by bank and save the transactions of each bank
+    with save(bank, df, parser). Returns the list of files that failed.
+    """
+    failed = []
+    for bank, files in groups.items():
+        transaction_parser = build_parser(bank, args)
+        templates_dir = None if args.no_templates else args.templates
+        frames, bank_failed = process_files(
+            bank, files, transaction_parser, scheduler, journal, templates_dir, args.mosaic, backend,
+            args.rows or None
+        )
+        failed += bank_failed
+        if not frames:
+            continue
+
+        try:
+            save(bank, pd.concat(frames, ignore_index=True), transaction_parser)
+        except Exception as e:
+            logger.error(f"Error saving transactions: {str(e)}")
+            failed += files
+
+    return failed
+
+def run_shards(args, scheduler: ResourceScheduler, backend: OCRBackend = None) -> list:
+    """
+    Claim and process shards of a manifest until none is left.
+
+    Each shard is checkpointed in its own journal on the shared directory,
+    so a worker taking over an abandoned shard resumes where it stopped.
+    Returns the list of files that failed.
+    """
+    manifest = ShardManifest(args.shards, stale_after=args.stale_after)
+    failed = []
+    while True:
+        lease = manifest.claim()
+        if lease is None:
+            break
+
+        def save(bank, df, transaction_parser):
+            # Another worker took the shard over and writes its results
+            if not lease.held():
+                logger.warning(f"Not saving the {bank} results of {lease.id}, its lock was taken over")
+                return
+            write_excel(df, manifest.result_path(lease.id, bank))
+            report = transaction_parser.fuzzy_report()
+            if not report.empty:
+                write_excel(report, manifest.result_path(lease.id, bank, '_fuzzy_matches'))
+
+        files = lease.shard['files']
+        try:
+            bank = args.bank or manifest.bank
+            groups = {bank: files} if bank else detect_banks(files, args.min_confidence, backend)
+            journal = RunJournal(manifest.journal_path(lease.id), resume=True)
+            shard_failed = [file_path for file_path in files if not any(file_path in group for group in groups.values())]
+            shard_failed += process_groups(groups, args, scheduler, journal, save, backend)
+            journal.close()
+        except BaseException:
+            # Leave the shard to another worker
+            lease.release()
+            raise
+
+        if lease.complete(shard_failed):
+            logger.info(f"Finished {lease.id} with {len(shard_failed)} failed file(s)")
+            failed += shard_failed
+
+    return failed
+
 def main():
     """Example usage of the transaction extractors."""
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Extract transactions from bank statements.')
-    parser.add_argument('-b', '--bank', 
-                      required=True,
-                      choices=['itau', 'inter', 'nubank', 'picpay', 'splitwise', 'creditas', 'chrome_river'],
-                      help='Bank name to process statements from')
+    parser.add_argument('-b', '--bank',
+                      choices=BANKS,
+                      help='Bank name to process statements from (default: detected from each file)')
     parser.add_argument('-f', '--file',
-                      required=True,
-                      help='Path to the bank statement file')
+                      nargs='+',
+                      help='Path to the bank statement files (PDF, PNG or structured OFX/CSV/JSON exports)')
     parser.add_argument('-o', '--output',
                       help='Path to save the output Excel file (default: data/{bank}_transactions.xlsx)')
-    
+    parser.add_argument('--min-confidence',
+                      type=float,
+                      default=0.5,
+                      help='Minimum confidence to accept a detected bank (default: 0.5)')
+    parser.add_argument('--rules',
+                      help='Classification rules file (default: transaction_extractor/rules.yaml)')
+    parser.add_argument('--history',
+                      nargs='+',
+                      default=[],
+                      help='Previously classified transactions (Excel or CSV) used to classify unmatched descriptions')
+    parser.add_argument('--fuzzy-threshold',
+                      type=float,
+                      default=0.6,
+                      help='Minimum similarity for fuzzy classification (default: 0.6)')
+    parser.add_argument('--threads',
+                      type=int,
+                      help='CPU threads shared by rasterization and OCR (default: all cores)')
+    parser.add_argument('--workers',
+                      type=int,
+                      default=1,
+                      help='Number of parallel OCR workers (default: 1)')
+    parser.add_argument('--timeout',
+                      type=int,
+                      default=120,
+                      help='Timeout in seconds for each OCR call, 0 to disable (default: 120)')
+    parser.add_argument('--memory-limit',
+                      type=int,
+                      help='Memory in MB each OCR worker process may allocate on top of its startup size (applies per worker)')
+    parser.add_argument('--retries',
+                      type=int,
+                      default=1,
+                      help='Retries for failed table regions before skipping them (default: 1)')
+    parser.add_argument('--journal',
+                      default='data/run_journal.jsonl',
+                      help='Run journal used to checkpoint OCR progress (default: data/run_journal.jsonl)')
+    parser.add_argument('--resume',
+                      action='store_true',
+                      help='Continue from the checkpoints of the previous run instead of starting over')
+    parser.add_argument('--templates',
+                      default='data/templates',
+                      help='Folder of learned table layouts per bank (default: data/templates)')
+    parser.add_argument('--no-templates',
+                      action='store_true',
+                      help='Always run the full table detection instead of reusing learned layouts')
+    parser.add_argument('--mosaic',
+                      type=int,
+                      default=0,
+                      help='Pack up to N table regions into a single OCR call, 0 to disable (default: 0)')
+    parser.add_argument('--rows',
+                      action='store_true',
+                      help='OCR each table row separately with a single-line mode, skipping empty and header rows')
+    parser.add_argument('--shards',
+                      help='Shared directory of a shard manifest to take files from instead of -f')
+    parser.add_argument('--stale-after',
+                      type=int,
+                      default=STALE_AFTER,
+                      help=f'Seconds after which the shard of an unresponsive worker is taken over (default: {STALE_AFTER})')
+
+    parser.add_argument('--ocr-backend',
+                      choices=list(BACKENDS),
+                      default='tesseract',
+                      help='OCR engine: the tesseract command or the in-process tesserocr binding (default: tesseract)')
+    parser.add_argument('--record-ocr',
+                      help='Record the OCR output of the run to a file that --replay-ocr can serve later')
+    parser.add_argument('--replay-ocr',
+                      help='Serve the OCR output recorded with --record-ocr instead of running OCR')
+
     # Parse arguments
     args = parser.parse_args()
-    
-    # Initialize appropriate extractor based on bank
-    extractors = {
-        'itau': ItauExtractor,
-        'chrome_river': ChromeRiverExtractor,
-        # Add other extractors as they are implemented
-    }
-
-    # Initialize appropriate parser based on bank
-    parsers = {
-        'itau': ItauParser,
-        'chrome_river': ChromeRiverParser,
-        # Add other parsers as they are implemented
-    }
-    
-    extractor_class = extractors.get(args.bank.lower())
-    if not extractor_class:
-        raise ValueError(f"No extractor implemented for bank: {args.bank}")
-    
-    parser_class = parsers.get(args.bank.lower())
-    if not parser_class:
-        raise ValueError(f"No parser implemented for bank: {args.bank}")
-
-    extractor = extractor_class()
-    parser = parser_class()
-    
-    try:
-        # Process the file
-        text = extractor.extract_text(args.file)
-        df = parser.parse(text)
-        print("\nExtracted Transactions:")
-        print(df)
-        
-        # Determine output path
-        output_path = args.output or f"data/{args.bank}_transactions.xlsx"
-        
-        # Save to Excel
-        df.to_excel(output_path, index=False)
-        print(f"\nTransactions saved to {output_path}")
-        
-    except Exception as e:
-        logger.error(f"Error processing file: {str(e)}")
+    if not args.file and not args.shards:
+        parser.error("one of -f/--file or --shards is required")
+
+    scheduler = ResourceScheduler(
+        max_threads=args.threads,
+        workers=args.workers,
+        timeout=args.timeout,
+        memory_limit_mb=args.memory_limit,
+        retries=args.retries
+    )
+
+    backend = get_backend(args.ocr_backend, record=args.record_ocr, replay=args.replay_ocr)
+
+    if args.shards:
+        failed = run_shards(args, scheduler, backend)
+    else:
+        # Use the given bank, or detect it from each file before the full extraction
+        if args.bank:
+            groups = {args.bank: args.file}
+        else:
+            groups = detect_banks(args.file, args.min_confidence, backend)
+            if args.output and len(groups) > 1:
+                parser.error("Files from several banks were detected; omit -o to save one output per bank")
+
+        def save(bank, df, transaction_parser):
+            # Determine output path
+            output_path = args.output or f"data/{bank}_transactions.xlsx"
+            save_transactions(df, transaction_parser, output_path)
+
+        journal = RunJournal(args.journal, resume=args.resume)
+        failed = [file_path for file_path in args.file if not any(file_path in files for files in groups.values())]
+        failed += process_groups(groups, args, scheduler, journal, save, backend)
+        journal.close()
+
+    scheduler.report()
+
+    if failed and args.shards:
+        logger.error(f"{len(failed)} file(s) failed: {', '.join(failed)}")
+    elif failed:
+        logger.error(f"{len(failed)} file(s) failed: {', '.join(failed)}. "
+                     "Run again with --resume to continue from the last checkpoint.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,198 @@
+import time
+import hashlib
+import logging
+import argparse
+import difflib
+import cv2
+import numpy as np
+import pandas as pd
+from .registry import (
+    EXTRACTORS,
+    get_extractor_class,
+    get_parser_class
+)
+from .extractors.scheduler import ResourceScheduler
+from .extractors.backends import ReplayBackend, BACKENDS, get_backend
+from .extractors.layout import crop
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_pages(extractor, file_path: str, max_pages: int = None) -> list:
+    """Return the page images of a statement as the extractor renders them."""
+    if file_path.lower().endswith('.pdf'):
+        if not hasattr(extractor, 'rasterize'):
+            raise ValueError(f"{extractor.bank} statements are not read from PDF files")
+        from pdf2image import pdfinfo_from_path
+        page_count = pdfinfo_from_path(file_path)['Pages']
+        pages = list(range(1, min(page_count, max_pages or page_count) + 1))
+        return [np.array(image) for _, image in extractor.rasterize(file_path, pages)]
+
+    image = cv2.imread(file_path)
+    if image is None:
+        raise ValueError(f"Could not read image: {file_path}")
+    return [image]
+
+def collect_regions(extractor, files: list, max_pages: int = None) -> list:
+    """Return the regions (tables or rows) the extractor would OCR for the given files."""
+    regions = []
+    for file_path in files:
+        for page in load_pages(extractor, file_path, max_pages):
+            regions.extend(crop(page, box) for box in extractor.locate_regions(page))
+    return regions
+
+def text_agreement(a: str, b: str) -> float:
+    """Similarity (0 to 1) between the words of two OCR outputs."""
+    a, b = a.split(), b.split()
+    if not a and not b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+def benchmark_mosaic(extractor, regions: list, size: int) -> dict:
+    """
+    OCR the same regions one by one and in mosaics of `size` regions.
+
+    Returns the OCR calls and wall time of each mode and the mean agreement
+    between the texts they produced.
+    """
+    extractor.ocr_calls = 0
+    start = time.perf_counter()
+    single = [extractor.ocr_region(region) for region in regions]
+    single_time = time.perf_counter() - start
+    single_calls = extractor.ocr_calls
+
+    extractor.ocr_calls = 0
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(regions), size):
+        batched.extend(extractor.ocr_mosaic(regions[i:i+size]))
+    batched_time = time.perf_counter() - start
+    batched_calls = extractor.ocr_calls
+
+    agreement = [text_agreement(a, b) for a, b in zip(single, batched)]
+    return {
+        'regions': len(regions),
+        'single_calls': single_calls,
+        'mosaic_calls': batched_calls,
+        'calls_saved': single_calls - batched_calls,
+        'single_seconds': round(single_time, 3),
+        'mosaic_seconds': round(batched_time, 3),
+        'speedup': round(single_time / batched_time, 2) if batched_time else None,
+        'agreement': round(float(np.mean(agreement)), 4) if agreement else None,
+    }
+
+def benchmark_pipeline(extractor, parser, files: list, repeat: int = 1) -> dict:
+    """
+    Extract and parse statements `repeat` times.
+
+    Returns the time spent extracting and parsing and a checksum of the
+    parsed transactions, which stays the same across runs as long as the
+    pipeline output does (with a replayed OCR backend).
+    """
+    extractor.ocr_calls = 0
+    extract_time = parse_time = 0.0
+    frames = []
+    for _ in range(repeat):
+        for file_path in files:
+            start = time.perf_counter()
+            text = extractor.extract_text(file_path)
+            extract_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            frames.append(parser.parse(text))
+            parse_time += time.perf_counter() - start
+
+    rows = sum(len(df) for df in frames)
+    checksum = hashlib.sha1(
+        pd.util.hash_pandas_object(pd.concat(frames[:len(files)], ignore_index=True), index=False).values.tobytes()
+    ).hexdigest()
+
+    results = {
+        'files': len(files) * repeat,
+        'ocr_calls': extractor.ocr_calls,
+        'extract_seconds': round(extract_time, 3),
+        'parse_seconds': round(parse_time, 3),
+        'files_per_second': round(len(files) * repeat / (extract_time + parse_time), 2) if extract_time + parse_time else None,
+        'parsed_rows_per_second': round(rows / parse_time) if parse_time else None,
+        'checksum': checksum[:12],
+    }
+    if isinstance(extractor.backend, ReplayBackend):
+        results['replay_hits'] = extractor.backend.hits
+        results['replay_misses'] = extractor.backend.misses
+    return results
+
+def main():
+    """Benchmark OCR strategies on real statements."""
+    parser = argparse.ArgumentParser(description='Benchmark OCR strategies on bank statements.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    # Options shared by all benchmarks
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-b', '--bank',
+                      required=True,
+                      choices=list(EXTRACTORS),
+                      help='Bank whose extractor should be benchmarked')
+    common.add_argument('-f', '--file',
+                      required=True,
+                      nargs='+',
+                      help='Statements (PDF or image) to benchmark on')
+    common.add_argument('--ocr-backend',
+                      choices=list(BACKENDS),
+                      default='tesseract',
+                      help='OCR engine (default: tesseract)')
+    common.add_argument('--record-ocr',
+                      help='Record the OCR output to a file for --replay-ocr')
+    common.add_argument('--replay-ocr',
+                      help='Serve OCR output recorded with --record-ocr instead of running OCR')
+    common.add_argument('--rows',
+                      action='store_true',
+                      help='OCR table rows instead of whole tables')
+
+    mosaic = subparsers.add_parser('mosaic', parents=[common], help='Compare OCR of single regions against mosaics')
+    mosaic.add_argument('--size',
+                      type=int,
+                      default=8,
+                      help='Regions packed into each mosaic (default: 8)')
+    mosaic.add_argument('--pages',
+                      type=int,
+                      help='Maximum pages read from each PDF')
+
+    pipeline = subparsers.add_parser('pipeline', parents=[common], help='Measure extraction and parsing throughput')
+    pipeline.add_argument('--repeat',
+                      type=int,
+                      default=1,
+                      help='Times each file is processed (default: 1)')
+
+    args = parser.parse_args()
+
+    # Run inline so the timings are not affected by process start-up
+    backend = get_backend(args.ocr_backend, record=args.record_ocr, replay=args.replay_ocr)
+    extractor = get_extractor_class(args.bank)(
+        scheduler=ResourceScheduler(workers=1),
+        backend=backend,
+        row_bands=args.rows or None
+    )
+
+    if args.benchmark == 'pipeline':
+        results = benchmark_pipeline(extractor, get_parser_class(args.bank)(), args.file, args.repeat)
+        extractor.close()
+
+        print("\nPipeline benchmark:")
+        for key, value in results.items():
+            print(f"  {key}: {value}")
+        return
+
+    regions = collect_regions(extractor, args.file, args.pages)
+    if not regions:
+        print("No regions found")
+        return
+
+    results = benchmark_mosaic(extractor, regions, args.size)
+
+    print("\nMosaic benchmark:")
+    for key, value in results.items():
+        print(f"  {key}: {value}")
+
+if __name__ == "__main__":
+    main()
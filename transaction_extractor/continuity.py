@@ -0,0 +1,237 @@
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ways of bounding the period of a statement
+PERIODS = ('balances', 'month')
+
+# Columns of the issues report
+ISSUE_COLUMNS = [
+    'account', 'issue', 'start', 'end', 'previous_start', 'previous_end',
+    'expected', 'found', 'difference'
+]
+
+class BalanceContinuityValidator:
+    """
+    Check the continuity of the balances of a consolidated statement history.
+
+    Every statement starts with an opening balance row (SALDO INICIAL) and
+    ends with a closing balance row (SALDO FINAL). Statements are delimited
+    per account in row order, then sorted by period and compared with the
+    previous statement of the same account, all in a few vectorized passes:
+
+    - total_mismatch: opening balance plus transactions differs from the closing balance
+    - missing_closing: a statement without closing balance
+    - balance_gap: the opening balance differs from the previous closing balance
+    - missing_period: days between the previous statement and this one are not covered
+    - overlap: the statement starts before the previous one ended
+    - duplicate: the same statement (period and balances) appears again
+
+    Balance issues report the expected and found amounts; period issues
+    report the days between the previous statement and this one.
+
+    The period of a statement runs from the date of its opening balance to
+    the date of its closing balance (the first and last transaction dates
+    when a balance row is missing), or with `period='month'` over the whole
+    calendar months of those dates, for monthly statements whose balance
+    rows are dated with their first and last transactions.
+    """
+
+    def __init__(self, tolerance: float = 0.01, max_gap_days: int = 1,
+                 opening_label: str = 'SALDO INICIAL', closing_label: str = 'SALDO FINAL',
+                 period: str = 'balances'):
+        if period not in PERIODS:
+            raise ValueError(f"Unsupported statement period: {period}")
+        self.tolerance = tolerance
+        self.max_gap_days = max_gap_days
+        self.opening_label = opening_label
+        self.closing_label = closing_label
+        self.period = period
+
+    @staticmethod
+    def _dates(df: pd.DataFrame) -> pd.Series:
+        """Return the transaction dates of a parsed or prettified DataFrame."""
+        if 'date' in df.columns:
+            return pd.to_datetime(df['date'])
+        return pd.to_datetime(df[['year', 'month', 'day']])
+
+    @staticmethod
+    def _accounts(df: pd.DataFrame) -> pd.Series:
+        """Return the account of each row, falling back to the bank when there is no account column."""
+        for column in ('account', 'bank'):
+            if column in df.columns:
+                return df[column].fillna('').astype(str)
+        return pd.Series('', index=df.index)
+
+    def statements(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Summarize each statement of a history: account, period, opening and
+        closing balances, sum and number of transactions.
+
+        Rows of an account before its first opening balance do not belong to
+        any statement and are left out.
+        """
+        df = df.reset_index(drop=True)
+
+        # Normalize each distinct description once instead of every row
+        codes, descriptions = pd.factorize(df['description'].astype(str))
+        descriptions = pd.Series(descriptions).str.strip().str.upper()
+        is_opening = (descriptions == self.opening_label).to_numpy()[codes]
+        is_closing = (descriptions == self.closing_label).to_numpy()[codes]
+        amount = df['amount'].astype(float).to_numpy()
+
+        dates = self._dates(df)
+        frame = pd.DataFrame({
+            'account': self._accounts(df),
+            'date': dates,
+            'opening_date': dates.where(is_opening),
+            'closing_date': dates.where(is_closing),
+            'opening': np.where(is_opening, amount, np.nan),
+            'closing': np.where(is_closing, amount, np.nan),
+            'transaction': np.where(is_opening | is_closing, 0.0, amount),
+            'is_transaction': ~(is_opening | is_closing),
+        })
+
+        # Number the statements of each account by counting opening balances
+        frame['statement'] = pd.Series(is_opening).groupby(frame['account']).cumsum()
+        orphans = frame['statement'] == 0
+        if orphans.any():
+            logger.warning(f"Ignoring {int(orphans.sum())} rows found before the first opening balance of their account")
+            frame = frame[~orphans]
+
+        statements = frame.groupby(['account', 'statement'], sort=False).agg(
+            start=('opening_date', 'first'),
+            end=('closing_date', 'last'),
+            first_date=('date', 'min'),
+            last_date=('date', 'max'),
+            opening=('opening', 'first'),
+            closing=('closing', 'last'),
+            transactions=('transaction', 'sum'),
+            count=('is_transaction', 'sum'),
+        ).reset_index()
+
+        # Bound each statement by its balance rows, or by its transactions when one is missing
+        statements['start'] = statements['start'].fillna(statements['first_date'])
+        statements['end'] = statements['end'].fillna(statements['last_date'])
+        statements = statements.drop(columns=['first_date', 'last_date'])
+        if self.period == 'month':
+            statements['start'] = statements['start'].dt.to_period('M').dt.start_time
+            statements['end'] = statements['end'].dt.to_period('M').dt.end_time.dt.normalize()
+
+        return statements.sort_values(['account', 'start', 'end'], kind='stable').reset_index(drop=True)
+
+    def _issues(self, statements: pd.DataFrame, mask, issue: str, expected, found) -> pd.DataFrame:
+        """Build the report rows of the statements selected by a mask."""
+        mask = np.asarray(mask, dtype=bool)
+        expected = pd.Series(expected, index=statements.index)[mask]
+        found = pd.Series(found, index=statements.index)[mask]
+        selected = statements[mask]
+        return pd.DataFrame({
+            'account': selected['account'],
+            'issue': issue,
+            'start': selected['start'],
+            'end': selected['end'],
+            'previous_start': selected['previous_start'],
+            'previous_end': selected['previous_end'],
+            'expected': expected,
+            'found': found,
+            'difference': found - expected,
+        })
+
+    def validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check a consolidated history and return one row per issue found,
+        ordered by account and period (empty when the history is continuous).
+        """
+        statements = self.statements(df)
+        if statements.empty:
+            return pd.DataFrame(columns=ISSUE_COLUMNS)
+
+        # Previous statement of the same account
+        previous = statements.groupby('account')[['start', 'end', 'opening', 'closing', 'transactions']].shift(1)
+        statements['previous_start'] = previous['start']
+        statements['previous_end'] = previous['end']
+        has_previous = previous['end'].notna().to_numpy()
+
+        expected_closing = statements['opening'] + statements['transactions']
+        days_after = (statements['start'] - previous['end']).dt.days.to_numpy()
+
+        duplicate = has_previous & (
+            (statements['start'] == previous['start']) &
+            (statements['end'] == previous['end']) &
+            np.isclose(statements['opening'], previous['opening'], atol=self.tolerance) &
+            np.isclose(statements['closing'], previous['closing'], atol=self.tolerance) &
+            np.isclose(statements['transactions'], previous['transactions'], atol=self.tolerance)
+        ).to_numpy()
+        missing_closing = statements['closing'].isna().to_numpy()
+        total_mismatch = ~missing_closing & ((expected_closing - statements['closing']).abs() > self.tolerance).to_numpy()
+        balance_gap = has_previous & ~duplicate & ((statements['opening'] - previous['closing']).abs() > self.tolerance).to_numpy()
+        missing_period = has_previous & (days_after > self.max_gap_days)
+        overlap = has_previous & ~duplicate & (days_after < 0)
+
+        issues = pd.concat([
+            self._issues(statements, duplicate, 'duplicate', previous['closing'], statements['closing']),
+            self._issues(statements, missing_closing, 'missing_closing', expected_closing, statements['closing']),
+            self._issues(statements, total_mismatch, 'total_mismatch', expected_closing, statements['closing']),
+            self._issues(statements, balance_gap, 'balance_gap', previous['closing'], statements['opening']),
+            self._issues(statements, missing_period, 'missing_period', self.max_gap_days, days_after),
+            self._issues(statements, overlap, 'overlap', 0, days_after),
+        ])
+
+        issues = issues.sort_values(['account', 'start', 'end'], kind='stable').reset_index(drop=True)
+        return issues[ISSUE_COLUMNS]
+
+def main():
+    """Check the balance continuity of consolidated statement outputs."""
+    parser = argparse.ArgumentParser(description='Check balance continuity across statements.')
+    parser.add_argument('-f', '--file',
+                      required=True,
+                      nargs='+',
+                      help='Extracted transactions (Excel or CSV) forming the history to check')
+    parser.add_argument('-o', '--output',
+                      help='Path to save the issues found (Excel)')
+    parser.add_argument('--tolerance',
+                      type=float,
+                      default=0.01,
+                      help='Maximum difference between balances that are considered equal (default: 0.01)')
+    parser.add_argument('--max-gap-days',
+                      type=int,
+                      default=1,
+                      help='Days allowed between the end of a statement and the start of the next one (default: 1)')
+    parser.add_argument('--period',
+                      choices=PERIODS,
+                      default='balances',
+                      help='Bound statements by the dates of their balance rows or by whole calendar months (default: balances)')
+
+    args = parser.parse_args()
+
+    history = pd.concat(
+        [pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path) for path in args.file],
+        ignore_index=True
+    )
+
+    validator = BalanceContinuityValidator(tolerance=args.tolerance, max_gap_days=args.max_gap_days, period=args.period)
+    start = time.perf_counter()
+    issues = validator.validate(history)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Checked {len(history)} rows in {elapsed:.3f}s")
+
+    if issues.empty:
+        print("\nNo continuity issues found")
+        return
+
+    print(f"\n{len(issues)} continuity issue(s) found:")
+    print(issues.to_string(index=False))
+
+    if args.output:
+        issues.to_excel(args.output, index=False)
+        print(f"\nIssues saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import os
+import re
+import cv2
+import logging
+import subprocess
+import unicodedata
+import numpy as np
+from dataclasses import dataclass, field
+from pdf2image import convert_from_path
+from .registry import EXTRACTORS, PARSERS
+from .extractors.layout import find_ruling_lines, find_table_boxes
+from .extractors.backends import OCRBackend, TesseractBackend
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Resolution of the first-page render used when a PDF has no text layer
+DETECTION_DPI = 72
+
+# Resolution the ruling line kernel of the table detection is sized for
+TABLE_DPI = 300
+
+# Width screenshots are downscaled to before OCR
+DETECTION_WIDTH = 1000
+
+# Bytes read from structured exports
+HEADER_BYTES = 4096
+
+# What identifies the documents of each bank: file extensions, keywords
+# (matched on uppercase text without accents), the columns of its CSV
+# exports (matched on a header row, in any order) and whether the
+# statements are laid out in ruled tables
+FINGERPRINTS = {
+    'itau': {
+        'extensions': ['.pdf'],
+        'keywords': ['ITAU', 'SALDO INICIAL', 'SALDO FINAL', 'LANCAMENTOS', 'AGENCIA'],
+        'tables': True,
+    },
+    'chrome_river': {
+        'extensions': ['.png'],
+        'keywords': ['TOTALPAYMEAMOUNT', 'PAY ME', 'CHROME RIVER', 'EXPENSE', 'MEALS/DRINKS', 'HOTEL'],
+        'tables': True,
+    },
+    'nubank': {
+        'extensions': ['.ofx', '.csv'],
+        'keywords': ['NU PAGAMENTOS', 'NUBANK', '<FID>260', 'IDENTIFICADOR'],
+        'columns': [['DATE', 'TITLE', 'AMOUNT'], ['DATA', 'VALOR', 'IDENTIFICADOR', 'DESCRICAO']],
+    },
+    'inter': {
+        'extensions': ['.ofx', '.csv'],
+        'keywords': ['BANCO INTER', '<FID>077', 'DATA LANCAMENTO', 'EXTRATO CONTA CORRENTE'],
+        'columns': [['DATA LANCAMENTO', 'HISTORICO', 'VALOR'], ['DATA LANCAMENTO', 'DESCRICAO', 'VALOR']],
+    },
+    'picpay': {
+        'extensions': ['.ofx'],
+        'keywords': ['PICPAY', '<FID>380'],
+    },
+    'creditas': {
+        'extensions': ['.ofx'],
+        'keywords': ['CREDITAS', '<FID>342'],
+    },
+    'splitwise': {
+        'extensions': ['.json', '.csv'],
+        'keywords': ['"EXPENSES"', '"OWED_SHARE"'],
+        'columns': [['DATE', 'DESCRIPTION', 'CATEGORY', 'COST', 'CURRENCY']],
+    },
+}
+
+@dataclass
+class Detection:
+    """Bank detected for a document."""
+    bank: str
+    confidence: float
+    scores: dict = field(default_factory=dict)
+
+def _normalize(text: str) -> str:
+    """Uppercase the text and strip accents."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return text.upper()
+
+def _header_rows(text: str, max_rows: int = 20) -> list:
+    """Return the cells of the first rows of a delimited text, as sets of column names."""
+    return [
+        {cell.strip().strip('"').strip() for cell in re.split(r'[,;\t]', line)}
+        for line in text.splitlines()[:max_rows]
+    ]
+
+class LayoutDetector:
+    """
+    Identify the bank of a document from a cheap look at its first page.
+
+    PDFs are fingerprinted from the text layer of page 1 when there is one,
+    and otherwise from a low-resolution render OCRed in a single fast pass;
+    screenshots are OCRed downscaled and structured exports from their first
+    bytes. The table geometry of the render is used as additional evidence.
+    """
+
+    def __init__(self, fingerprints: dict = None, timeout: int = 30, backend: OCRBackend = None):
+        self.fingerprints = fingerprints or FINGERPRINTS
+        self.timeout = timeout
+        self.backend = backend or TesseractBackend()
+
+    def _pdf_text_layer(self, file_path: str) -> str:
+        """Return the text layer of the first page of a PDF (empty if scanned)."""
+        try:
+            result = subprocess.run(
+                ['pdftotext', '-f', '1', '-l', '1', '-layout', file_path, '-'],
+                capture_output=True, timeout=self.timeout
+            )
+            return result.stdout.decode('utf-8', errors='replace')
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Could not read the text layer of {file_path}: {str(e)}")
+            return ''
+
+    def _first_page(self, file_path: str, file_ext: str) -> tuple:
+        """
+        Return a low-resolution grayscale image of the first page and its
+        scale relative to the resolution the extractors work at.
+        """
+        if file_ext == '.pdf':
+            images = convert_from_path(
+                file_path, dpi=DETECTION_DPI, grayscale=True,
+                first_page=1, last_page=1, timeout=self.timeout
+            )
+            return np.array(images[0]), DETECTION_DPI / TABLE_DPI
+
+        image = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Could not read image file: {file_path}")
+        scale = 1.0
+        if image.shape[1] > DETECTION_WIDTH:
+            scale = DETECTION_WIDTH / image.shape[1]
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return image, scale
+
+    @staticmethod
+    def count_tables(image: np.ndarray, scale: float = 1.0) -> int:
+        """
+        Count the ruled tables of a page rendered at `scale` times the
+        resolution the table detection is sized for, shrinking the ruling
+        line kernel accordingly so short rulings are still found.
+        """
+        kernel_length = max(3, int(round(40 * scale)))
+        lines = find_ruling_lines(image, kernel_length=kernel_length, inverted=True)
+        return len(find_table_boxes(image, lines=lines))
+
+    def _read(self, file_path: str, file_ext: str) -> tuple:
+        """Return the text and the number of tables seen on the first page."""
+        if file_ext not in ('.pdf', '.png'):
+            with open(file_path, 'rb') as f:
+                return f.read(HEADER_BYTES).decode('utf-8', errors='replace'), 0
+
+        text = self._pdf_text_layer(file_path) if file_ext == '.pdf' else ''
+        image, scale = self._first_page(file_path, file_ext)
+        if not text.strip():
+            text = self.backend.image_to_string(image, '--oem 3 --psm 3', self.timeout)
+
+        return text, self.count_tables(image, scale)
+
+    def score(self, bank: str, text: str, file_ext: str, tables: int) -> float:
+        """Score how well a document matches the fingerprint of a bank (0 to 1)."""
+        fingerprint = self.fingerprints[bank]
+        if file_ext not in fingerprint['extensions']:
+            return 0.0
+
+        keywords = fingerprint['keywords']
+        hits = sum(1 for keyword in keywords if keyword in text)
+        score = hits / len(keywords)
+
+        # A header row with all the columns of an export is strong evidence on its own
+        columns = fingerprint.get('columns', [])
+        if columns and any(set(layout) <= cells for layout in columns for cells in _header_rows(text)):
+            hits += 1
+            score += 0.5
+
+        # Ruled tables corroborate the banks whose statements have them
+        if fingerprint.get('tables') and hits:
+            score += 0.25 if tables else -0.25
+
+        return max(0.0, min(1.0, score))
+
+    def detect(self, file_path: str) -> Detection:
+        """
+        Detect the bank of a document.
+
+        Confidence combines how much of the best fingerprint was found with
+        how far ahead it is of the runner-up.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        text, tables = self._read(file_path, file_ext)
+        text = _normalize(text)
+
+        # Only banks that can actually process this kind of file are candidates
+        candidates = [bank for bank in self.fingerprints
+                      if bank in PARSERS and (bank in EXTRACTORS or PARSERS[bank].importers.get(file_ext))]
+        scores = {bank: self.score(bank, text, file_ext, tables) for bank in candidates}
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        if not ranked or scores[ranked[0]] == 0:
+            return Detection(None, 0.0, scores)
+
+        best = scores[ranked[0]]
+        runner_up = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        confidence = min(1.0, 2 * best) * best / (best + runner_up)
+
+        return Detection(ranked[0], round(confidence, 3), scores)
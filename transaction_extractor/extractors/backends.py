@@ -0,0 +1,279 @@
+import os
+import cv2
+import json
+import shlex
+import hashlib
+import logging
+import pytesseract
+import numpy as np
+from abc import ABC, abstractmethod
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keys of the word boxes returned by image_to_data, as in pytesseract.Output.DICT
+DATA_KEYS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text'
+)
+
+def parse_config(config: str) -> dict:
+    """Split a Tesseract command line config into oem, psm, lang, dpi and -c variables."""
+    options = {'oem': 3, 'psm': 3, 'lang': 'eng', 'dpi': None, 'variables': {}}
+    tokens = shlex.split(config)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token in ('--oem', '--psm', '--dpi'):
+            options[token[2:]] = int(value)
+        elif token == '-l':
+            options['lang'] = value
+        elif token == '-c':
+            name, _, setting = value.partition('=')
+            options['variables'][name] = setting
+        else:
+            i -= 1
+        i += 2
+    return options
+
+class OCRBackend(ABC):
+    """Engine used by the extractors to recognize text in images."""
+
+    name = None
+
+    def check(self):
+        """Raise an error if the engine cannot be used."""
+        pass
+
+    @abstractmethod
+    def image_to_string(self, image: np.ndarray, config: str, timeout: int = 0) -> str:
+        """Return the text of an image."""
+        pass
+
+    @abstractmethod
+    def image_to_data(self, image: np.ndarray, config: str, timeout: int = 0) -> dict:
+        """Return the words of an image with their boxes, as lists keyed by DATA_KEYS."""
+        pass
+
+class TesseractBackend(OCRBackend):
+    """Tesseract run as a subprocess through pytesseract, one process per call."""
+
+    name = 'tesseract'
+
+    def check(self):
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception as e:
+            logger.error("Tesseract OCR is not installed or not in PATH. Please install it first.")
+            raise e
+
+    def image_to_string(self, image: np.ndarray, config: str, timeout: int = 0) -> str:
+        return pytesseract.image_to_string(image, config=config, timeout=timeout)
+
+    def image_to_data(self, image: np.ndarray, config: str, timeout: int = 0) -> dict:
+        return pytesseract.image_to_data(
+            image,
+            config=config,
+            timeout=timeout,
+            output_type=pytesseract.Output.DICT
+        )
+
+class TesserocrBackend(OCRBackend):
+    """
+    Tesseract called in-process through the tesserocr binding.
+
+    This saves starting a process and loading the language models on every
+    call: one API is initialized per language, engine and variables and
+    reused by later calls of the same process. Timeouts cannot interrupt
+    an in-process call and are ignored.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self):
+        self._apis = {}
+
+    def __getstate__(self):
+        # Initialized APIs belong to the process that created them
+        return {'_apis': {}}
+
+    def check(self):
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed. Install it with: pip install tesserocr")
+
+    def _api(self, options: dict):
+        """Return the API initialized for the language, engine and variables of a config."""
+        key = (options['lang'], options['oem'], tuple(sorted(options['variables'].items())))
+        api = self._apis.get(key)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=options['lang'], oem=tesserocr.OEM(options['oem']))
+            for name, value in options['variables'].items():
+                api.SetVariable(name, value)
+            self._apis[key] = api
+        return api
+
+    def _prepare(self, image: np.ndarray, config: str):
+        """Load an image into the API for a config."""
+        from PIL import Image
+
+        options = parse_config(config)
+        api = self._api(options)
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        api.SetPageSegMode(tesserocr.PSM(options['psm']))
+        api.SetImage(Image.fromarray(image))
+        if options['dpi']:
+            api.SetSourceResolution(options['dpi'])
+        return api
+
+    def image_to_string(self, image: np.ndarray, config: str, timeout: int = 0) -> str:
+        return self._prepare(image, config).GetUTF8Text()
+
+    def image_to_data(self, image: np.ndarray, config: str, timeout: int = 0) -> dict:
+        api = self._prepare(image, config)
+        api.Recognize()
+
+        data = {key: [] for key in DATA_KEYS}
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+
+        RIL = tesserocr.RIL
+        block = par = line = word = 0
+        for result in tesserocr.iterate_level(iterator, RIL.WORD):
+            # Number blocks, paragraphs, lines and words like Tesseract's TSV output
+            if result.IsAtBeginningOf(RIL.BLOCK):
+                block, par = block + 1, 0
+            if result.IsAtBeginningOf(RIL.PARA):
+                par, line = par + 1, 0
+            if result.IsAtBeginningOf(RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+
+            box = result.BoundingBox(RIL.WORD)
+            if box is None:
+                continue
+            left, top, right, bottom = box
+            values = (5, 1, block, par, line, word, left, top, right - left, bottom - top,
+                      result.Confidence(RIL.WORD), result.GetUTF8Text(RIL.WORD))
+            for key, value in zip(DATA_KEYS, values):
+                data[key].append(value)
+
+        return data
+
+class ReplayBackend(OCRBackend):
+    """
+    Serve OCR output recorded from another backend.
+
+    Outputs are keyed by a hash of the image pixels, the config and the call
+    and stored one per line in a JSONL file. With `record` set to a backend,
+    calls missing from the file are passed to it and their output is appended;
+    otherwise a missing call raises a KeyError, or returns empty output when
+    `strict` is False. Replays are deterministic and need no OCR engine,
+    which makes them suited to benchmarks and regression checks of the
+    rest of the pipeline.
+    """
+
+    name = 'replay'
+
+    def __init__(self, path: str, record: OCRBackend = None, strict: bool = True):
+        self.path = path
+        self.record = record
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self._outputs = None
+
+    def __getstate__(self):
+        # Each process loads the recordings itself
+        state = self.__dict__.copy()
+        state['_outputs'] = None
+        return state
+
+    def check(self):
+        if self.record is not None:
+            self.record.check()
+        elif not os.path.exists(self.path):
+            raise FileNotFoundError(f"OCR recording not found: {self.path}")
+
+    @property
+    def outputs(self) -> dict:
+        """Recorded outputs, loaded on first use."""
+        if self._outputs is None:
+            self._outputs = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        # Skip a line torn by an interrupted recording
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        self._outputs[entry['key']] = entry['output']
+        return self._outputs
+
+    @staticmethod
+    def key(method: str, image: np.ndarray, config: str) -> str:
+        """Identify a call by its method, image and config."""
+        image = np.ascontiguousarray(image)
+        digest = hashlib.sha1()
+        digest.update(f'{method}|{config}|{image.shape}|{image.dtype}|'.encode('utf-8'))
+        digest.update(image.data)
+        return digest.hexdigest()
+
+    def _call(self, method: str, image: np.ndarray, config: str, timeout: int, empty):
+        key = self.key(method, image, config)
+        output = self.outputs.get(key)
+        if output is not None:
+            self.hits += 1
+            return output
+
+        self.misses += 1
+        if self.record is None:
+            if self.strict:
+                raise KeyError(f"No recorded OCR output for {method} call {key}")
+            return empty
+
+        output = getattr(self.record, method)(image, config, timeout)
+        self.outputs[key] = output
+
+        # A single append per entry so concurrent recording processes do not interleave lines
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps({'key': key, 'output': output}, ensure_ascii=False) + '\n').encode('utf-8'))
+        finally:
+            os.close(fd)
+        return output
+
+    def image_to_string(self, image: np.ndarray, config: str, timeout: int = 0) -> str:
+        return self._call('image_to_string', image, config, timeout, '')
+
+    def image_to_data(self, image: np.ndarray, config: str, timeout: int = 0) -> dict:
+        return self._call('image_to_data', image, config, timeout, {key: [] for key in DATA_KEYS})
+
+# Backends selectable by name
+BACKENDS = {
+    'tesseract': TesseractBackend,
+    'tesserocr': TesserocrBackend,
+}
+
+def get_backend(name: str = 'tesseract', record: str = None, replay: str = None) -> OCRBackend:
+    """
+    Build an OCR backend by name, recording its output to `record` or
+    replaying the output recorded in `replay` instead of running it.
+    """
+    if replay:
+        return ReplayBackend(replay)
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported OCR backend: {name}")
+    backend = BACKENDS[name]()
+    if record:
+        return ReplayBackend(record, record=backend)
+    return backend
@@ -1,27 +1,133 @@
 import os
 import logging
-import pytesseract
+import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
+from .profiles import OCRProfile, get_profile
+from .scheduler import ResourceScheduler
+from .layout import find_table_boxes, find_ruling_lines, find_row_bands, count_text_lines, crop
+from .templates import TemplateCache
+from .buffers import PageBufferPool, RegionHandle, resolve
+from .mosaic import pack, split_text
+from .backends import OCRBackend, TesseractBackend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Row segmentation settings used where the OCR profile does not set them
+ROW_SETTINGS = {
+    'enabled': False,
+    'header_rows': 0,
+    'psm': 7,
+    'min_ink': 0.002,
+}
+
 class TransactionExtractor(ABC):
     """Base class for all transaction extractors."""
 
-    def __init__(self):
-        # Ensure Tesseract is installed and accessible
-        try:
-            pytesseract.get_tesseract_version()
-        except Exception as e:
-            logger.error("Tesseract OCR is not installed or not in PATH. Please install it first.")
-            raise e
+    # Key of the bank in the OCR profile registry
+    bank = None
+
+    # Whether pages are rasterized from PDFs at the profile DPI, which is then passed to Tesseract
+    rasterized = False
+
+    def __init__(self, profile: OCRProfile = None, scheduler: ResourceScheduler = None, journal=None,
+                 templates: TemplateCache = None, mosaic_size: int = 0, backend: OCRBackend = None,
+                 row_bands: bool = None):
+        # OCR engine, Tesseract run as a subprocess unless another backend is given
+        self.backend = backend or TesseractBackend()
+
+        # Ensure the OCR engine is installed and accessible
+        self.backend.check()
+
+        # Load the OCR settings for this bank unless explicitly given
+        self.profile = profile or get_profile(self.bank)
+
+        # Thread, timeout and memory budget for OCR jobs
+        self.scheduler = scheduler or ResourceScheduler()
+
+        # Optional run journal (see transaction_extractor.journal) used to resume runs
+        self.journal = journal
+        self.checkpoint = None
+
+        # Optional learned table layouts that skip the table detection
+        self.templates = templates
+
+        # Shared page buffers, created when OCR runs in worker processes
+        self.buffers = None
+
+        # Number of regions packed into a single OCR call (0 to OCR each region alone)
+        self.mosaic_size = mosaic_size
+
+        # OCR calls made by this process, for benchmarks
+        self.ocr_calls = 0
+
+        # Row segmentation settings of the profile, switched on or off by row_bands when given
+        self.rows = {**ROW_SETTINGS, **self.profile.rows}
+        if row_bands is not None:
+            self.rows['enabled'] = row_bands
+        self.line_config = self.profile.replace(psm=self.rows['psm']).to_config(self.rasterized)
+
+    def __getstate__(self):
+        # The journal holds an open file, and it and the templates are only used by the main process
+        state = self.__dict__.copy()
+        state['journal'] = None
+        state['checkpoint'] = None
+        state['templates'] = None
+        state['buffers'] = None
+        return state
+
+    def close(self):
+        """Release the shared page buffers."""
+        if self.buffers is not None:
+            self.buffers.close()
+            self.buffers = None
+
+    def allocate_page(self, shape: tuple) -> tuple:
+        """
+        Return (handle, array) for a page about to be loaded.
+
+        When OCR runs in worker processes the array is a shared buffer and the
+        handle names it, so that regions can be sent to workers by reference;
+        otherwise the handle is None and the array is a regular one.
+        """
+        if not self.scheduler.uses_processes:
+            return None, np.empty(shape, dtype=np.uint8)
+        if self.buffers is None:
+            self.buffers = PageBufferPool()
+        return self.buffers.allocate(shape)
+
+    def share_page(self, image: np.ndarray) -> tuple:
+        """Copy an already loaded page into a shared buffer if OCR runs in worker processes."""
+        if not self.scheduler.uses_processes:
+            return None, image
+        handle, page = self.allocate_page(image.shape)
+        page[:] = image
+        return handle, page
+
+    def page_regions(self, page, handle, boxes: list) -> list:
+        """Return the regions of a page, as handles when the page is in a shared buffer."""
+        if handle is None:
+            return [crop(page, box) for box in boxes]
+        return [RegionHandle(handle, tuple(box)) for box in boxes]
+
+    def release_pages(self, handles: list):
+        """Return the buffers of processed pages to the pool for reuse."""
+        for handle in handles:
+            if handle is not None and self.buffers is not None:
+                self.buffers.release(handle)
     
     def extract_text(self, file_path: str) -> pd.DataFrame:
         """Process a file (image or PDF) and return the extracted text."""
         file_ext = os.path.splitext(file_path)[1].lower()
+
+        if self.journal:
+            text = self.journal.get_file(file_path)
+            if text is not None:
+                logger.info(f"Skipping {file_path}, already extracted in the run journal")
+                return text
+            self.checkpoint = self.journal.for_file(file_path)
         
         if file_ext == '.pdf':
             text = self.extract_text_from_pdf(file_path)
@@ -29,6 +135,10 @@ class TransactionExtractor(ABC):
             text = self.extract_text_from_image(file_path)
         else:
             raise ValueError("Unsupported file format. Only PDF and PNG files are supported")
+
+        if self.journal:
+            self.journal.record_file(file_path, text)
+            self.checkpoint = None
         
         return text
     
@@ -41,3 +151,122 @@ class TransactionExtractor(ABC):
     def extract_text_from_image(self, image_path: str) -> str:
         """Extract text from an image file."""
         pass
+
+    def locate_tables(self, image) -> list:
+        """Return the (x, y, w, h) boxes of the tables of a page, using the learned layouts if any."""
+        if self.templates is not None:
+            return self.templates.locate(image, find_table_boxes)
+        return find_table_boxes(image)
+
+    def locate_regions(self, image) -> list:
+        """
+        Return the (x, y, w, h) boxes to OCR on a page: its tables or, with
+        row segmentation, the rows of its tables without empty and header rows.
+        """
+        boxes = self.locate_tables(image)
+        if not self.rows['enabled']:
+            return boxes
+
+        lines = find_ruling_lines(image, inverted=True)
+        bands = []
+        for box in boxes:
+            bands += find_row_bands(image, box, lines, self.rows['header_rows'], min_ink=self.rows['min_ink'])
+        return bands
+
+    @property
+    def region_kind(self) -> str:
+        """Name of the regions OCRed, used in their journal labels."""
+        return 'row' if self.rows['enabled'] else 'table'
+
+    def ocr_config(self, image) -> str:
+        """Return the Tesseract config for a preprocessed region, with the single-line psm for one-line rows."""
+        if self.rows['enabled'] and count_text_lines(image) == 1:
+            return self.line_config
+        return self.profile.to_config(self.rasterized)
+
+    def align_row(self, text: str) -> str:
+        """With row segmentation, put the text of each row on a single line."""
+        if not self.rows['enabled']:
+            return text
+        text = ' '.join(text.split())
+        return text + '\n' if text else ''
+
+    def detect_tables(self, image) -> list:
+        """Detect tables in the image and return their regions."""
+        return [crop(image, box) for box in self.locate_tables(image)]
+
+    def image_to_string(self, image, config: str) -> str:
+        """Run the OCR backend on an image within the scheduler timeout."""
+        self.ocr_calls += 1
+        return self.backend.image_to_string(image, config, self.scheduler.timeout)
+
+    def image_to_data(self, image, config: str) -> dict:
+        """Run the OCR backend on an image within the scheduler timeout and return its word boxes."""
+        self.ocr_calls += 1
+        return self.backend.image_to_data(image, config, self.scheduler.timeout)
+
+    def retry_region(self, region, text: str) -> str:
+        """Give extractors a chance to OCR a region again when its text looks wrong."""
+        return text
+
+    def ocr_region(self, region) -> str:
+        """Extract the text of a single table region (an array or a RegionHandle)."""
+        region = resolve(region)
+        return self.align_row(self.retry_region(region, self.extract_text_from_table(region)))
+
+    def ocr_mosaic(self, regions: list) -> list:
+        """
+        Extract the text of several table regions with a single OCR call.
+
+        The preprocessed regions are packed into a mosaic and the recognized
+        words are split back to their regions by position.
+        """
+        regions = [resolve(region) for region in regions]
+        processed = [self.preprocess_table(region) for region in regions]
+
+        texts = [''] * len(regions)
+        for mosaic, placements in pack(processed):
+            data = self.image_to_data(mosaic, config=self.profile.to_config(self.rasterized))
+            for index, text in split_text(data, placements).items():
+                texts[index] = text
+
+        return [self.align_row(self.retry_region(region, text)) for region, text in zip(regions, texts)]
+
+    def extract_regions(self, regions: list, labels: list) -> list:
+        """
+        OCR table regions through the scheduler, one job per region or, with
+        mosaic_size set, one job per mosaic of up to mosaic_size regions.
+
+        Regions already in the run journal are not OCRed again (their image
+        may be None) and new results are journaled as they complete.
+        Returns the text of each region in order; regions that failed after
+        all retries are left out and reported by the scheduler.
+        """
+        results = [None] * len(regions)
+        pending = []
+        for i, (region, label) in enumerate(zip(regions, labels)):
+            cached = self.checkpoint.get_region(label) if self.checkpoint else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if self.mosaic_size:
+            batches = [pending[i:i+self.mosaic_size] for i in range(0, len(pending), self.mosaic_size)]
+            jobs = [(tuple(labels[i] for i in batch), ([regions[i] for i in batch],)) for batch in batches]
+
+            def on_result(keys, texts):
+                for key, text in zip(keys, texts):
+                    self.checkpoint.record_region(key, text)
+
+            outputs = self.scheduler.run(self.ocr_mosaic, jobs, on_result if self.checkpoint else None)
+            for batch, texts in zip(batches, outputs):
+                for i, text in zip(batch, texts or [None] * len(batch)):
+                    results[i] = text
+        else:
+            jobs = [(labels[i], (regions[i],)) for i in pending]
+            on_result = self.checkpoint.record_region if self.checkpoint else None
+            for i, text in zip(pending, self.scheduler.run(self.ocr_region, jobs, on_result)):
+                results[i] = text
+
+        return [text for text in results if text is not None]
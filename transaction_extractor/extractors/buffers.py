@@ -0,0 +1,104 @@
+import os
+import mmap
+import shutil
+import weakref
+import tempfile
+import numpy as np
+from dataclasses import dataclass
+from .layout import crop
+
+@dataclass(frozen=True)
+class BufferHandle:
+    """Reference to a page stored in a memory-mapped buffer file."""
+    path: str
+    shape: tuple
+    dtype: str = 'uint8'
+
+@dataclass(frozen=True)
+class RegionHandle:
+    """Reference to an (x, y, w, h) region of a buffered page."""
+    buffer: BufferHandle
+    box: tuple
+
+# Buffer files mapped by this process, reused across regions and pages
+_mappings = {}
+
+def resolve(region) -> np.ndarray:
+    """
+    Return the image of a region, mapping its page buffer when given a
+    RegionHandle. Plain arrays are returned unchanged.
+    """
+    if not isinstance(region, RegionHandle):
+        return region
+
+    handle = region.buffer
+    mapping = _mappings.get(handle.path)
+    if mapping is None:
+        with open(handle.path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _mappings[handle.path] = mapping
+
+    dtype = np.dtype(handle.dtype)
+    page = np.frombuffer(mapping, dtype=dtype, count=int(np.prod(handle.shape))).reshape(handle.shape)
+    return crop(page, region.box)
+
+class PageBufferPool:
+    """
+    Pool of memory-mapped page buffers shared with worker processes.
+
+    Pages are written once into a buffer file (on /dev/shm when available,
+    so they never touch the disk) and workers only receive RegionHandles
+    naming the file, page shape and region box, instead of pickled arrays.
+    Released buffers are reused for later pages of the same or a smaller
+    size; all files are removed when the pool is closed.
+    """
+
+    def __init__(self, directory: str = None):
+        if directory is None and os.path.isdir('/dev/shm'):
+            directory = '/dev/shm'
+        self.directory = tempfile.mkdtemp(prefix='page-buffers-', dir=directory)
+        self.capacity = {}   # buffer path -> size in bytes
+        self.free = []       # paths of released buffers
+        self.count = 0
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def allocate(self, shape: tuple, dtype: str = 'uint8') -> tuple:
+        """
+        Reserve a buffer for a page.
+
+        Returns the handle of the buffer and a writable array view of it,
+        which the page should be written into.
+        """
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+        # Reuse the smallest released buffer that is large enough
+        candidates = [path for path in self.free if self.capacity[path] >= size]
+        if candidates:
+            path = min(candidates, key=self.capacity.get)
+            self.free.remove(path)
+        else:
+            path = os.path.join(self.directory, f'page-{self.count}.buf')
+            self.count += 1
+            with open(path, 'wb') as f:
+                f.truncate(size)
+            self.capacity[path] = size
+
+        view = np.memmap(path, dtype=dtype, mode='r+', shape=tuple(shape))
+        return BufferHandle(path, tuple(shape), dtype), view
+
+    def release(self, handle: BufferHandle):
+        """Return a buffer to the pool once its regions are processed."""
+        if handle.path not in self.free:
+            self.free.append(handle.path)
+
+    def close(self):
+        """Remove all the buffers of the pool."""
+        self._finalizer()
+        self.capacity = {}
+        self.free = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,13 @@
 import cv2
 import logging
-import pytesseract
 import numpy as np
 from .base import TransactionExtractor
-from pdf2image import convert_from_path
+from .preprocessing import apply_steps
+from .profiles import OCRProfile
+from .scheduler import ResourceScheduler
+from .templates import TemplateCache
+from .backends import OCRBackend
+from pdf2image import convert_from_path, pdfinfo_from_path
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,125 +16,114 @@ logger = logging.getLogger(__name__)
 class ItauExtractor(TransactionExtractor):
     """Extractor for Itau bank statements."""
     
-    def __init__(self):
-        """Initialize the Itau extractor."""
-        super().__init__()
+    bank = 'itau'
+    rasterized = True
 
-    def detect_tables(self, image: np.ndarray) -> list:
-        """Detect tables in the image and return their regions."""
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply thresholding
-        thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
-        )
-        
-        # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-        
-        # Detect horizontal lines
-        horizontal_lines = cv2.erode(thresh, horizontal_kernel, iterations=1)
-        horizontal_lines = cv2.dilate(horizontal_lines, horizontal_kernel, iterations=1)
-        
-        # Detect vertical lines
-        vertical_lines = cv2.erode(thresh, vertical_kernel, iterations=1)
-        vertical_lines = cv2.dilate(vertical_lines, vertical_kernel, iterations=1)
-        
-        # Combine horizontal and vertical lines
-        table_mask = cv2.add(horizontal_lines, vertical_lines)
-        
-        # Find contours of tables
-        contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Sort contours by area and keep only the largest ones (likely tables)
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)
-        
-        # Extract table regions
-        table_regions = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            # Add some padding around the table
-            padding = 10
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(image.shape[1] - x, w + 2 * padding)
-            h = min(image.shape[0] - y, h + 2 * padding)
-            table_regions.append(image[y:y+h, x:x+w])
-        
-        return table_regions
+    def __init__(self, profile: OCRProfile = None, scheduler: ResourceScheduler = None, journal=None,
+                 templates: TemplateCache = None, mosaic_size: int = 0, backend: OCRBackend = None,
+                 row_bands: bool = None):
+        """Initialize the Itau extractor."""
+        super().__init__(profile, scheduler, journal, templates, mosaic_size, backend, row_bands)
 
     def preprocess_table(self, table_image: np.ndarray) -> np.ndarray:
         """Preprocess table image for better OCR."""
-        # Convert to grayscale
-        gray = cv2.cvtColor(table_image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
-        )
-        
-        # Remove noise
-        kernel = np.ones((1, 1), np.uint8)
-        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-        
-        return opening
+        return apply_steps(table_image, self.profile.preprocessing)
 
     def extract_text_from_table(self, table_image: np.ndarray) -> str:
         """Extract text from a table region."""
         # Preprocess the table
         processed_table = self.preprocess_table(table_image)
         
-        # Configure Tesseract for table processing
-        custom_config = r'--oem 3 --psm 6 -l eng+por'
-        
-        # Perform OCR
-        text = pytesseract.image_to_string(
+        # Perform OCR with the Tesseract settings from the bank profile
+        text = self.image_to_string(
             processed_table,
-            config=custom_config
+            config=self.ocr_config(processed_table)
         )
         
         return text
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from a PDF file, focusing on tables."""
-        try:
-            # Convert PDF to images with higher DPI
+    def rasterize(self, pdf_path: str, pages: list):
+        """Yield (page number, image) for the given pages of a PDF, in order."""
+        # Rasterize contiguous runs of pages together
+        runs = []
+        for page in pages:
+            if runs and runs[-1][1] == page - 1:
+                runs[-1][1] = page
+            else:
+                runs.append([page, page])
+
+        for first, last in runs:
             images = convert_from_path(
                 pdf_path,
-                dpi=300,
+                dpi=self.profile.dpi,
                 grayscale=True,
-                thread_count=4
+                first_page=first,
+                last_page=last,
+                thread_count=self.scheduler.rasterize_threads,
+                # Allow the scheduler timeout for each page being rasterized
+                timeout=self.scheduler.timeout * (last - first + 1) if self.scheduler.timeout else None
             )
+            yield from zip(range(first, last + 1), images)
+
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Extract text from a PDF file, focusing on tables."""
+        handles = []
+        try:
+            page_count = pdfinfo_from_path(pdf_path)['Pages']
+
+            # Pages fully OCRed in a previous run are not rasterized again
+            page_labels = {}
+            if self.checkpoint:
+                for page in range(1, page_count + 1):
+                    labels = self.checkpoint.page_labels(page)
+                    if labels is not None:
+                        logger.info(f"Skipping page {page}, already extracted in the run journal")
+                        page_labels[page] = labels
+            pending_pages = [page for page in range(1, page_count + 1) if page not in page_labels]
             
-            all_text = []
+            page_regions = {}
             
-            for i, image in enumerate(images):
-                logger.info(f"Processing page {i+1} of {len(images)}")
+            for i, image in self.rasterize(pdf_path, pending_pages):
+                logger.info(f"Processing page {i} of {page_count}")
                 
-                # Convert PIL image to OpenCV format
-                opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+                # Pages are rasterized in grayscale and kept single channel,
+                # straight in a shared buffer when the OCR workers run in other processes
+                pixels = np.asarray(image)
+                handle, page_image = self.allocate_page(pixels.shape[:2])
+                handles.append(handle)
+                if pixels.ndim == 3:
+                    cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY, dst=page_image)
+                else:
+                    page_image[:] = pixels
                 
-                # Detect tables in the page
-                table_regions = self.detect_tables(opencv_image)
+                # Detect tables (or their rows) in the page
+                table_regions = self.page_regions(page_image, handle, self.locate_regions(page_image))
                 
                 if not table_regions:
-                    logger.warning(f"No tables detected on page {i+1}")
-                    continue
+                    logger.warning(f"No tables detected on page {i}")
                 
-                # Process each table
-                for j, table in enumerate(table_regions):
-                    logger.info(f"Processing table {j+1} on page {i+1}")
-                    text = self.extract_text_from_table(table)
-                    all_text.append(text)
+                page_regions[i] = table_regions
+                page_labels[i] = [f"page {i} {self.region_kind} {j+1}" for j in range(len(table_regions))]
+                if self.checkpoint:
+                    self.checkpoint.record_page(i, page_labels[i])
+            
+            regions = []
+            labels = []
+            for page in range(1, page_count + 1):
+                regions += page_regions.get(page, [None] * len(page_labels[page]))
+                labels += page_labels[page]
+            
+            # OCR every table through the scheduler
+            logger.info(f"Processing {len(regions)} {self.region_kind}s")
+            all_text = self.extract_regions(regions, labels)
             
             return "\n".join(all_text)
         except Exception as e:
             logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
             raise
+        finally:
+            # Return the page buffers to the pool even when OCR fails
+            self.release_pages(handles)
 
     def extract_text_from_image(self, image_path: str) -> str:
         """Extract text from an image file. Not implemented for Itau."""
@@ -0,0 +1,142 @@
+import cv2
+import numpy as np
+
+def find_ruling_lines(image: np.ndarray, kernel_length: int = 40, inverted: bool = False) -> tuple:
+    """
+    Return the masks of the horizontal and vertical line structures of a page.
+
+    By default the structures are found on the thresholded page as the table
+    detection always did; with `inverted` the page is inverted first, so the
+    masks hold the dark ruling lines drawn on it.
+    """
+    # Convert to grayscale
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # Apply thresholding
+    thresh = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV if inverted else cv2.THRESH_BINARY, 11, 2
+    )
+
+    # Detect horizontal and vertical lines
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_length, 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, kernel_length))
+
+    # Detect horizontal lines
+    horizontal_lines = cv2.erode(thresh, horizontal_kernel, iterations=1)
+    horizontal_lines = cv2.dilate(horizontal_lines, horizontal_kernel, iterations=1)
+
+    # Detect vertical lines
+    vertical_lines = cv2.erode(thresh, vertical_kernel, iterations=1)
+    vertical_lines = cv2.dilate(vertical_lines, vertical_kernel, iterations=1)
+
+    return horizontal_lines, vertical_lines
+
+def find_table_boxes(image: np.ndarray, padding: int = 10, lines: tuple = None) -> list:
+    """
+    Detect tables in the image and return their (x, y, w, h) boxes, largest first.
+
+    The ruling line masks are computed unless given in `lines`.
+    """
+    horizontal_lines, vertical_lines = lines or find_ruling_lines(image)
+
+    # Combine horizontal and vertical lines
+    table_mask = cv2.add(horizontal_lines, vertical_lines)
+
+    # Find contours of tables
+    contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Sort contours by area and keep only the largest ones (likely tables)
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        # Add some padding around the table
+        x = max(0, x - padding)
+        y = max(0, y - padding)
+        w = min(image.shape[1] - x, w + 2 * padding)
+        h = min(image.shape[0] - y, h + 2 * padding)
+        boxes.append((x, y, w, h))
+
+    return boxes
+
+def find_row_bands(image: np.ndarray, box: tuple, lines: tuple = None, header_rows: int = 0,
+                   min_coverage: float = 0.5, min_height: int = 8, min_ink: float = 0.002,
+                   min_gap: int = 3) -> list:
+    """
+    Split a table box into the (x, y, w, h) boxes of its rows, top to bottom.
+
+    Rows are the bands between the horizontal ruling lines covering at least
+    `min_coverage` of the table width; a table without rulings, and the
+    parts of a table above and below its outer rulings, are split between
+    their text lines instead. `lines` are the inverted masks of
+    find_ruling_lines. Bands lower than `min_height`, bands whose share of
+    ink (not counting ruling lines) is below `min_ink` and then the first
+    `header_rows` of the remaining bands, whether they are ruled or text
+    lines above the first ruling, are dropped.
+    """
+    horizontal_lines, vertical_lines = lines or find_ruling_lines(image, inverted=True)
+    x, y, w, h = box
+
+    gray = crop(image, box)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+    rulings_mask = crop(horizontal_lines, box) > 0
+    ink = (gray < 128) & ~rulings_mask & ~(crop(vertical_lines, box) > 0)
+    row_ink = ink.mean(axis=1)
+
+    def line_bands(top, bottom):
+        # Bands around each text line, padded by the gap between lines
+        return [
+            (max(top, top + first - min_gap), min(bottom, top + last + 1 + min_gap))
+            for first, last in text_line_runs(row_ink[top:bottom], min_gap)
+        ]
+
+    rulings = _runs(np.flatnonzero(rulings_mask.mean(axis=1) >= min_coverage))
+    if rulings:
+        # Bands between consecutive ruling lines, excluding the lines themselves
+        bands = [
+            (above[1] + 1, below[0]) for above, below in zip(rulings, rulings[1:])
+            if below[0] - above[1] - 1 >= min_height
+        ]
+        # Text outside the outer rulings is not part of the rows and is split by line
+        bands = line_bands(0, rulings[0][0]) + bands + line_bands(rulings[-1][1] + 1, h)
+    else:
+        bands = line_bands(0, h)
+
+    bands = [(top, bottom) for top, bottom in bands if row_ink[top:bottom].mean() >= min_ink][header_rows:]
+    return [(x, y + top, w, bottom - top) for top, bottom in bands]
+
+def text_line_runs(row_ink: np.ndarray, min_gap: int = 3) -> list:
+    """
+    Return the (first, last) rows of each text line from the ink of each
+    row, joining lines separated by fewer than `min_gap` blank rows.
+    """
+    runs = []
+    for start, end in _runs(np.flatnonzero(row_ink > 0)):
+        if runs and start - runs[-1][1] <= min_gap:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+    return [(start, end) for start, end in runs if end - start >= 2]
+
+def count_text_lines(image: np.ndarray, min_gap: int = 3) -> int:
+    """Count the text lines of a (preprocessed, dark on light) region."""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return len(text_line_runs((gray < 128).mean(axis=1), min_gap))
+
+def _runs(indices: np.ndarray) -> list:
+    """Group sorted indices into (first, last) runs of consecutive values."""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index - 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+def crop(image: np.ndarray, box: tuple) -> np.ndarray:
+    """Return the region of an image inside an (x, y, w, h) box."""
+    x, y, w, h = box
+    return image[y:y+h, x:x+w]
@@ -0,0 +1,83 @@
+import numpy as np
+
+# White space between packed regions, so Tesseract never joins their lines
+GUTTER = 40
+
+# Tesseract rejects images taller than 32767 pixels
+MAX_HEIGHT = 30000
+
+def pack(images: list, gutter: int = GUTTER, max_height: int = MAX_HEIGHT) -> list:
+    """
+    Stack preprocessed (single channel) region images into mosaics.
+
+    Regions are placed one below the other, left aligned, on a white canvas
+    with `gutter` pixels around each of them. Returns a list of
+    (mosaic, placements) where placements holds the (index, top, height) of
+    every region in the mosaic, index being its position in `images`.
+    """
+    mosaics = []
+    batch = []
+    height = gutter
+    for index, image in enumerate(images):
+        if batch and height + image.shape[0] + gutter > max_height:
+            mosaics.append(_render(images, batch, gutter))
+            batch, height = [], gutter
+        batch.append(index)
+        height += image.shape[0] + gutter
+
+    if batch:
+        mosaics.append(_render(images, batch, gutter))
+
+    return mosaics
+
+def _render(images: list, batch: list, gutter: int) -> tuple:
+    """Draw a batch of regions on a mosaic canvas."""
+    width = max(images[i].shape[1] for i in batch) + 2 * gutter
+    height = sum(images[i].shape[0] + gutter for i in batch) + gutter
+    mosaic = np.full((height, width), 255, dtype=np.uint8)
+
+    placements = []
+    top = gutter
+    for i in batch:
+        h, w = images[i].shape[:2]
+        mosaic[top:top+h, gutter:gutter+w] = images[i]
+        placements.append((i, top, h))
+        top += h + gutter
+
+    return mosaic, placements
+
+def split_text(data: dict, placements: list) -> dict:
+    """
+    Rebuild the text of each region from Tesseract word boxes of a mosaic.
+
+    `data` is the output of image_to_data as a dict. Words are assigned to
+    the region containing their vertical center (or the nearest one) and
+    laid out like image_to_string does: words of a line joined by spaces,
+    lines by newlines and paragraphs separated by a blank line.
+    Returns a dict mapping region index to its text.
+    """
+    lines = {index: {} for index, _, _ in placements}
+    for i, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+
+        center = data['top'][i] + data['height'][i] / 2
+        index, _, _ = min(
+            placements,
+            key=lambda p: 0 if p[1] <= center < p[1] + p[2] else min(abs(center - p[1]), abs(center - p[1] - p[2]))
+        )
+        line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines[index].setdefault(line, []).append(word)
+
+    texts = {}
+    for index, region_lines in lines.items():
+        text = ''
+        previous = None
+        for (block, par, line), words in sorted(region_lines.items()):
+            if previous is not None:
+                text += '\n\n' if (block, par) != previous else '\n'
+            text += ' '.join(words)
+            previous = (block, par)
+        texts[index] = text + '\n' if text else ''
+
+    return texts
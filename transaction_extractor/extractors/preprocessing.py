@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+def grayscale(image: np.ndarray) -> np.ndarray:
+    """Convert a BGR image to grayscale (no-op for single channel images)."""
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def resize(image: np.ndarray, factor: float = 2.0) -> np.ndarray:
+    """Scale the image by a constant factor."""
+    return cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+
+def adaptive_threshold(image: np.ndarray, block_size: int = 11, c: int = 2) -> np.ndarray:
+    """Apply Gaussian adaptive thresholding."""
+    return cv2.adaptiveThreshold(
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY, block_size, c
+    )
+
+def clahe(image: np.ndarray, clip_limit: float = 3.0, tile_grid_size: tuple = (16, 16)) -> np.ndarray:
+    """Increase contrast using CLAHE."""
+    return cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid_size)).apply(image)
+
+def denoise(image: np.ndarray) -> np.ndarray:
+    """Remove noise with non-local means denoising."""
+    return cv2.fastNlMeansDenoising(image)
+
+def otsu(image: np.ndarray) -> np.ndarray:
+    """Apply Otsu's thresholding."""
+    _, thresh = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def morph_open(image: np.ndarray, kernel: tuple = (1, 1)) -> np.ndarray:
+    """Remove small noise with a morphological opening."""
+    return cv2.morphologyEx(image, cv2.MORPH_OPEN, np.ones(tuple(kernel), np.uint8))
+
+def dilate(image: np.ndarray, kernel: tuple = (2, 1), iterations: int = 1) -> np.ndarray:
+    """Dilate the image to make text more prominent."""
+    return cv2.dilate(image, np.ones(tuple(kernel), np.uint8), iterations=iterations)
+
+# Preprocessing steps that can be referenced by name from an OCR profile
+STEPS = {
+    'grayscale': grayscale,
+    'resize': resize,
+    'adaptive_threshold': adaptive_threshold,
+    'clahe': clahe,
+    'denoise': denoise,
+    'otsu': otsu,
+    'open': morph_open,
+    'dilate': dilate,
+}
+
+def apply_steps(image: np.ndarray, steps: list) -> np.ndarray:
+    """
+    Run an image through a list of preprocessing steps.
+
+    Each step is either a step name (e.g. 'otsu') or a single-key mapping
+    from the step name to its keyword arguments (e.g. {'resize': {'factor': 2.0}}).
+    """
+    for step in steps:
+        if isinstance(step, dict):
+            (name, kwargs), = step.items()
+        else:
+            name, kwargs = step, {}
+        if name not in STEPS:
+            raise ValueError(f"Unknown preprocessing step: {name}")
+        image = STEPS[name](image, **(kwargs or {}))
+    return image
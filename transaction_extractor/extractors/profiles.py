@@ -0,0 +1,97 @@
+import os
+import copy
+import yaml
+from dataclasses import dataclass, field, asdict
+
+# Default profiles shipped with the package
+DEFAULT_PROFILES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ocr_profiles.yaml')
+
+# Tuned profiles written by the tuning command, overriding the defaults
+USER_PROFILES_PATH = 'data/ocr_profiles.yaml'
+
+@dataclass
+class OCRProfile:
+    """Declarative OCR settings for one bank layout."""
+    oem: int = 3
+    psm: int = 6
+    languages: list = field(default_factory=lambda: ['eng'])
+    dpi: int = 300
+    whitelist: str = None
+    variables: dict = field(default_factory=dict)
+    preprocessing: list = field(default_factory=list)
+    rows: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'OCRProfile':
+        """Build a profile from its YAML representation."""
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown OCR profile fields: {', '.join(sorted(unknown))}")
+        return cls(**copy.deepcopy(data))
+
+    def to_dict(self) -> dict:
+        """Return the YAML representation of the profile."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    def replace(self, **changes) -> 'OCRProfile':
+        """Return a copy of the profile with some fields changed."""
+        data = copy.deepcopy(self.to_dict())
+        data.update(changes)
+        return OCRProfile.from_dict(data)
+
+    def to_config(self, rasterized: bool = False) -> str:
+        """
+        Render the profile as a Tesseract command line config.
+
+        The DPI is only passed for pages rasterized from a PDF at that
+        resolution; for other images it would just be a wrong hint.
+        """
+        config = [
+            f'--oem {self.oem}',
+            f'--psm {self.psm}',
+            f"-l {'+'.join(self.languages)}",
+        ]
+        if rasterized and self.dpi:
+            config.append(f'--dpi {self.dpi}')
+        if self.whitelist:
+            config.append(f'-c tessedit_char_whitelist={self.whitelist}')
+        for name, value in self.variables.items():
+            config.append(f'-c {name}={value}')
+        return ' '.join(config)
+
+def load_profiles(path: str = None) -> dict:
+    """
+    Load the OCR profile registry.
+
+    The packaged defaults are loaded first and then overridden, bank by bank,
+    by the profiles found in `path` (defaults to data/ocr_profiles.yaml).
+    """
+    with open(DEFAULT_PROFILES_PATH, 'r') as f:
+        profiles = yaml.safe_load(f)['profiles']
+
+    path = path or USER_PROFILES_PATH
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            profiles.update((yaml.safe_load(f) or {}).get('profiles', {}))
+
+    return {bank: OCRProfile.from_dict(data) for bank, data in profiles.items()}
+
+def get_profile(bank: str, path: str = None) -> OCRProfile:
+    """Return the OCR profile registered for a bank."""
+    profiles = load_profiles(path)
+    if bank not in profiles:
+        raise ValueError(f"No OCR profile registered for bank: {bank}")
+    return profiles[bank]
+
+def save_profile(bank: str, profile: OCRProfile, path: str = None):
+    """Store a profile in the user profile file, keeping the other banks untouched."""
+    path = path or USER_PROFILES_PATH
+    data = {'profiles': {}}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or data
+    data.setdefault('profiles', {})[bank] = profile.to_dict()
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
@@ -0,0 +1,159 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _address_space() -> int:
+    """Size in bytes of the current process address space, 0 where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+def _init_worker(thread_limit: int, memory_limit: int):
+    """Apply the thread and memory budget to a worker process."""
+    # Tesseract reads OMP_THREAD_LIMIT and the subprocess inherits it
+    os.environ['OMP_THREAD_LIMIT'] = str(thread_limit)
+
+    # Address space limit, inherited by the Tesseract subprocesses as well.
+    # A fresh worker already maps a few hundred MB (interpreter, numpy, OpenCV),
+    # so the budget is what the worker may grow by on top of that.
+    if memory_limit:
+        import resource
+        limit = _address_space() + memory_limit
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+class ResourceScheduler:
+    """
+    Run OCR jobs within a CPU thread budget, with timeouts, memory ceilings
+    and retries.
+
+    The thread budget is split between the OCR workers: each worker gets
+    max_threads // workers threads for Tesseract (through OMP_THREAD_LIMIT),
+    and rasterization, which runs before OCR, may use the whole budget.
+    With a single worker and no memory limit jobs run in-process; otherwise
+    they run in worker processes whose address space may grow by at most
+    memory_limit_mb over what the worker maps when it starts. Jobs failing after all retries are skipped and reported
+    in `failures`.
+    """
+
+    def __init__(self, max_threads: int = None, workers: int = 1, timeout: int = 120,
+                 memory_limit_mb: int = None, retries: int = 1):
+        self.max_threads = max_threads or os.cpu_count() or 1
+        self.workers = max(1, min(workers, self.max_threads))
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.retries = retries
+        self.failures = []
+
+    @property
+    def threads_per_worker(self) -> int:
+        """Threads each OCR worker may use."""
+        return max(1, self.max_threads // self.workers)
+
+    @property
+    def rasterize_threads(self) -> int:
+        """Threads available to PDF rasterization."""
+        return self.max_threads
+
+    @property
+    def uses_processes(self) -> bool:
+        """Whether jobs run in worker processes."""
+        return self.workers > 1 or bool(self.memory_limit_mb)
+
+    def run(self, func, jobs: list, on_result=None) -> list:
+        """
+        Run func over a list of jobs.
+
+        Args:
+            func: Picklable callable run for each job
+            jobs: List of (key, args) tuples; key identifies the job in reports
+            on_result: Optional callback(key, result) called as each job completes
+
+        Returns:
+            List of results in job order, with None for skipped jobs
+        """
+        results = [None] * len(jobs)
+        attempts = [0] * len(jobs)
+        pending = list(range(len(jobs)))
+        # Jobs caught in a crashed pool, rerun alone to find the culprit
+        isolated = set()
+
+        while pending:
+            if self.uses_processes:
+                completed = self._run_in_processes(func, jobs, pending, isolated)
+            else:
+                completed = self._run_inline(func, jobs, pending)
+
+            pending = []
+            for i, result, error in completed:
+                if isinstance(error, BrokenProcessPool) and i not in isolated:
+                    # Any job of the pool may have crashed it, so this does not count as an attempt
+                    isolated.add(i)
+                    pending.append(i)
+                    continue
+
+                attempts[i] += 1
+                key = jobs[i][0]
+                if error is None:
+                    results[i] = result
+                    if on_result:
+                        on_result(key, result)
+                elif attempts[i] <= self.retries:
+                    logger.warning(f"Job {key} failed ({error}), retrying")
+                    pending.append(i)
+                else:
+                    logger.error(f"Job {key} failed after {attempts[i]} attempts, skipping: {error}")
+                    self.failures.append({'job': key, 'attempts': attempts[i], 'error': str(error)})
+
+        return results
+
+    def _run_inline(self, func, jobs: list, indices: list):
+        """Run jobs one by one in the current process, applying the thread limit only meanwhile."""
+        previous = os.environ.get('OMP_THREAD_LIMIT')
+        os.environ['OMP_THREAD_LIMIT'] = str(self.threads_per_worker)
+        try:
+            for i in indices:
+                try:
+                    yield i, func(*jobs[i][1]), None
+                except Exception as e:
+                    yield i, None, e
+        finally:
+            if previous is None:
+                os.environ.pop('OMP_THREAD_LIMIT', None)
+            else:
+                os.environ['OMP_THREAD_LIMIT'] = previous
+
+    def _run_in_processes(self, func, jobs: list, indices: list, isolated: set):
+        """Run jobs in a pool of worker processes, isolated jobs each in their own pool."""
+        shared = [i for i in indices if i not in isolated]
+        groups = [shared] if shared else []
+        groups += [[i] for i in indices if i in isolated]
+
+        memory_limit = self.memory_limit_mb * 1024 * 1024 if self.memory_limit_mb else None
+        for group in groups:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(group)),
+                initializer=_init_worker,
+                initargs=(self.threads_per_worker, memory_limit)
+            ) as pool:
+                futures = {pool.submit(func, *jobs[i][1]): i for i in group}
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result(), None
+                    except Exception as e:
+                        # Includes BrokenProcessPool when a worker is killed (e.g. out of memory)
+                        yield futures[future], None, e
+
+    def report(self):
+        """Log a summary of the skipped jobs."""
+        if not self.failures:
+            return
+        logger.warning(f"{len(self.failures)} job(s) skipped:")
+        for failure in self.failures:
+            logger.warning(f"  {failure['job']}: {failure['error']} (after {failure['attempts']} attempts)")
@@ -0,0 +1,229 @@
+import os
+import cv2
+import json
+import glob
+import uuid
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Version of the template file format
+TEMPLATE_FORMAT = 2
+
+# Length of the row and column ink profiles pages are compared with
+PROFILE_LENGTH = 256
+
+# Maximum number of layouts kept per bank, the least recently used being replaced
+MAX_TEMPLATES = 20
+
+# Height of the strip checked below each table, relative to the page height
+EDGE_HEIGHT = 0.01
+
+# Share of ink the strip below a reused table may have beyond the learned page's
+EDGE_TOLERANCE = 0.005
+
+def line_profiles(image: np.ndarray) -> tuple:
+    """
+    Return the row and column ink profiles of a page at low resolution.
+
+    The page is shrunk to PROFILE_LENGTH x PROFILE_LENGTH and the darkness
+    of each row and column is averaged, which is cheap and stable across
+    renders of the same layout.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (PROFILE_LENGTH, PROFILE_LENGTH), interpolation=cv2.INTER_AREA)
+    ink = 1.0 - small.astype(np.float32) / 255.0
+    return ink.mean(axis=1), ink.mean(axis=0)
+
+def edge_ink(image: np.ndarray, box: tuple) -> float:
+    """
+    Return the share of dark pixels in the strip just below a table box,
+    where a table longer than the box would continue.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    x, y, w, h = box
+    top = y + h
+    strip = gray[top:top + max(4, int(round(EDGE_HEIGHT * gray.shape[0]))), x:x + w]
+    if not strip.size:
+        return 0.0
+    return float((strip < 128).mean())
+
+def _correlation(a: np.ndarray, b: np.ndarray) -> float:
+    """Pearson correlation between two profiles (1.0 for two flat profiles)."""
+    a = a - a.mean()
+    b = b - b.mean()
+    norm = np.sqrt((a * a).sum() * (b * b).sum())
+    if norm == 0:
+        return 1.0 if not a.any() and not b.any() else 0.0
+    return float((a * b).sum() / norm)
+
+class TemplateCache:
+    """
+    Table layouts learned for a bank, stored on disk and versioned.
+
+    Each layout is saved as {directory}/{bank}/v{version}.json with its
+    table boxes (relative to the page size), the line profiles of the page
+    it was learned from and the ink found just below each table.
+    A new page whose profiles correlate with a stored layout above the
+    threshold reuses its boxes and skips the full table detection, unless
+    it has more ink below a table than the learned page, meaning the table
+    continues past the stored box (e.g. a statement with more rows).
+
+    The modification time of a layout file is its last use: it is touched
+    whenever the layout is reused, and once MAX_TEMPLATES layouts are
+    stored the least recently used one is removed to learn a new one.
+    """
+
+    def __init__(self, bank: str, directory: str = 'data/templates', threshold: float = 0.97):
+        self.bank = bank
+        self.directory = os.path.join(directory, bank)
+        self.threshold = threshold
+        self.templates = []
+        self.hits = 0
+        self.misses = 0
+
+        for path in sorted(glob.glob(os.path.join(self.directory, 'v*.json')),
+                           key=lambda path: int(os.path.basename(path)[1:-5])):
+            try:
+                with open(path, 'r') as f:
+                    template = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable template {path}: {str(e)}")
+                continue
+            if template.get('format') != TEMPLATE_FORMAT:
+                logger.warning(f"Ignoring template {path} with unsupported format")
+                continue
+            template['rows'] = np.array(template['rows'], dtype=np.float32)
+            template['columns'] = np.array(template['columns'], dtype=np.float32)
+            template['path'] = path
+            template['used_at'] = os.path.getmtime(path)
+            self.templates.append(template)
+
+    @staticmethod
+    def _scale(boxes: list, width: int, height: int) -> list:
+        """Convert relative boxes to pixel boxes for a page size."""
+        return [
+            (int(round(x * width)), int(round(y * height)), int(round(w * width)), int(round(h * height)))
+            for x, y, w, h in boxes
+        ]
+
+    def _best(self, profiles: tuple):
+        """Return the stored layout best matching the page profiles, or None."""
+        rows, columns = profiles
+        best, best_score = None, self.threshold
+        for template in self.templates:
+            score = min(_correlation(rows, template['rows']), _correlation(columns, template['columns']))
+            if score >= best_score:
+                best, best_score = template, score
+        return best
+
+    def match(self, image: np.ndarray, profiles: tuple = None):
+        """
+        Return the table boxes of the stored layout matching the page, or
+        None when no layout matches or a table continues below its box.
+        """
+        template = self._best(profiles or line_profiles(image))
+        if template is None:
+            self.misses += 1
+            return None
+
+        height, width = image.shape[:2]
+        boxes = self._scale(template['tables'], width, height)
+        for box, learned in zip(boxes, template['edges']):
+            if edge_ink(image, box) > learned + EDGE_TOLERANCE:
+                logger.info(f"Page has content below a table of layout v{template['version']} for {self.bank}, "
+                            f"detecting its tables")
+                self.misses += 1
+                return None
+
+        self.hits += 1
+        self._touch(template)
+        return boxes
+
+    @staticmethod
+    def _touch(template: dict):
+        """Record the use of a layout in the modification time of its file."""
+        try:
+            os.utime(template['path'])
+            template['used_at'] = os.path.getmtime(template['path'])
+        except OSError:
+            # Removed by another run making room for its own layout
+            pass
+
+    def _evict(self):
+        """Remove the least recently used layouts until there is room for a new one."""
+        while len(self.templates) >= MAX_TEMPLATES:
+            template = min(self.templates, key=lambda stored: stored['used_at'])
+            self.templates.remove(template)
+            try:
+                os.remove(template['path'])
+            except FileNotFoundError:
+                pass
+            logger.info(f"Removed least recently used table layout v{template['version']} for {self.bank}")
+
+    def learn(self, image: np.ndarray, boxes: list, profiles: tuple = None):
+        """Store the table boxes detected on a page as a new layout version."""
+        if not boxes:
+            return
+
+        # Versions only grow, even past removed layouts, so a version always names the same layout
+        version = max((stored['version'] for stored in self.templates), default=0) + 1
+        self._evict()
+
+        height, width = image.shape[:2]
+        rows, columns = profiles or line_profiles(image)
+
+        def relative(box):
+            x, y, w, h = box
+            return [x / width, y / height, w / width, h / height]
+
+        template = {
+            'format': TEMPLATE_FORMAT,
+            'bank': self.bank,
+            'version': None,
+            'page_size': [width, height],
+            'tables': [relative(box) for box in boxes],
+            'edges': [edge_ink(image, box) for box in boxes],
+            'rows': rows.tolist(),
+            'columns': columns.tolist(),
+        }
+
+        # Write to a temporary file and link it to the first free version, so
+        # concurrent runs never read a partial template nor overwrite another's
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f'.{uuid.uuid4().hex}.tmp')
+        try:
+            while True:
+                template['version'] = version
+                path = os.path.join(self.directory, f'v{version}.json')
+                with open(tmp_path, 'w') as f:
+                    json.dump(template, f)
+                try:
+                    os.link(tmp_path, path)
+                    break
+                except FileExistsError:
+                    version += 1
+        finally:
+            os.remove(tmp_path)
+        logger.info(f"Learned table layout v{version} for {self.bank}")
+
+        template['rows'] = rows
+        template['columns'] = columns
+        template['path'] = path
+        template['used_at'] = os.path.getmtime(path)
+        self.templates.append(template)
+
+    def locate(self, image: np.ndarray, detect) -> list:
+        """
+        Return the table boxes of a page, from a stored layout when one
+        matches and otherwise by running `detect` and learning the result.
+        """
+        profiles = line_profiles(image)
+        boxes = self.match(image, profiles)
+        if boxes is None:
+            boxes = detect(image)
+            self.learn(image, boxes, profiles)
+        return boxes
@@ -0,0 +1,6 @@
+from .base import StatementImporter
+from .ofx import OFXImporter
+from .delimited import CSVImporter
+from .splitwise import SplitwiseImporter
+
+__all__ = ['StatementImporter', 'OFXImporter', 'CSVImporter', 'SplitwiseImporter']
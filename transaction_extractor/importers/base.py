@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+class StatementImporter(ABC):
+    """
+    Base class for importers of structured statement exports.
+
+    Importers read files that already hold the transactions in a structured
+    format, so no OCR is needed, and yield one record at a time.
+    """
+
+    @abstractmethod
+    def iter_records(self, file_path: str) -> Iterator[dict]:
+        """
+        Yield the transactions of a file as dicts with the keys
+        'date' (datetime.date), 'description' (str) and 'amount' (float,
+        negative for debits).
+        """
+        pass
+
+    @staticmethod
+    def parse_amount(value: str, decimal: str = '.') -> float:
+        """Parse an amount written with the given decimal separator."""
+        value = value.strip().replace(' ', '')
+        if decimal == ',':
+            value = value.replace('.', '').replace(',', '.')
+        else:
+            value = value.replace(',', '')
+        return float(value)
@@ -0,0 +1,69 @@
+import csv
+from datetime import datetime
+from typing import Iterator
+from .base import StatementImporter
+
+class CSVImporter(StatementImporter):
+    """
+    Streaming importer for CSV statement exports.
+
+    A bank may export several CSV layouts, so the importer takes a list of
+    layouts and uses the first one whose columns are found in the header row.
+    Each layout is a dict with:
+        date: name of the date column
+        date_format: strptime format of the dates
+        description: list of columns joined into the description
+        amount: name of the amount column
+        delimiter: field delimiter (default ',')
+        decimal: decimal separator of the amounts (default '.')
+        negate: whether amounts must be negated, e.g. for credit card
+            exports where purchases are positive (default False)
+    Rows before the header (titles, account details) are skipped.
+    """
+
+    def __init__(self, layouts: list, encoding: str = 'utf-8-sig'):
+        self.layouts = layouts
+        self.encoding = encoding
+
+    def _match_layout(self, header: list):
+        """Return the layout matching a header row, if any."""
+        columns = [column.strip() for column in header]
+        for layout in self.layouts:
+            if (layout['date'] in columns and layout['amount'] in columns and
+                    any(column in columns for column in layout['description'])):
+                return layout
+        return None
+
+    def iter_records(self, file_path: str) -> Iterator[dict]:
+        """Yield the transactions of a CSV file."""
+        delimiters = {layout.get('delimiter', ',') for layout in self.layouts}
+
+        with open(file_path, 'r', encoding=self.encoding, newline='') as f:
+            # Find the header row, trying every delimiter used by the layouts
+            layout = None
+            for line in f:
+                for delimiter in delimiters:
+                    header = next(csv.reader([line], delimiter=delimiter))
+                    layout = self._match_layout(header)
+                    if layout:
+                        break
+                if layout:
+                    break
+
+            if not layout:
+                raise ValueError(f"No known CSV layout found in {file_path}")
+
+            columns = {column.strip(): i for i, column in enumerate(header)}
+            descriptions = [columns[column] for column in layout['description'] if column in columns]
+            sign = -1 if layout.get('negate') else 1
+
+            for row in csv.reader(f, delimiter=layout.get('delimiter', ',')):
+                # Skip blank and summary rows
+                if len(row) < len(columns) or not row[columns[layout['date']]].strip():
+                    continue
+
+                yield {
+                    'date': datetime.strptime(row[columns[layout['date']]].strip(), layout['date_format']).date(),
+                    'description': ' '.join(row[i].strip() for i in descriptions if row[i].strip()),
+                    'amount': sign * self.parse_amount(row[columns[layout['amount']]], layout.get('decimal', '.')),
+                }
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Iterator
+from .base import StatementImporter
+
+# Size of the chunks read from the file while scanning for tags
+CHUNK_SIZE = 64 * 1024
+
+class OFXImporter(StatementImporter):
+    """
+    Streaming importer for OFX statements.
+
+    Handles both the SGML (OFX 1.x, unclosed tags) and the XML (OFX 2.x)
+    flavours by scanning the file tag by tag in fixed-size chunks, so the
+    whole file is never held in memory.
+    """
+
+    def _detect_encoding(self, file_path: str) -> str:
+        """Pick the file encoding from the OFX header."""
+        with open(file_path, 'rb') as f:
+            header = f.read(1024).upper()
+        if b'CHARSET:1252' in header or b'ISO-8859-1' in header:
+            return 'cp1252'
+        return 'utf-8'
+
+    def _iter_tags(self, file_path: str) -> Iterator[tuple]:
+        """Yield (tag, value) pairs in document order."""
+        with open(file_path, 'r', encoding=self._detect_encoding(file_path), errors='replace') as f:
+            buffer = ''
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+                buffer += chunk
+                parts = buffer.split('<')
+                # The last part may be cut in the middle of a tag
+                buffer = parts.pop()
+                for part in parts:
+                    tag, sep, value = part.partition('>')
+                    if sep:
+                        yield tag.strip().upper(), value.strip()
+
+            tag, sep, value = buffer.partition('>')
+            if sep:
+                yield tag.strip().upper(), value.strip()
+
+    @staticmethod
+    def _parse_date(value: str):
+        """Parse an OFX date (YYYYMMDD followed by optional time and timezone)."""
+        return datetime.strptime(value[:8], '%Y%m%d').date()
+
+    def iter_records(self, file_path: str) -> Iterator[dict]:
+        """Yield the transactions (STMTTRN blocks) of an OFX file."""
+        transaction = None
+        for tag, value in self._iter_tags(file_path):
+            if tag == 'STMTTRN':
+                transaction = {}
+            elif tag == '/STMTTRN' and transaction is not None:
+                description = transaction.get('MEMO') or transaction.get('NAME') or ''
+                amount = transaction['TRNAMT']
+                yield {
+                    'date': self._parse_date(transaction['DTPOSTED']),
+                    'description': description,
+                    'amount': self.parse_amount(amount, ',' if ',' in amount and '.' not in amount else '.'),
+                }
+                transaction = None
+            elif transaction is not None and value and not tag.startswith('/'):
+                transaction[tag] = value
@@ -0,0 +1,120 @@
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+from typing import Iterator
+from .base import StatementImporter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SplitwiseImporter(StatementImporter):
+    """
+    Importer for Splitwise exports, either the JSON returned by the
+    get_expenses API or the CSV exported from a group.
+
+    The amount is the share owed by the user identified by SPLITWISE_USER_ID
+    (JSON) or named SPLITWISE_USER_NAME (CSV), and expenses the user owes
+    nothing of (not taking part in them or paying them entirely for others)
+    are skipped. Without a user, the full cost of each expense is
+    used. Expenses are negative, as in bank statements, and payments settling
+    debts between members are not expenses and are skipped.
+    """
+
+    def __init__(self, user_id: str = None, user_name: str = None):
+        self.user_id = user_id
+        self.user_name = user_name
+
+    def _iter_json(self, file_path: str) -> Iterator[dict]:
+        """Yield the expenses of a JSON export."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        expenses = data['expenses'] if isinstance(data, dict) else data
+        user_id = self.user_id or os.getenv('SPLITWISE_USER_ID')
+        for expense in expenses:
+            if expense.get('deleted_at') or expense.get('payment'):
+                continue
+
+            amount = float(expense['cost'])
+            if user_id:
+                shares = [user for user in expense.get('users', [])
+                          if str(user.get('user_id')) == str(user_id)]
+                amount = float(shares[0]['owed_share']) if shares else 0.0
+
+                # Not taking part in the expense, or paying it entirely for others
+                if abs(amount) < 0.005:
+                    continue
+
+            yield {
+                'date': datetime.fromisoformat(expense['date'].replace('Z', '+00:00')).date(),
+                'description': expense.get('description') or '',
+                'amount': -amount,
+            }
+
+    def _iter_csv(self, file_path: str) -> Iterator[dict]:
+        """
+        Yield the expenses of a group CSV export.
+
+        The export has the cost of each expense and one column per member
+        with their balance in it (paid share minus owed share). Group
+        expenses have a single payer, the member with a positive balance,
+        so the user's owed share is the cost minus their balance when they
+        paid and the opposite of their balance otherwise. An expense with no
+        balance at all was paid by its only participant, whom the export
+        does not name, so it is skipped with a warning.
+        """
+        user_name = self.user_name or os.getenv('SPLITWISE_USER_NAME')
+
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = [column.strip() for column in next(reader, [])]
+            if any(column not in header for column in ('Date', 'Description', 'Cost', 'Currency')):
+                raise ValueError(f"Not a Splitwise group export: {file_path}")
+            if user_name and user_name not in header:
+                raise ValueError(f"No Splitwise column for user {user_name} in {file_path}")
+
+            columns = {column: i for i, column in enumerate(header)}
+            members = range(columns['Currency'] + 1, len(header))
+
+            for row in reader:
+                # Skip blank rows, the total balance row (without cost) and payments
+                if len(row) < len(header) or not row[columns['Date']].strip() or not row[columns['Cost']].strip():
+                    continue
+                if 'Category' in columns and row[columns['Category']].strip() == 'Payment':
+                    continue
+
+                amount = self.parse_amount(row[columns['Cost']])
+                if user_name:
+                    balances = {i: self.parse_amount(row[i].strip() or '0') for i in members}
+                    if sum(value > 0 for value in balances.values()) > 1:
+                        logger.warning(f"Skipping {row[columns['Description']].strip()}: the share of the user "
+                                       f"cannot be derived for an expense with several payers")
+                        continue
+
+                    if not any(balances.values()):
+                        logger.warning(f"Skipping {row[columns['Description']].strip()}: the group export does not "
+                                       f"tell which member an expense without balances belongs to")
+                        continue
+
+                    balance = balances[columns[user_name]]
+                    amount = amount - balance if balance > 0 else -balance
+
+                    # Not taking part in the expense, or paying it entirely for others
+                    if abs(amount) < 0.005:
+                        continue
+
+                yield {
+                    'date': datetime.strptime(row[columns['Date']].strip(), '%Y-%m-%d').date(),
+                    'description': row[columns['Description']].strip(),
+                    'amount': -amount,
+                }
+
+    def iter_records(self, file_path: str) -> Iterator[dict]:
+        """Yield the expenses of a Splitwise export."""
+        if file_path.lower().endswith('.json'):
+            yield from self._iter_json(file_path)
+        else:
+            yield from self._iter_csv(file_path)
@@ -0,0 +1,109 @@
+import os
+import json
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RunJournal:
+    """
+    Append-only journal of the work done in an extraction run.
+
+    Every OCRed region, every page layout and every finished file is
+    appended as one JSON line with a single write followed by fsync, so a
+    crash can at most leave a torn last line, which is dropped on load.
+    Files are identified by path, size and modification time, so a file
+    changed since it was journaled is processed again.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.regions = {}   # (file key, region label) -> text
+        self.pages = {}     # (file key, page number) -> region labels
+        self.files = {}     # file key -> text
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _load(self):
+        """Load the entries of a previous run, dropping a torn last line."""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        complete = data[:data.rfind(b'\n') + 1]
+        if len(complete) < len(data):
+            logger.warning("Dropping incomplete last entry of the run journal")
+            os.truncate(self.path, len(complete))
+
+        for line in complete.decode('utf-8').splitlines():
+            entry = json.loads(line)
+            if entry['type'] == 'region':
+                self.regions[(entry['file'], entry['region'])] = entry['text']
+            elif entry['type'] == 'page':
+                self.pages[(entry['file'], entry['page'])] = entry['regions']
+            elif entry['type'] == 'file':
+                self.files[entry['file']] = entry['text']
+
+        logger.info(f"Resuming from journal with {len(self.files)} files and {len(self.regions)} regions done")
+
+    def _append(self, entry: dict):
+        """Durably append an entry to the journal."""
+        os.write(self.fd, (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+        os.fsync(self.fd)
+
+    @staticmethod
+    def file_key(file_path: str) -> str:
+        """Identify a file by path, size and modification time."""
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def get_file(self, file_path: str):
+        """Return the text extracted from a finished file, or None."""
+        return self.files.get(self.file_key(file_path))
+
+    def record_file(self, file_path: str, text: str):
+        """Mark a file as finished."""
+        key = self.file_key(file_path)
+        self.files[key] = text
+        self._append({'type': 'file', 'file': key, 'text': text})
+
+    def for_file(self, file_path: str) -> 'FileCheckpoint':
+        """Return the checkpoint of the regions and pages of a file."""
+        return FileCheckpoint(self, self.file_key(file_path))
+
+    def close(self):
+        os.close(self.fd)
+
+class FileCheckpoint:
+    """Region and page progress of a single file within a run journal."""
+
+    def __init__(self, journal: RunJournal, key: str):
+        self.journal = journal
+        self.key = key
+
+    def get_region(self, label: str):
+        """Return the text of an OCRed region, or None."""
+        return self.journal.regions.get((self.key, label))
+
+    def record_region(self, label: str, text: str):
+        """Store the text of an OCRed region."""
+        self.journal.regions[(self.key, label)] = text
+        self.journal._append({'type': 'region', 'file': self.key, 'region': label, 'text': text})
+
+    def record_page(self, page: int, labels: list):
+        """Store the regions detected on a page."""
+        self.journal.pages[(self.key, page)] = labels
+        self.journal._append({'type': 'page', 'file': self.key, 'page': page, 'regions': labels})
+
+    def page_labels(self, page: int):
+        """Return the regions of a page whose regions were all OCRed, or None."""
+        labels = self.journal.pages.get((self.key, page))
+        if labels is None or any(self.get_region(label) is None for label in labels):
+            return None
+        return labels
@@ -6,6 +6,7 @@ from .picpay import PicPayParser
 from .creditas import CreditasParser
 from .splitwise import SplitwiseParser
 from .chrome_river import ChromeRiverParser
+from .fuzzy import TrigramIndex
 
 __all__ = [
     'TransactionParser',
@@ -15,5 +16,6 @@ __all__ = [
     'NubankParser',
     'PicPayParser',
     'CreditasParser',
-    'ChromeRiverParser'
+    'ChromeRiverParser',
+    'TrigramIndex'
 ] 
\ No newline at end of file
@@ -1,38 +1,124 @@
+import os
 from abc import ABC, abstractmethod
+from typing import Iterable
 import pandas as pd
 import yaml
+from .fuzzy import TrigramIndex
+from .rules import RuleStore, get_rule_store
 
 class TransactionParser(ABC):
     """Abstract base class for bank-specific transaction parsers."""
+
+    # Key of the bank in the rules file
+    bank = None
+
+    # Importers for structured exports of the bank, keyed by file extension
+    importers = {}
     
-    def __init__(self):
+    def __init__(self, rules: RuleStore = None):
         """Initialize the parser with categories and classification rules."""
         # Load categories from YAML
         with open('transaction_extractor/categories.yaml', 'r') as f:
             self.categories = yaml.safe_load(f)['categories']
         
-        # Define classification rules (description patterns -> [category, subcategory])
-        self.classification_rules = {}
+        # Classification rules of rules.yaml, shared by the parsers of the process and reloaded when changed
+        self.rules = rules or get_rule_store()
+
+        # Optional fuzzy fallback for descriptions not matched by any rule
+        self.fuzzy_index = None
+        self.fuzzy_threshold = 0.6
+        self.fuzzy_matches = []
+
+    def use_fuzzy_index(self, index: TrigramIndex, threshold: float = 0.6):
+        """
+        Classify descriptions missed by the rules using the nearest entry of
+        a trigram index, when its similarity reaches the threshold.
+        """
+        self.fuzzy_index = index
+        self.fuzzy_threshold = threshold
+        self.fuzzy_matches = []
+
+    @property
+    def classification_rules(self) -> dict:
+        """Description rules of the bank (description patterns -> [category, subcategory])."""
+        return self.rules.current().classification_rules(self.bank)
 
-        # Define conditional rules based on description and amount
-        self.conditional_rules = []
+    @property
+    def conditional_rules(self) -> list:
+        """Rules of the bank based on description and amount."""
+        return self.rules.current().conditional_rules(self.bank)
 
     def _classify_transaction(self, description: str, amount: float) -> tuple:
         """Classify a transaction based on its description and amount."""
-        # First check conditional rules that depend on both description and amount
-        for rule in self.conditional_rules:
-            if (rule['description'] in description and 
-                rule['amount_range'][0] <= abs(amount) <= rule['amount_range'][1]):
-                return rule['category'], rule['subcategory']
-
-        # Then check exact description matches
-        for pattern, classification in self.classification_rules.items():
-            if pattern in description:
-                return classification[0], classification[1]
+        # Check conditional rules first, then description matches
+        classification = self.rules.current().classify(self.bank, description, amount)
+        if classification is not None:
+            return classification
         
+        # Fall back to the nearest previously classified description
+        if self.fuzzy_index is not None:
+            match = self.fuzzy_index.best_match(description, self.fuzzy_threshold)
+            if match:
+                self.fuzzy_matches.append({'description': description, **match})
+                return match['category'], match['subcategory']
+
         # If no match found, return as unidentified
         return 'Não Identificado', None
 
+    def fuzzy_report(self) -> pd.DataFrame:
+        """Return the transactions classified by fuzzy matching, for review."""
+        return pd.DataFrame(
+            self.fuzzy_matches,
+            columns=['description', 'match', 'category', 'subcategory', 'score']
+        )
+
+    def supports_file(self, file_path: str) -> bool:
+        """Check if the file is a structured export that can be imported without OCR."""
+        return os.path.splitext(file_path)[1].lower() in self.importers
+
+    def import_file(self, file_path: str) -> pd.DataFrame:
+        """Import a structured export (OFX, CSV, JSON) into the standard format."""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        importer = self.importers.get(file_ext)
+        if not importer:
+            raise ValueError(f"Unsupported file format for {self.__class__.__name__}: {file_ext}")
+
+        return self.parse_records(importer.iter_records(file_path))
+
+    def parse_records(self, records: Iterable[dict]) -> pd.DataFrame:
+        """
+        Classify structured transaction records and build the standard DataFrame.
+
+        Args:
+            records: Iterable of dicts with 'date', 'description' and 'amount' keys
+
+        Returns:
+            pd.DataFrame in the prettified format
+        """
+        transactions = []
+        for record in records:
+            description = record['description'].strip()
+            category, subcategory = self._classify_transaction(description, record['amount'])
+            transactions.append({
+                'date': record['date'],
+                'description': description,
+                'amount': record['amount'],
+                'category': category,
+                'subcategory': subcategory
+            })
+
+        df = pd.DataFrame(transactions, columns=['date', 'description', 'amount', 'category', 'subcategory'])
+        df['date'] = pd.to_datetime(df['date'])
+        df['amount'] = df['amount'].astype(float)
+
+        if not self.check_consistency(df):
+            raise ValueError("Inconsistent data in imported transactions")
+
+        if not self._check_categories(df):
+            raise ValueError("Invalid categories found in transactions")
+
+        return self.prettify(df)
+
     def _check_categories(self, df: pd.DataFrame) -> bool:
         """
         Check if all categories in the DataFrame match those defined in categories.yaml.
@@ -84,11 +170,12 @@ class TransactionParser(ABC):
         """Parse the extracted text into a structured DataFrame of transactions."""
         pass
 
-    @abstractmethod
     def clean_text(self, text: str) -> str:
         """
         Clean and standardize the input text before parsing.
-        Each parser should implement its own text cleaning logic.
+        Parsers of OCR output implement their own text cleaning logic; by
+        default the text is returned unchanged, which suits parsers that
+        only import structured exports.
 
         Args:
             text: Raw text extracted from statement
@@ -96,7 +183,7 @@ class TransactionParser(ABC):
         Returns:
             Cleaned text ready for parsing
         """
-        pass
+        return text
 
     def prettify(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -1,20 +1,18 @@
 import re
 import pandas as pd
 from .base import TransactionParser
+from .rules import RuleStore
 
 class ChromeRiverParser(TransactionParser):
-    def __init__(self):
+    bank = 'chrome_river'
+
+    def __init__(self, rules: RuleStore = None):
         """Initialize ChromeRiver parser with valid descriptions."""
-        super().__init__()
+        super().__init__(rules)
 
         self.valid_descriptions = ['Hotel', 'Meals/Drinks']
         self.total_amount = None
 
-        self.classification_rules = {
-            'Hotel': ['Viagens', 'BCG'],
-            'Meals/Drinks': ['Alimentação', 'Restaurante'],
-        }
-
     def clean_text(self, text: str) -> str:
         """Clean up text to improve parsing."""
         # Remove content after total amount
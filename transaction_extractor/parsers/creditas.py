@@ -1,8 +1,15 @@
 import re
 import pandas as pd
 from .base import TransactionParser
+from ..importers import OFXImporter
 
 class CreditasParser(TransactionParser):
+    bank = 'creditas'
+
+    importers = {
+        '.ofx': OFXImporter(),
+    }
+
     def parse(self, text: str) -> pd.DataFrame:
         """
         TODO: Implement parsing for Creditas statements.
@@ -18,11 +25,3 @@ class CreditasParser(TransactionParser):
         """
         # TODO: Add proper consistency validation
         return True
-
-    def prettify(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        TODO: Implement prettify for Creditas statements.
-        Placeholder returning input DataFrame for now.
-        """
-        # TODO: Add proper formatting logic for Creditas statements
-        return df 
\ No newline at end of file
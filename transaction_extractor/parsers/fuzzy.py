@@ -0,0 +1,121 @@
+import re
+import math
+import unicodedata
+import pandas as pd
+from collections import Counter, defaultdict
+
+def normalize(text: str) -> str:
+    """
+    Normalize a description for fuzzy matching: uppercase, no accents,
+    no digits or punctuation and single spaces.
+    """
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r'[^A-Z ]+', ' ', text.upper())
+    return re.sub(r'\s+', ' ', text).strip()
+
+def trigrams(text: str) -> frozenset:
+    """Return the set of character trigrams of a normalized text."""
+    padded = f'  {text} '
+    return frozenset(padded[i:i+3] for i in range(len(padded) - 2))
+
+class TrigramIndex:
+    """
+    Inverted index of character trigrams over classified descriptions.
+
+    Descriptions are deduplicated after normalization, each keeping the
+    category most often assigned to it, so the index grows with the number
+    of distinct merchants rather than the number of transactions. Lookups
+    only scan the posting lists of the rarest trigrams of the query (prefix
+    filtering on the Dice similarity threshold) and never the whole history.
+    """
+
+    def __init__(self):
+        self.keys = {}                   # normalized description -> entry id
+        self.texts = []                  # entry id -> normalized description
+        self.grams = []                  # entry id -> trigram set
+        self.votes = []                  # entry id -> Counter of (category, subcategory)
+        self.postings = defaultdict(list)  # trigram -> entry ids
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, description: str, category: str, subcategory: str = None):
+        """Add a classified description to the index, skipping unclassified ones (no or NaN category)."""
+        if pd.isna(category) or category in ('', 'Não Identificado') or pd.isna(description):
+            return
+
+        key = normalize(description)
+        if not key:
+            return
+
+        if pd.isna(subcategory) or subcategory == '':
+            subcategory = None
+
+        entry = self.keys.get(key)
+        if entry is None:
+            entry = len(self.texts)
+            self.keys[key] = entry
+            self.texts.append(key)
+            self.grams.append(trigrams(key))
+            self.votes.append(Counter())
+            for gram in self.grams[entry]:
+                self.postings[gram].append(entry)
+
+        self.votes[entry][(category, subcategory)] += 1
+
+    def add_rules(self, classification_rules: dict):
+        """Add the patterns of a parser's classification rules to the index."""
+        for pattern, classification in classification_rules.items():
+            self.add(pattern, classification[0], classification[1])
+
+    @classmethod
+    def from_history(cls, history: list) -> 'TrigramIndex':
+        """
+        Build an index from previously classified transactions.
+
+        Args:
+            history: DataFrames with 'description', 'category' and 'subcategory' columns
+        """
+        index = cls()
+        for df in history:
+            for description, category, subcategory in zip(df['description'], df['category'], df['subcategory']):
+                index.add(description, category, subcategory)
+        return index
+
+    def best_match(self, description: str, threshold: float = 0.6):
+        """
+        Find the indexed description most similar to the given one.
+
+        Returns a dict with the matched description, its category, subcategory
+        and Dice similarity score, or None if nothing reaches the threshold.
+        """
+        query = trigrams(normalize(description))
+        if not query or not self.texts:
+            return None
+
+        # A candidate must share at least this many trigrams to reach the threshold
+        min_overlap = max(1, math.ceil(threshold * len(query) / (2 - threshold)))
+
+        # Any such candidate contains one of the (n - min_overlap + 1) rarest query trigrams
+        rarest = sorted(query, key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(query) - min_overlap + 1]:
+            candidates.update(self.postings.get(gram, ()))
+
+        best, best_score = None, threshold
+        for entry in candidates:
+            grams = self.grams[entry]
+            score = 2 * len(query & grams) / (len(query) + len(grams))
+            if score >= best_score and (best is None or score > best_score or entry < best):
+                best, best_score = entry, score
+
+        if best is None:
+            return None
+
+        (category, subcategory), _ = self.votes[best].most_common(1)[0]
+        return {
+            'match': self.texts[best],
+            'category': category,
+            'subcategory': subcategory,
+            'score': round(best_score, 4),
+        }
@@ -1,8 +1,25 @@
 import re
 import pandas as pd
 from .base import TransactionParser
+from ..importers import OFXImporter, CSVImporter
 
 class InterParser(TransactionParser):
+    bank = 'inter'
+
+    importers = {
+        '.ofx': OFXImporter(),
+        '.csv': CSVImporter(layouts=[
+            {
+                'date': 'Data Lançamento',
+                'date_format': '%d/%m/%Y',
+                'description': ['Histórico', 'Descrição'],
+                'amount': 'Valor',
+                'delimiter': ';',
+                'decimal': ',',
+            },
+        ]),
+    }
+
     def parse(self, text: str) -> pd.DataFrame:
         """
         TODO: Implement parsing for Inter statements.
@@ -18,11 +35,3 @@ class InterParser(TransactionParser):
         """
         # TODO: Add proper consistency validation
         return True
-
-    def prettify(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        TODO: Implement prettify for Inter statements.
-        Placeholder returning input DataFrame for now.
-        """
-        # TODO: Add proper formatting logic for Inter statements
-        return df 
\ No newline at end of file
@@ -3,32 +3,7 @@ import pandas as pd
 from .base import TransactionParser
 
 class ItauParser(TransactionParser):
-    def __init__(self):
-        """Initialize the parser with classification rules."""
-        super().__init__()
-        
-        # Define classification rules (description patterns -> [category, subcategory])
-        self.classification_rules = {
-            'PIX TRANSF FELIPE': ['Cuidados Pessoais', 'Academia'],
-            'REMUNERACAO/SALARIO': ['Receitas', 'Salário'],
-            'PIX TRANSF Mateus': ['Transferência entre Contas', ''],
-        }
-
-        # Define conditional rules based on description and amount
-        self.conditional_rules = [
-            {
-                'description': 'MOBILEPAG TIT BANCO',
-                'amount_range': (3800, 3900),
-                'category': 'Despesas Essenciais',
-                'subcategory': 'Aluguel/IPTU'
-            },
-            {
-                'description': 'MOBILEPAG TIT BANCO',
-                'amount_range': (780, 800),
-                'category': 'Despesas Essenciais',
-                'subcategory': 'Condomínio'
-            }
-        ]
+    bank = 'itau'
 
     def clean_text(self, text: str) -> str:
         """Clean the text by removing unwanted content."""
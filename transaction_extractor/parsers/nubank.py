@@ -1,8 +1,33 @@
 import re
 import pandas as pd
 from .base import TransactionParser
+from ..importers import OFXImporter, CSVImporter
 
 class NubankParser(TransactionParser):
+    bank = 'nubank'
+
+    # Nubank exports OFX for both products and a CSV layout for each of them
+    importers = {
+        '.ofx': OFXImporter(),
+        '.csv': CSVImporter(layouts=[
+            # Checking account
+            {
+                'date': 'Data',
+                'date_format': '%d/%m/%Y',
+                'description': ['Descrição'],
+                'amount': 'Valor',
+            },
+            # Credit card, where purchases are positive
+            {
+                'date': 'date',
+                'date_format': '%Y-%m-%d',
+                'description': ['title'],
+                'amount': 'amount',
+                'negate': True,
+            },
+        ]),
+    }
+
     def parse(self, text: str) -> pd.DataFrame:
         """
         TODO: Implement parsing for Nubank statements.
@@ -18,11 +43,3 @@ class NubankParser(TransactionParser):
         """
         # TODO: Add proper consistency validation
         return True
-
-    def prettify(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        TODO: Implement prettify for Nubank statements.
-        Placeholder returning input DataFrame for now.
-        """
-        # TODO: Add proper formatting logic for Nubank statements
-        return df 
\ No newline at end of file
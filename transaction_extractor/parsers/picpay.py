@@ -1,8 +1,15 @@
 import re
 import pandas as pd
 from .base import TransactionParser
+from ..importers import OFXImporter
 
 class PicPayParser(TransactionParser):
+    bank = 'picpay'
+
+    importers = {
+        '.ofx': OFXImporter(),
+    }
+
     def parse(self, text: str) -> pd.DataFrame:
         """
         TODO: Implement parsing for PicPay statements.
@@ -18,11 +25,3 @@ class PicPayParser(TransactionParser):
         """
         # TODO: Add proper consistency validation
         return True
-
-    def prettify(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        TODO: Implement prettify for PicPay statements.
-        Placeholder returning input DataFrame for now.
-        """
-        # TODO: Add proper formatting logic for PicPay statements
-        return df 
\ No newline at end of file
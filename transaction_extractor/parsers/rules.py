@@ -0,0 +1,317 @@
+import os
+import re
+import json
+import mmap
+import time
+import uuid
+import struct
+import hashlib
+import logging
+import threading
+import yaml
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Packaged rules file, next to categories.yaml
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'rules.yaml')
+
+# Folder of the compiled rule artifacts, named after the hash of their source
+DEFAULT_CACHE_DIR = 'data/rules_cache'
+
+# Version of the rules file format
+RULES_FORMAT = 1
+
+# Header of the compiled artifacts; bump the last byte when their layout changes
+ARTIFACT_MAGIC = b'TXRULES\x01'
+
+# One row per rule: string ids of the pattern, category and subcategory
+# (-1 for none) and the amount range (NaN for rules without one)
+RULE_DTYPE = np.dtype([
+    ('pattern', '<i4'),
+    ('category', '<i4'),
+    ('subcategory', '<i4'),
+    ('low', '<f8'),
+    ('high', '<f8'),
+])
+
+def _align(size: int) -> int:
+    """Round a size up to a multiple of 8 bytes."""
+    return (size + 7) & ~7
+
+def compile_rules(source: bytes) -> bytes:
+    """
+    Validate a rules file and compile it into an artifact.
+
+    The artifact starts with ARTIFACT_MAGIC and a JSON header locating the
+    rules of each bank, followed by the rule table, the string offsets and
+    the UTF-8 strings, so it can be memory-mapped and used without parsing
+    YAML again.
+    """
+    data = yaml.safe_load(source) or {}
+    if not isinstance(data, dict):
+        raise ValueError("The rules file must be a mapping")
+    if data.get('version') != RULES_FORMAT:
+        raise ValueError(f"Unsupported rules file version: {data.get('version')}")
+
+    strings = []
+    ids = {}
+
+    def intern(value):
+        if value is None:
+            return -1
+        value = str(value)
+        if value not in ids:
+            ids[value] = len(strings)
+            strings.append(value)
+        return ids[value]
+
+    rows = []
+    banks = {}
+    if not isinstance(data.get('banks') or {}, dict):
+        raise ValueError("banks must map each bank to its rules")
+    for bank, rules in (data.get('banks') or {}).items():
+        rules = rules or {}
+        if not isinstance(rules, dict) or not isinstance(rules.get('rules') or {}, dict) \
+                or not isinstance(rules.get('conditional') or [], list):
+            raise ValueError(f"Invalid rules for {bank}: rules must be a mapping and conditional a list")
+
+        # Conditional rules come first as they are checked first
+        start = len(rows)
+        for rule in rules.get('conditional') or []:
+            try:
+                low, high = (float(value) for value in rule['amount_range'])
+                rows.append((intern(rule['description']), intern(rule['category']),
+                             intern(rule.get('subcategory')), low, high))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid conditional rule for {bank}: {rule}") from e
+        conditional = [start, len(rows) - start]
+
+        start = len(rows)
+        for pattern, classification in (rules.get('rules') or {}).items():
+            if not isinstance(classification, list) or not 1 <= len(classification) <= 2:
+                raise ValueError(f"Invalid rule for {bank}: {pattern} -> {classification}")
+            subcategory = classification[1] if len(classification) > 1 else None
+            rows.append((intern(pattern), intern(classification[0]), intern(subcategory), np.nan, np.nan))
+        banks[bank] = conditional + [start, len(rows) - start]
+
+    table = np.array(rows, dtype=RULE_DTYPE)
+    encoded = [value.encode('utf-8') for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+
+    header = json.dumps({
+        'banks': banks,
+        'rules': len(rows),
+        'strings': len(strings),
+    }).encode('utf-8')
+
+    prefix = ARTIFACT_MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b'\0' * (_align(len(prefix)) - len(prefix))
+    return prefix + table.tobytes() + offsets.tobytes() + b''.join(encoded)
+
+def _matcher(patterns: list):
+    """
+    Compile description patterns into a single regex reporting, at every
+    position of a description, the first pattern (in rule order) found there.
+    """
+    if not patterns:
+        return None
+    return re.compile('(?=' + '|'.join(f'({re.escape(pattern)})' for pattern in patterns) + ')')
+
+class RuleSet:
+    """
+    Classification rules read from a compiled artifact.
+
+    The artifact is usually memory-mapped, so processes loading the same
+    version share its pages, and the rule table (amount ranges and string
+    ids) is read from the mapping without copying it. The strings and the
+    matcher compiled from the patterns of each bank are built once per
+    process.
+    """
+
+    def __init__(self, buffer, source_hash: str = None):
+        self.source_hash = source_hash
+        if bytes(buffer[:len(ARTIFACT_MAGIC)]) != ARTIFACT_MAGIC:
+            raise ValueError("Not a compiled rules artifact")
+
+        offset = len(ARTIFACT_MAGIC)
+        (header_size,) = struct.unpack_from('<I', buffer, offset)
+        offset += 4
+        header = json.loads(bytes(buffer[offset:offset + header_size]))
+        offset = _align(offset + header_size)
+
+        # Views of the artifact, which must stay open as long as they are used
+        self._buffer = buffer
+        self.table = np.frombuffer(buffer, dtype=RULE_DTYPE, count=header['rules'], offset=offset)
+        offset += self.table.nbytes
+        offsets = np.frombuffer(buffer, dtype='<i8', count=header['strings'] + 1, offset=offset)
+        offset += offsets.nbytes
+        blob = bytes(buffer[offset:offset + int(offsets[-1])])
+        self.strings = [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+        self.banks = {}
+        for bank, (conditional_start, conditional_count, rules_start, rules_count) in header['banks'].items():
+            conditional = self.table[conditional_start:conditional_start + conditional_count]
+            rules = self.table[rules_start:rules_start + rules_count]
+            self.banks[bank] = {
+                'conditional': conditional,
+                'conditional_patterns': [self.strings[i] for i in conditional['pattern']],
+                'conditional_matcher': _matcher(sorted(set(self.strings[i] for i in conditional['pattern']))),
+                'rules': rules,
+                'matcher': _matcher([self.strings[i] for i in rules['pattern']]),
+            }
+
+    @classmethod
+    def load(cls, path: str, source_hash: str = None) -> 'RuleSet':
+        """Memory-map a compiled artifact."""
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapping, source_hash)
+
+    def _text(self, index: int) -> str:
+        return self.strings[index] if index >= 0 else None
+
+    def _classification(self, row) -> tuple:
+        return self._text(int(row['category'])), self._text(int(row['subcategory']))
+
+    def classify(self, bank: str, description: str, amount: float):
+        """Return the (category, subcategory) of the first rule matching a transaction, or None."""
+        rules = self.banks.get(bank)
+        if rules is None:
+            return None
+
+        # First check conditional rules that depend on both description and amount,
+        # looking at the amount only when one of their patterns is in the description
+        if rules['conditional_matcher'] is not None and rules['conditional_matcher'].search(description):
+            amount = abs(amount)
+            conditional = rules['conditional']
+            in_range = np.flatnonzero((conditional['low'] <= amount) & (amount <= conditional['high']))
+            for i in in_range:
+                if rules['conditional_patterns'][i] in description:
+                    return self._classification(conditional[i])
+
+        # Then check description matches: the lowest rule matching at any position wins
+        if rules['matcher'] is not None:
+            first = None
+            for match in rules['matcher'].finditer(description):
+                index = match.lastindex - 1
+                if first is None or index < first:
+                    first = index
+                    if first == 0:
+                        break
+            if first is not None:
+                return self._classification(rules['rules'][first])
+
+        return None
+
+    def classification_rules(self, bank: str) -> dict:
+        """Return the description rules of a bank as pattern -> [category, subcategory]."""
+        rules = self.banks.get(bank, {}).get('rules', ())
+        return {self._text(int(row['pattern'])): list(self._classification(row)) for row in rules}
+
+    def conditional_rules(self, bank: str) -> list:
+        """Return the conditional rules of a bank."""
+        return [
+            {
+                'description': self._text(int(row['pattern'])),
+                'amount_range': (float(row['low']), float(row['high'])),
+                'category': self._text(int(row['category'])),
+                'subcategory': self._text(int(row['subcategory'])),
+            }
+            for row in self.banks.get(bank, {}).get('conditional', ())
+        ]
+
+class RuleStore:
+    """
+    Rules file compiled on demand and reloaded when it changes.
+
+    The source is compiled once per content hash into
+    {cache_dir}/{hash}.rules, written atomically, and every process using
+    that version then only maps the artifact. The source is
+    checked for changes at most every `check_interval` seconds; a new
+    version replaces the current one in a single assignment, and a version
+    that fails to compile is reported and the previous one kept.
+    """
+
+    def __init__(self, path: str = None, cache_dir: str = DEFAULT_CACHE_DIR, check_interval: float = 1.0):
+        self.path = path or DEFAULT_RULES_PATH
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self._ruleset = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _compile(self, source: bytes, source_hash: str) -> RuleSet:
+        """Load the artifact of a source version, compiling it if it is not cached yet."""
+        path = os.path.join(self.cache_dir, f'{source_hash}.rules')
+        if os.path.exists(path):
+            return RuleSet.load(path, source_hash)
+
+        artifact = compile_rules(source)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(artifact)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache compiled rules in {self.cache_dir}: {str(e)}")
+            return RuleSet(artifact, source_hash)
+
+        logger.info(f"Compiled classification rules {source_hash[:12]} from {self.path}")
+        return RuleSet.load(path, source_hash)
+
+    def reload(self) -> bool:
+        """
+        Load the rules file if it changed. Returns whether a new version was loaded.
+
+        A file that cannot be read or compiled (being replaced, deleted,
+        invalid YAML or rules) is reported and the previous rules are kept;
+        the error is only raised when no rules were loaded yet.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+                if stamp == self._stamp:
+                    return False
+
+                with open(self.path, 'rb') as f:
+                    source = f.read()
+                source_hash = hashlib.sha256(ARTIFACT_MAGIC + source).hexdigest()[:32]
+                self._stamp = stamp
+                if self._ruleset is not None and self._ruleset.source_hash == source_hash:
+                    return False
+
+                ruleset = self._compile(source, source_hash)
+            except (OSError, yaml.YAMLError, ValueError) as e:
+                if self._ruleset is None:
+                    raise
+                logger.error(f"Keeping the previous classification rules, {self.path} could not be loaded: {str(e)}")
+                return False
+
+            if self._ruleset is not None:
+                logger.info(f"Reloaded classification rules from {self.path}")
+            self._ruleset = ruleset
+            return True
+
+    def current(self) -> RuleSet:
+        """Return the current rules, reloading them first if the file changed."""
+        if self._ruleset is None or time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload()
+        return self._ruleset
+
+# Rule stores shared by all the parsers of this process, by rules file
+_stores = {}
+
+def get_rule_store(path: str = None) -> RuleStore:
+    """Return the rule store of this process for a rules file (the packaged one by default)."""
+    path = os.path.abspath(path or DEFAULT_RULES_PATH)
+    if path not in _stores:
+        _stores[path] = RuleStore(path)
+    return _stores[path]
@@ -1,8 +1,16 @@
 import re
 import pandas as pd
 from .base import TransactionParser
+from ..importers import SplitwiseImporter
 
 class SplitwiseParser(TransactionParser):
+    bank = 'splitwise'
+
+    importers = {
+        '.json': SplitwiseImporter(),
+        '.csv': SplitwiseImporter(),
+    }
+
     def parse(self, text: str) -> pd.DataFrame:
         """
         TODO: Implement parsing for Splitwise statements.
@@ -18,11 +26,3 @@ class SplitwiseParser(TransactionParser):
         """
         # TODO: Add proper consistency validation
         return True
-
-    def prettify(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        TODO: Implement prettify for Splitwise statements.
-        Placeholder returning input DataFrame for now.
-        """
-        # TODO: Add proper formatting logic for Splitwise statements
-        return df 
\ No newline at end of file
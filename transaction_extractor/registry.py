@@ -0,0 +1,48 @@
+from .extractors import (
+    ItauExtractor,
+    ChromeRiverExtractor
+)
+from .parsers import (
+    ItauParser,
+    InterParser,
+    NubankParser,
+    PicPayParser,
+    CreditasParser,
+    SplitwiseParser,
+    ChromeRiverParser
+)
+
+# Banks accepted on the command line
+BANKS = ['itau', 'inter', 'nubank', 'picpay', 'splitwise', 'creditas', 'chrome_river']
+
+# Extractor for each bank
+EXTRACTORS = {
+    'itau': ItauExtractor,
+    'chrome_river': ChromeRiverExtractor,
+    # Add other extractors as they are implemented
+}
+
+# Parser for each bank
+PARSERS = {
+    'itau': ItauParser,
+    'inter': InterParser,
+    'nubank': NubankParser,
+    'picpay': PicPayParser,
+    'creditas': CreditasParser,
+    'splitwise': SplitwiseParser,
+    'chrome_river': ChromeRiverParser,
+}
+
+def get_extractor_class(bank: str):
+    """Return the extractor class registered for a bank."""
+    extractor_class = EXTRACTORS.get(bank.lower())
+    if not extractor_class:
+        raise ValueError(f"No extractor implemented for bank: {bank}")
+    return extractor_class
+
+def get_parser_class(bank: str):
+    """Return the parser class registered for a bank."""
+    parser_class = PARSERS.get(bank.lower())
+    if not parser_class:
+        raise ValueError(f"No parser implemented for bank: {bank}")
+    return parser_class
@@ -0,0 +1,395 @@
+import os
+import json
+import glob
+import time
+import uuid
+import socket
+import logging
+import argparse
+import threading
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Version of the manifest format
+MANIFEST_FORMAT = 1
+
+# Seconds after which a shard lock that stopped being refreshed is considered abandoned
+STALE_AFTER = 600
+
+def _write_atomic(path: str, write):
+    """Write a file through a temporary file renamed over it, so readers never see a partial file."""
+    directory, name = os.path.split(path)
+    os.makedirs(directory or '.', exist_ok=True)
+    root, ext = os.path.splitext(name)
+    tmp_path = os.path.join(directory, f'.{root}.{uuid.uuid4().hex}.tmp{ext}')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_json(path: str, data: dict):
+    """Atomically write a JSON file."""
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+    _write_atomic(path, write)
+
+def write_excel(df: pd.DataFrame, path: str):
+    """Atomically write a DataFrame to Excel."""
+    _write_atomic(path, lambda tmp_path: df.to_excel(tmp_path, index=False))
+
+def read_token(lock_path: str) -> str:
+    """Return the token of a shard lock, or None if it is missing or being written."""
+    try:
+        with open(lock_path, 'r') as f:
+            return json.load(f).get('token')
+    except (FileNotFoundError, ValueError):
+        return None
+
+class ShardLease:
+    """
+    A shard claimed by a worker.
+
+    The lock file is touched periodically from a background thread while
+    the shard is processed, so other workers can tell a slow shard from one
+    whose worker died. `lost` is set when the lock was taken over by
+    another worker, after which it is no longer refreshed.
+    """
+
+    def __init__(self, manifest: 'ShardManifest', shard: dict, lock_path: str, token: str):
+        self.manifest = manifest
+        self.shard = shard
+        self.lock_path = lock_path
+        self.token = token
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._refresh, daemon=True)
+        self._heartbeat.start()
+
+    @property
+    def id(self) -> str:
+        return self.shard['id']
+
+    def owner(self) -> str:
+        """Return the token of the current lock of the shard, or None if it is missing or being written."""
+        return read_token(self.lock_path)
+
+    def held(self) -> bool:
+        """Whether the lock still belongs to this lease, so its results may be written."""
+        if not self.lost and self.owner() not in (self.token, None):
+            self.lost = True
+        return not self.lost
+
+    def _refresh(self):
+        """Touch the lock file until the lease is released or the lock belongs to another worker."""
+        interval = max(1, self.manifest.stale_after / 4)
+        while not self._stop.wait(interval):
+            # Another worker checking whether the lock is stale moves it away
+            # for a moment and puts it back (see ShardManifest._take_over), so a
+            # missing lock is retried on the next beat; the lease is only lost
+            # once the lock was replaced by another worker's
+            owner = self.owner()
+            if owner is None:
+                continue
+            if owner != self.token:
+                logger.warning(f"Lock of {self.id} was taken over by another worker")
+                self.lost = True
+                return
+            try:
+                os.utime(self.lock_path)
+            except FileNotFoundError:
+                pass
+
+    def complete(self, failed: list) -> bool:
+        """
+        Mark the shard as done and release its lock. Returns False without
+        marking it when the lock was taken over, leaving it to its new owner.
+        """
+        if not self.held():
+            logger.warning(f"Leaving {self.id} to the worker that took its lock over")
+            self.release()
+            return False
+
+        write_json(self.manifest.done_path(self.id), {
+            'shard': self.id,
+            'worker': self.token.split('/')[0],
+            'failed': failed,
+            'finished_at': time.time(),
+        })
+        self.release()
+        return True
+
+    def release(self):
+        """Stop refreshing the lock and remove it, leaving the shard to other workers if not done."""
+        self._stop.set()
+        self._heartbeat.join()
+        if self.owner() == self.token:
+            os.remove(self.lock_path)
+
+class ShardManifest:
+    """
+    Work split into shards on a shared directory.
+
+    The coordinator writes {directory}/manifest.json with the files of each
+    shard. Workers claim a shard by creating locks/{shard}.lock exclusively,
+    which succeeds for a single worker, write their outputs under
+    results/{shard}/ and journals/{shard}.jsonl, and mark the shard done with
+    done/{shard}.json. Locks not refreshed for `stale_after` seconds belong
+    to a dead worker and can be taken over; the new owner resumes from the
+    shard journal.
+    """
+
+    def __init__(self, directory: str, stale_after: int = STALE_AFTER):
+        self.directory = directory
+        self.stale_after = stale_after
+
+        path = os.path.join(directory, 'manifest.json')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No shard manifest found in {directory}")
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != MANIFEST_FORMAT:
+            raise ValueError(f"Unsupported shard manifest format in {path}")
+
+        self.bank = manifest.get('bank')
+        self.shards = manifest['shards']
+
+    @classmethod
+    def create(cls, directory: str, files: list, shard_size: int = 20, bank: str = None,
+               force: bool = False) -> 'ShardManifest':
+        """
+        Split files into shards of up to `shard_size` files and write the manifest.
+
+        Files are deduplicated and sorted, so the same inputs always give the
+        same shards and the same merged output.
+        """
+        path = os.path.join(directory, 'manifest.json')
+        if os.path.exists(path) and not force:
+            raise FileExistsError(f"A shard manifest already exists in {directory}")
+
+        for file_path in files:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File not found: {file_path}")
+
+        files = sorted(set(os.path.abspath(file_path) for file_path in files))
+        shards = [
+            {'id': f'shard-{i // shard_size:04d}', 'files': files[i:i+shard_size]}
+            for i in range(0, len(files), shard_size)
+        ]
+
+        write_json(path, {
+            'format': MANIFEST_FORMAT,
+            'bank': bank,
+            'created_at': time.time(),
+            'shards': shards,
+        })
+        logger.info(f"Wrote manifest with {len(shards)} shards of up to {shard_size} files to {directory}")
+        return cls(directory)
+
+    def lock_path(self, shard_id: str) -> str:
+        return os.path.join(self.directory, 'locks', f'{shard_id}.lock')
+
+    def done_path(self, shard_id: str) -> str:
+        return os.path.join(self.directory, 'done', f'{shard_id}.json')
+
+    def journal_path(self, shard_id: str) -> str:
+        return os.path.join(self.directory, 'journals', f'{shard_id}.jsonl')
+
+    def result_path(self, shard_id: str, bank: str, suffix: str = '') -> str:
+        return os.path.join(self.directory, 'results', shard_id, f'{bank}_transactions{suffix}.xlsx')
+
+    def is_done(self, shard_id: str) -> bool:
+        return os.path.exists(self.done_path(shard_id))
+
+    def _take_over(self, lock_path: str) -> bool:
+        """
+        Remove a lock that stopped being refreshed.
+
+        The lock is renamed away first, which only one worker can do. If the
+        lock renamed turns out to be a fresh one (another worker took the
+        shard over in between), it is put back. A lock without a readable
+        token (its worker died before writing it) is judged by its age alone.
+        """
+        stale_token = read_token(lock_path)
+        try:
+            if time.time() - os.stat(lock_path).st_mtime < self.stale_after:
+                return False
+        except FileNotFoundError:
+            return False
+
+        moved_path = f'{lock_path}.{uuid.uuid4().hex}.stale'
+        try:
+            os.rename(lock_path, moved_path)
+        except FileNotFoundError:
+            return False
+
+        token = read_token(moved_path)
+        if token != stale_token or time.time() - os.stat(moved_path).st_mtime < self.stale_after:
+            # Not the lock we found stale (or refreshed since): restore it unless a new one exists
+            try:
+                os.link(moved_path, lock_path)
+            except FileExistsError:
+                pass
+            os.remove(moved_path)
+            return False
+
+        os.remove(moved_path)
+        logger.warning(f"Took over abandoned lock {os.path.basename(lock_path)} ({stale_token})")
+        return True
+
+    def claim(self, worker: str = None):
+        """Claim the next shard that is neither done nor locked, or return None when there is none."""
+        worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        os.makedirs(os.path.join(self.directory, 'locks'), exist_ok=True)
+
+        for shard in self.shards:
+            if self.is_done(shard['id']):
+                continue
+
+            lock_path = self.lock_path(shard['id'])
+            token = f'{worker}/{uuid.uuid4().hex}'
+            for _ in range(2):
+                try:
+                    fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                except FileExistsError:
+                    if self._take_over(lock_path):
+                        continue
+                    break
+
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'token': token, 'claimed_at': time.time()}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                lease = ShardLease(self, shard, lock_path, token)
+
+                # The shard may have been finished between the check and the lock
+                if self.is_done(shard['id']):
+                    lease.release()
+                    break
+
+                logger.info(f"{worker} claimed {shard['id']} ({len(shard['files'])} files)")
+                return lease
+
+        return None
+
+    def status(self) -> dict:
+        """Return the ids of the done, locked and pending shards."""
+        status = {'done': [], 'locked': [], 'pending': []}
+        for shard in self.shards:
+            if self.is_done(shard['id']):
+                status['done'].append(shard['id'])
+            elif os.path.exists(self.lock_path(shard['id'])):
+                status['locked'].append(shard['id'])
+            else:
+                status['pending'].append(shard['id'])
+        return status
+
+    def failed_files(self) -> list:
+        """Return the files that failed in the finished shards."""
+        failed = []
+        for shard in self.shards:
+            if self.is_done(shard['id']):
+                with open(self.done_path(shard['id']), 'r') as f:
+                    failed += json.load(f)['failed']
+        return failed
+
+    def merge(self, output_dir: str, partial: bool = False) -> list:
+        """
+        Concatenate the results of all shards into one output per bank.
+
+        Results are read in shard order, so the merged files only depend on
+        the manifest. Returns the paths written.
+        """
+        status = self.status()
+        if not partial and (status['locked'] or status['pending']):
+            raise RuntimeError(
+                f"{len(status['locked']) + len(status['pending'])} shard(s) are not done; "
+                "wait for the workers or merge with --partial"
+            )
+
+        outputs = {}
+        for shard in self.shards:
+            if not self.is_done(shard['id']):
+                continue
+            for path in sorted(glob.glob(os.path.join(self.directory, 'results', shard['id'], '*.xlsx'))):
+                outputs.setdefault(os.path.basename(path), []).append(path)
+
+        written = []
+        for name, paths in sorted(outputs.items()):
+            df = pd.concat([pd.read_excel(path) for path in paths], ignore_index=True)
+            output_path = os.path.join(output_dir, name)
+            write_excel(df, output_path)
+            logger.info(f"Merged {len(paths)} shard(s) into {output_path} ({len(df)} rows)")
+            written.append(output_path)
+
+        return written
+
+def main():
+    """Plan, inspect and merge sharded extraction runs."""
+    parser = argparse.ArgumentParser(description='Distribute statement extraction across machines through a shared directory.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    plan = subparsers.add_parser('plan', help='Split the input files into shards and write the manifest')
+    plan.add_argument('-d', '--dir',
+                      required=True,
+                      help='Shared directory for the manifest, locks and results')
+    plan.add_argument('-f', '--file',
+                      required=True,
+                      nargs='+',
+                      help='Statement files to process')
+    plan.add_argument('-b', '--bank',
+                      help='Bank of all files (default: detected by the workers from each file)')
+    plan.add_argument('--shard-size',
+                      type=int,
+                      default=20,
+                      help='Files per shard (default: 20)')
+    plan.add_argument('--force',
+                      action='store_true',
+                      help='Overwrite an existing manifest')
+
+    status = subparsers.add_parser('status', help='Show the progress of the shards')
+    status.add_argument('-d', '--dir',
+                      required=True,
+                      help='Shared directory of the manifest')
+
+    merge = subparsers.add_parser('merge', help='Merge the shard results into one output per bank')
+    merge.add_argument('-d', '--dir',
+                      required=True,
+                      help='Shared directory of the manifest')
+    merge.add_argument('-o', '--output',
+                      default='data',
+                      help='Folder to save the merged outputs (default: data)')
+    merge.add_argument('--partial',
+                      action='store_true',
+                      help='Merge the finished shards even if others are not done')
+
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        manifest = ShardManifest.create(args.dir, args.file, args.shard_size, args.bank, args.force)
+        print(f"{len(manifest.shards)} shards written to {args.dir}. Start workers with:")
+        print(f"  python -m transaction_extractor --shards {args.dir}")
+        return
+
+    manifest = ShardManifest(args.dir)
+    if args.command == 'status':
+        for state, shards in manifest.status().items():
+            print(f"{state}: {len(shards)}")
+    else:
+        for path in manifest.merge(args.output, args.partial):
+            print(f"Saved {path}")
+
+    failed = manifest.failed_files()
+    if failed:
+        print(f"\n{len(failed)} file(s) failed: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import os
+import time
+import logging
+import argparse
+import itertools
+import pandas as pd
+from collections import Counter
+from .registry import (
+    EXTRACTORS,
+    get_extractor_class,
+    get_parser_class
+)
+from .extractors.profiles import (
+    OCRProfile,
+    get_profile,
+    save_profile,
+    USER_PROFILES_PATH
+)
+from .extractors.backends import OCRBackend, BACKENDS, get_backend
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Extensions of the statements and of their labels inside a tuning folder
+DOCUMENT_EXTENSIONS = ('.pdf', '.png')
+LABEL_EXTENSIONS = ('.csv', '.xlsx')
+
+# Fields compared between the labeled and the extracted transactions
+FIELDS = ('date', 'description', 'amount')
+
+# Values tried for each profile field; None means "derive from the current profile"
+SEARCH_SPACE = {
+    'psm': [6, 4, 11],
+    'dpi': [200, 250, 300],
+    'languages': None,
+    'preprocessing': None,
+    'rows': None,
+}
+
+def _field_values(df: pd.DataFrame, field: str) -> list:
+    """Return the normalized values of a field from a prettified DataFrame."""
+    if field == 'date':
+        return list(zip(df['year'].astype(int), df['month'].astype(int), df['day'].astype(int)))
+    if field == 'description':
+        return [str(value).strip().upper() for value in df['description']]
+    return [round(float(value), 2) for value in df['amount']]
+
+def field_accuracy(expected: pd.DataFrame, actual: pd.DataFrame) -> float:
+    """
+    Fraction of the labeled fields (date, description, amount) found in the
+    extracted transactions, compared as multisets so row order does not matter.
+    """
+    if expected.empty:
+        return 1.0 if actual.empty else 0.0
+    if actual.empty:
+        return 0.0
+
+    matched = 0
+    for field in FIELDS:
+        common = Counter(_field_values(expected, field)) & Counter(_field_values(actual, field))
+        matched += sum(common.values())
+
+    return matched / (len(expected) * len(FIELDS))
+
+def load_samples(folder: str) -> list:
+    """
+    Load the labeled statements from a folder.
+
+    Every statement (PDF or PNG) must have a label file with the same name
+    (CSV or Excel) holding the expected transactions in the prettified format.
+    """
+    samples = []
+    for name in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in DOCUMENT_EXTENSIONS:
+            continue
+
+        label_path = None
+        for label_ext in LABEL_EXTENSIONS:
+            candidate = os.path.join(folder, stem + label_ext)
+            if os.path.exists(candidate):
+                label_path = candidate
+                break
+
+        if not label_path:
+            logger.warning(f"Skipping {name}: no label file found")
+            continue
+
+        if label_path.endswith('.csv'):
+            expected = pd.read_csv(label_path)
+        else:
+            expected = pd.read_excel(label_path)
+        samples.append((os.path.join(folder, name), expected))
+
+    return samples
+
+class ProfileTuner:
+    """Search the OCR profile space for the fastest profile meeting a target accuracy."""
+
+    def __init__(self, bank: str, target_accuracy: float = 0.95, search_space: dict = None,
+                 backend: OCRBackend = None):
+        self.bank = bank
+        self.backend = backend
+        self.target_accuracy = target_accuracy
+        self.search_space = search_space or SEARCH_SPACE
+        self.base_profile = get_profile(bank)
+        self.extractor_class = get_extractor_class(bank)
+        self.parser_class = get_parser_class(bank)
+
+    def candidates(self, pdf_input: bool = True) -> list:
+        """
+        Enumerate candidate profiles, cheapest first (lower DPI and shorter
+        preprocessing), so good profiles bound the search early.
+
+        The DPI only sets the resolution PDFs are rasterized at, so it is
+        not searched when tuning on images (`pdf_input` False).
+        """
+        base = self.base_profile
+        space = dict(self.search_space)
+
+        if not pdf_input:
+            space['dpi'] = [base.dpi]
+
+        if space.get('languages') is None:
+            space['languages'] = [base.languages]
+            if len(base.languages) > 1:
+                space['languages'].append(base.languages[:1])
+
+        if space.get('preprocessing') is None:
+            space['preprocessing'] = [
+                base.preprocessing,
+                ['grayscale', 'otsu'],
+                ['grayscale'],
+            ]
+
+        if space.get('rows') is None:
+            space['rows'] = [base.rows, {**base.rows, 'enabled': not base.rows.get('enabled', False)}]
+
+        keys = list(space)
+        profiles = []
+        seen = set()
+        for values in itertools.product(*(space[key] for key in keys)):
+            profile = base.replace(**dict(zip(keys, values)))
+            signature = repr(profile.to_dict())
+            if signature not in seen:
+                seen.add(signature)
+                profiles.append(profile)
+
+        # Row segmentation OCRs fewer pixels, so it goes first among otherwise equal profiles
+        return sorted(profiles, key=lambda p: (p.dpi, len(p.preprocessing), not p.rows.get('enabled', False)))
+
+    def evaluate(self, profile: OCRProfile, samples: list, budget: float = None) -> tuple:
+        """
+        Run extraction and parsing with a profile over all samples.
+
+        Returns (accuracy, latency) where latency is the total extraction time in
+        seconds. Evaluation stops early, returning (None, latency), once the
+        latency exceeds the budget.
+        """
+        extractor = self.extractor_class(profile=profile, backend=self.backend)
+        latency = 0.0
+        scores = []
+
+        for file_path, expected in samples:
+            start = time.perf_counter()
+            text = extractor.extract_text(file_path)
+            latency += time.perf_counter() - start
+
+            if budget is not None and latency > budget:
+                return None, latency
+
+            # Text OCRed with a poor profile can break the parser in any way; it scores 0
+            try:
+                actual = self.parser_class().parse(text)
+            except Exception as e:
+                logger.info(f"Parsing {file_path} failed: {type(e).__name__}: {str(e)}")
+                actual = pd.DataFrame()
+            scores.append(field_accuracy(expected, actual))
+
+        return sum(scores) / len(scores), latency
+
+    def tune(self, samples: list) -> tuple:
+        """
+        Pick the lowest-latency profile reaching the target accuracy.
+
+        Returns the best profile (None if no candidate reached the target)
+        and a DataFrame with the results of every candidate.
+        """
+        if not samples:
+            raise ValueError("No labeled samples to tune on")
+
+        best_profile, best_latency = None, None
+        results = []
+
+        pdf_input = any(file_path.lower().endswith('.pdf') for file_path, _ in samples)
+        candidates = self.candidates(pdf_input)
+        for i, profile in enumerate(candidates):
+            logger.info(f"Evaluating profile {i+1} of {len(candidates)}: {profile.to_config(pdf_input)}")
+            accuracy, latency = self.evaluate(profile, samples, budget=best_latency)
+            results.append({
+                'config': profile.to_config(pdf_input),
+                'preprocessing': len(profile.preprocessing),
+                'accuracy': accuracy,
+                'latency': latency,
+            })
+
+            if accuracy is not None and accuracy >= self.target_accuracy:
+                if best_latency is None or latency < best_latency:
+                    best_profile, best_latency = profile, latency
+
+        return best_profile, pd.DataFrame(results)
+
+def main():
+    """Tune the OCR profile of a bank against a folder of labeled statements."""
+    parser = argparse.ArgumentParser(description='Tune OCR profiles against labeled statements.')
+    parser.add_argument('-b', '--bank',
+                      required=True,
+                      choices=list(EXTRACTORS),
+                      help='Bank whose OCR profile should be tuned')
+    parser.add_argument('-d', '--dir',
+                      required=True,
+                      help='Folder with statements and label files sharing the same name')
+    parser.add_argument('-t', '--target',
+                      type=float,
+                      default=0.95,
+                      help='Minimum field accuracy required (default: 0.95)')
+    parser.add_argument('-o', '--output',
+                      default=USER_PROFILES_PATH,
+                      help=f'Profile file to save the tuned profile to (default: {USER_PROFILES_PATH})')
+    parser.add_argument('--ocr-backend',
+                      choices=list(BACKENDS),
+                      default='tesseract',
+                      help='OCR engine used to evaluate the profiles (default: tesseract)')
+
+    args = parser.parse_args()
+
+    tuner = ProfileTuner(args.bank, target_accuracy=args.target, backend=get_backend(args.ocr_backend))
+    best_profile, results = tuner.tune(load_samples(args.dir))
+
+    print("\nTuning results:")
+    print(results.to_string(index=False))
+
+    if best_profile is None:
+        print(f"\nNo profile reached the target accuracy of {args.target}")
+        return
+
+    save_profile(args.bank, best_profile, args.output)
+    print(f"\nBest profile: {best_profile.to_config(tuner.extractor_class.rasterized)}")
+    print(f"Profile saved to {args.output}")
+
+if __name__ == "__main__":
+    main()